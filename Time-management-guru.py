@@ -1,11 +1,33 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import time
+_T0 = time.perf_counter()
+
+import os
 import sys
+import subprocess
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QFont
 
-from ui import ModernWindow
+
+def print_startup_report(phases):
+    from core import parse_importtime
+    print("Startup phases:")
+    print(phases.report())
+    if getattr(sys, "frozen", False):
+        return
+    # 在独立进程里重新导入 ui，统计各模块的导入耗时
+    try:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import ui"],
+                                capture_output=True, text=True, timeout=60,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except Exception as e:
+        print(f"importtime error: {e}")
+        return
+    print("Slowest imports (cumulative):")
+    for name, self_us, cumulative_us in parse_importtime(result.stderr):
+        print(f"  {name:<32}{cumulative_us / 1000:>8.1f}ms (self {self_us / 1000:.1f}ms)")
 
 def main():
     app = QApplication(sys.argv)
@@ -16,9 +38,36 @@ def main():
     
     app.setApplicationName("TimeManagementGuru")
     app.setOrganizationName("MyCompany")
+
+    # ui 在 QApplication 建好之后再导入，方便统计导入耗时
+    from core import PhaseTimer
+    phases = PhaseTimer(_T0)
+    phases.mark("qt_app")
+    from ui import ModernWindow
+    phases.mark("import_ui")
     
-    window = ModernWindow()
+    measure_ticks = "--measure-ticks" in sys.argv
+    window = ModernWindow(measure_ticks=measure_ticks, count_repaints="--count-repaints" in sys.argv, phases=phases)
+    phases.mark("window")
     window.show()
+
+    if measure_ticks:
+        # 退出时打印定时器迟到分布（毫秒）
+        app.aboutToQuit.connect(lambda: print(f"Tick lateness (ms): {window.ticker.lateness_report()}"))
+        app.aboutToQuit.connect(lambda: print(f"Wakeups per hour: {window.ticker.wakeups_per_hour()}"))
+
+    if "--dump-metrics" in sys.argv:
+        # 退出时把性能计数写成 JSON：--dump-metrics [路径]，默认 metrics.json
+        from core import METRICS
+        i = sys.argv.index("--dump-metrics")
+        path = sys.argv[i + 1] if i + 1 < len(sys.argv) and not sys.argv[i + 1].startswith("--") else "metrics.json"
+        app.aboutToQuit.connect(lambda: METRICS.dump_json(path))
+
+    if "--startup-report" in sys.argv:
+        def on_startup_finished():
+            print_startup_report(phases)
+            app.quit()
+        window.startup_finished.connect(on_startup_finished)
     
     sys.exit(app.exec())
 
@@ -0,0 +1,550 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""时间管理大师的性能基准，默认使用 offscreen 平台无界面运行。
+
+    python bench.py map resolve tzdialog schedule imports batch daemon interchange
+    python bench.py --suite --save-baseline bench_baseline.json
+    python bench.py --suite --compare bench_baseline.json --max-ratio 1.3
+
+--compare 时任何耗时指标超过基线 max-ratio 倍（吞吐量指标低于基线 1/max-ratio）
+即以非零状态退出，可用于升级前的回归门禁。带绝对上限的基准（imports 的导入耗时）
+超限时无论是否 --compare 都以非零状态退出。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import datetime
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _timeit(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    return {"min_ms": samples[0], "median_ms": samples[len(samples) // 2], "max_ms": samples[-1]}
+
+
+_qt_app = None
+
+
+def _app():
+    # 模块级持有 QApplication，避免解释器退出时先于控件被回收
+    global _qt_app
+    if _qt_app is None:
+        from PySide6.QtWidgets import QApplication
+        _qt_app = QApplication.instance() or QApplication(sys.argv[:1])
+    return _qt_app
+
+
+def bench_map_paint(repeat=200):
+    _app()
+    from PySide6.QtGui import QPixmap
+    from ui import MapWidget
+
+    widget = MapWidget("Asia/Shanghai")
+    target = QPixmap(widget.size())
+
+    def paint_cold():
+        # 每次都丢掉底图缓存，相当于缓存前的整图重绘
+        widget.invalidate_background()
+        widget.render(target)
+
+    def paint_warm():
+        widget.render(target)
+
+    widget.render(target)
+    return {"cold": _timeit(paint_cold, repeat), "warm": _timeit(paint_warm, repeat)}
+
+
+def bench_resolve_tz():
+    _app()
+    import pytz
+    from ui import MapWidget, map_offset_index
+
+    t0 = time.perf_counter()
+    map_offset_index()
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    widget = MapWidget("Asia/Shanghai")
+    zones = list(pytz.all_timezones)
+
+    def scroll():
+        # 模拟在时区下拉框里从头滚到尾
+        for tz in zones:
+            widget.set_timezone(tz)
+
+    result = _timeit(scroll, 5)
+    result["build_ms"] = build_ms
+    result["per_zone_us"] = result["median_ms"] * 1000.0 / len(zones)
+    return result
+
+
+def bench_tz_dialog(repeat=20):
+    _app()
+    from ui import TimezoneMapDialog, zone_search_index
+
+    t0 = time.perf_counter()
+    TimezoneMapDialog("Asia/Shanghai")
+    first_open_ms = (time.perf_counter() - t0) * 1000.0
+    reopen = _timeit(lambda: TimezoneMapDialog("Asia/Shanghai"), repeat)
+
+    t0 = time.perf_counter()
+    index = zone_search_index()
+    index_build_ms = (time.perf_counter() - t0) * 1000.0
+
+    queries = ["上海", "tokyo", "utc+8", "+05:30", "new y", "america/arg", "e"]
+    dialog = TimezoneMapDialog("Asia/Shanghai")
+    search = _timeit(lambda: [index.search(q) for q in queries], repeat)
+    ui_filter = _timeit(lambda: [dialog.filter_edit.setText(q) for q in queries], repeat)
+    return {
+        "first_open_ms": first_open_ms,
+        "reopen": reopen,
+        "index_build_ms": index_build_ms,
+        "search_per_query_us": search["median_ms"] * 1000.0 / len(queries),
+        "filter_per_keystroke_ms": ui_filter["median_ms"] / len(queries),
+    }
+
+
+def _generated_schedule(rows):
+    # 模拟按学期生成的大课表：每天 12 节，课程名循环
+    data = []
+    for i in range(rows):
+        start = (i * 37) % (24 * 60 - 45)
+        data.append({
+            "start": f"{start // 60:02d}:{start % 60:02d}",
+            "end": f"{(start + 45) // 60:02d}:{(start + 45) % 60:02d}",
+            "state": "上课" if i % 3 else "课间",
+            "course_name": f"第{i % 12 + 1}节课 · 第{i // 600 + 1}周",
+            "next_hint": "距离下课还有:" if i % 3 else "距离上课还有:",
+        })
+    return data
+
+
+def bench_schedule_load(rows=12000, repeat=20):
+    import json
+    from core import parse_schedule, read_schedule_file, schedule_cache_path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schedule.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_generated_schedule(rows), f, ensure_ascii=False, indent=2)
+
+        def load_json():
+            with open(path, "r", encoding="utf-8") as f:
+                return parse_schedule(json.load(f))
+
+        t0 = time.perf_counter()
+        compiled = read_schedule_file(path)[1]
+        compile_ms = (time.perf_counter() - t0) * 1000.0
+        assert compiled == load_json() == read_schedule_file(path)[1]
+        return {
+            "rows": rows,
+            "json": _timeit(load_json, repeat),
+            "cache": _timeit(lambda: read_schedule_file(path), repeat),
+            "first_load_with_compile_ms": compile_ms,
+            "json_kb": os.path.getsize(path) / 1024.0,
+            "cache_kb": os.path.getsize(schedule_cache_path(path)) / 1024.0,
+        }
+
+
+def bench_batch_query(n=1_000_000, scalar_sample=20000):
+    import datetime
+    import numpy as np
+    from core import ScheduleManager, parse_schedule, DEFAULT_SCHEDULE
+
+    manager = ScheduleManager(parse_schedule(DEFAULT_SCHEDULE))
+    batch = manager.batch()
+    rng = np.random.default_rng(0)
+    epochs = rng.integers(1_700_000_000, 1_800_000_000, n)
+
+    def scalar():
+        # 旧做法：逐个换成当地时间再查
+        tz = datetime.timezone(datetime.timedelta(hours=8))
+        for e in epochs[:scalar_sample].tolist():
+            manager.current_segment(datetime.datetime.fromtimestamp(e, tz).time())
+
+    vector = _timeit(lambda: batch.query(epochs, "Asia/Shanghai"), 5)
+    scalar_ms = _timeit(scalar, 3)["median_ms"] * n / scalar_sample
+    return {
+        "rows": n,
+        "batch": vector,
+        "scalar_extrapolated_ms": scalar_ms,
+        "speedup": scalar_ms / vector["median_ms"],
+    }
+
+
+def bench_daemon(rooms=200, distinct=10, subscribers=2000, clients=50, requests_per_client=200):
+    import json
+    import asyncio
+    from core import DEFAULT_SCHEDULE
+    from core.daemon import DisciplinedClock, ScheduleDaemon, ScheduleRegistry
+
+    async def run(tmp):
+        # 200 间教室只有 10 种不同的课表，验证相同内容只编译一次
+        for i in range(rooms):
+            variant = [dict(item, course_name=f"{item['course_name']} #{i % distinct}") for item in DEFAULT_SCHEDULE]
+            with open(os.path.join(tmp, f"room{i:03d}.json"), "w", encoding="utf-8") as f:
+                json.dump(variant, f, ensure_ascii=False)
+        registry = ScheduleRegistry()
+        t0 = time.perf_counter()
+        registry.load_directory(tmp)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+        daemon = ScheduleDaemon(registry, DisciplinedClock())
+        server = await daemon.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        received = {"state": 0, "transition": 0}
+        all_subscribed, all_notified = asyncio.Event(), asyncio.Event()
+
+        async def subscriber(i):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=65536)
+            writer.write(f"GET /events/room{i % rooms:03d} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            await reader.readuntil(b"\r\n\r\n")
+            try:
+                while True:
+                    chunk = await reader.readuntil(b"\n\n")
+                    event = chunk.split(b"\n", 1)[0].split(b": ", 1)[-1].decode()
+                    received[event] = received.get(event, 0) + 1
+                    if event == "state" and received["state"] == subscribers:
+                        all_subscribed.set()
+                    if event == "transition" and received["transition"] == subscribers:
+                        all_notified.set()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        async def poller():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for i in range(requests_per_client):
+                writer.write(f"GET /state/room{i % rooms:03d} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                await reader.readexactly(length)
+            writer.close()
+
+        t0 = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber(i)) for i in range(subscribers)]
+        await all_subscribed.wait()
+        subscribe_ms = (time.perf_counter() - t0) * 1000.0
+
+        t0 = time.perf_counter()
+        for group in registry.groups.values():
+            daemon.broadcast(group)
+        await all_notified.wait()
+        fanout_ms = (time.perf_counter() - t0) * 1000.0
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(poller() for _ in range(clients)))
+        query_s = time.perf_counter() - t0
+
+        await daemon.close()
+        await asyncio.gather(*tasks)
+        return {
+            "rooms": rooms,
+            "compiled_schedules": len(registry.groups),
+            "load_ms": load_ms,
+            "subscribers": subscribers,
+            "subscribe_all_ms": subscribe_ms,
+            "fanout_ms": fanout_ms,
+            "state_requests_per_s": clients * requests_per_client / query_s,
+        }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        return asyncio.run(run(tmp))
+
+
+def bench_lookup(queries=20000, repeat=5):
+    from core import ScheduleManager, parse_schedule, DEFAULT_SCHEDULE
+
+    rng = random.Random(0)
+    secs = [rng.randrange(24 * 3600) for _ in range(queries)]
+    times = [datetime.time(s // 3600, s // 60 % 60, s % 60) for s in secs]
+    base = datetime.datetime(2024, 3, 1)
+    stamps = [base + datetime.timedelta(seconds=s) for s in secs]
+
+    result = {}
+    for label, data in (("22", DEFAULT_SCHEDULE), ("500", _generated_schedule(500)),
+                        ("10k", _generated_schedule(10000))):
+        manager = ScheduleManager(parse_schedule(data))
+        current = _timeit(lambda: [manager.current_segment(t) for t in times], repeat)
+        nxt = _timeit(lambda: [manager.next_change_datetime(d) for d in stamps], repeat)
+        result[label] = {
+            "current_segment_us": current["median_ms"] * 1000.0 / queries,
+            "next_change_us": nxt["median_ms"] * 1000.0 / queries,
+        }
+    return result
+
+
+@contextlib.contextmanager
+def _temp_schedule_file():
+    """SCHEDULE_FILE 指向程序目录下的真实课表，基准期间把已导入模块里的这个路径换成临时文件。"""
+    import core.schedule
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schedule.json")
+        modules = [module for module in (core.schedule, sys.modules.get("ui")) if module is not None]
+        saved = [module.SCHEDULE_FILE for module in modules]
+        for module in modules:
+            module.SCHEDULE_FILE = path
+        try:
+            yield path
+        finally:
+            for module, value in zip(modules, saved):
+                module.SCHEDULE_FILE = value
+
+
+def bench_roundtrip(rows=500, repeat=20):
+    from core import load_schedule, save_schedule, schedule_cache_path
+
+    data = _generated_schedule(rows)
+    with _temp_schedule_file() as path:
+        save_schedule(data)
+        assert len(load_schedule()) == rows
+        roundtrip = _timeit(lambda: (save_schedule(data), load_schedule()), repeat)
+        load = _timeit(load_schedule, repeat)
+
+        def load_without_cache():
+            if os.path.exists(schedule_cache_path(path)):
+                os.remove(schedule_cache_path(path))
+            load_schedule()
+
+        cold = _timeit(load_without_cache, repeat)
+    return {"rows": rows, "roundtrip": roundtrip, "load": load, "load_without_cache": cold}
+
+
+def bench_tick(repeat=2000):
+    _app()
+    from core import DEFAULT_SCHEDULE, AppSettings, MemorySettingsBackend, save_schedule
+    from ui import ModernWindow, DisplayState
+
+    # 固定用默认课表和内存设置，结果不受本机课表、配置影响，也不会改动它们
+    with _temp_schedule_file():
+        save_schedule(DEFAULT_SCHEDULE)
+        window = ModernWindow(app_settings=AppSettings(MemorySettingsBackend()))
+        window.ticker.stop()
+
+        def full_tick():
+            # 清掉上一帧，让所有标签都重新 setText，相当于状态切换那一秒
+            window._display = DisplayState()
+            window.tick()
+
+        steady = _timeit(window.tick, repeat)
+        full = _timeit(full_tick, repeat)
+        window.close()
+    return {"tick_us": steady["median_ms"] * 1000.0, "full_tick_us": full["median_ms"] * 1000.0}
+
+
+def _write_term_calendar(path, weeks=20, groups=30, classes_per_day=12):
+    # 模拟教务系统导出全年级的课表：每个班每次课都是一个单独的 VEVENT，另有若干每周重复的事件
+    start = datetime.date(2024, 9, 2)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//ZH\r\n")
+        n = 0
+        for day in range(weeks * 7):
+            date = start + datetime.timedelta(days=day)
+            if date.weekday() >= 5:
+                continue
+            for k in range(classes_per_day * groups):
+                begin = datetime.datetime.combine(date, datetime.time(8)) + datetime.timedelta(minutes=55 * (k % classes_per_day))
+                f.write(f"BEGIN:VEVENT\r\nUID:{n}@bench\r\nDTSTAMP:20240801T000000Z\r\n"
+                        f"DTSTART;TZID=Asia/Shanghai:{begin:%Y%m%dT%H%M%S}\r\n"
+                        f"DTEND;TZID=Asia/Shanghai:{begin + datetime.timedelta(minutes=45):%Y%m%dT%H%M%S}\r\n"
+                        f"SUMMARY:{k // classes_per_day + 1}班 第{k % classes_per_day + 1}节 课程{(day + k) % 17}\r\n"
+                        f"LOCATION:教学楼{k % 5}0{k % classes_per_day}\r\n"
+                        f"DESCRIPTION:任课教师 {k % 9} 号\\n请提前到教室\r\nEND:VEVENT\r\n")
+                n += 1
+        for k in range(50):
+            f.write(f"BEGIN:VEVENT\r\nUID:r{k}@bench\r\nDTSTART:20240902T{k % 10:02d}3000Z\r\n"
+                    f"DURATION:PT30M\r\nRRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR;UNTIL=20250131T000000Z\r\n"
+                    f"SUMMARY:社团活动 {k}\r\nEND:VEVENT\r\n")
+        f.write("END:VCALENDAR\r\n")
+    return n + 50
+
+
+def bench_interchange(weeks=20, csv_rows=100000):
+    import tracemalloc
+    from core import iter_ics_segments, iter_csv_segments, write_csv
+
+    def measure(func):
+        start = time.perf_counter()
+        count = sum(1 for _ in func())
+        elapsed = (time.perf_counter() - start) * 1000.0
+        tracemalloc.start()
+        func_count = sum(1 for _ in func())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert func_count == count
+        return count, elapsed, peak / 1024.0
+
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ics_path = os.path.join(tmp, "term.ics")
+        events = _write_term_calendar(ics_path, weeks)
+
+        def read_ics():
+            with open(ics_path, "r", encoding="utf-8-sig", newline="") as f:
+                yield from iter_ics_segments(f, datetime.date(2024, 12, 4), tz_name="Asia/Shanghai")
+
+        segments, elapsed, peak_kb = measure(read_ics)
+        result["ics"] = {"file_mb": os.path.getsize(ics_path) / 1e6, "events": events, "segments": segments,
+                         "import_ms": elapsed, "events_per_s": events / elapsed * 1000.0, "peak_kb": peak_kb}
+
+        from core import parse_schedule
+        csv_path = os.path.join(tmp, "term.csv")
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            write_csv(parse_schedule(_generated_schedule(csv_rows)), f)
+
+        def read_csv():
+            with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+                yield from iter_csv_segments(f)
+
+        rows, elapsed, peak_kb = measure(read_csv)
+        # 逐个消费时只占常数内存；调用方自己 list() 才会随行数增长
+        result["csv"] = {"file_mb": os.path.getsize(csv_path) / 1e6, "rows": rows, "import_ms": elapsed,
+                         "rows_per_s": rows / elapsed * 1000.0, "peak_kb": peak_kb}
+    return result
+
+
+# 无界面使用核心包（课表 + 设置）时允许的导入耗时上限
+CORE_IMPORT_BUDGET_MS = 60.0
+CORE_IMPORT_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import core.schedule, core.settings
+elapsed = (time.perf_counter() - t0) * 1000.0
+print(elapsed, any(name.startswith(("PySide6", "winreg", "pytz", "requests")) for name in sys.modules))
+"""
+
+
+def bench_core_import(repeat=5):
+    # 每次都在全新的解释器里导入，取最小值排除磁盘缓存的影响
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples, heavy_loaded = [], False
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", CORE_IMPORT_PROBE], capture_output=True, text=True,
+                             cwd=here, check=True).stdout.split()
+        samples.append(float(out[0]))
+        heavy_loaded = heavy_loaded or out[1] == "True"
+    best = min(samples)
+    return {
+        "min_ms": best,
+        "budget_ms": CORE_IMPORT_BUDGET_MS,
+        "within_budget": best <= CORE_IMPORT_BUDGET_MS and not heavy_loaded,
+        "heavy_modules_loaded": heavy_loaded,
+    }
+
+
+BENCHMARKS = {
+    "lookup": bench_lookup,
+    "roundtrip": bench_roundtrip,
+    "tick": bench_tick,
+    "map": bench_map_paint,
+    "resolve": bench_resolve_tz,
+    "tzdialog": bench_tz_dialog,
+    "schedule": bench_schedule_load,
+    "imports": bench_core_import,
+    "batch": bench_batch_query,
+    "daemon": bench_daemon,
+    "interchange": bench_interchange,
+}
+
+
+# 回归门禁默认跑的热路径
+SUITE = ["lookup", "roundtrip", "tick", "map", "tzdialog", "imports"]
+MAX_REGRESSION_RATIO = 1.3
+
+
+def flatten(result, prefix=""):
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def _direction(metric):
+    """耗时指标越小越好返回 1，吞吐量越大越好返回 -1，其余（行数、大小、倍数）不参与比较。"""
+    last = metric.rsplit(".", 1)[-1]
+    if last in ("min_ms", "max_ms"):
+        # 只看中位数，最值受调度抖动影响太大
+        return 0
+    if last.endswith(("_ms", "_us")):
+        return 1
+    if last.endswith("_per_s"):
+        return -1
+    return 0
+
+
+def compare(current, baseline, max_ratio):
+    """返回 (指标, 基线, 本次, 比值) 的回归列表；比值 > 1 表示变差。"""
+    regressions = []
+    for metric, value in sorted(current.items()):
+        direction = _direction(metric)
+        old = baseline.get(metric)
+        if not direction or not old or not value:
+            continue
+        ratio = value / old if direction > 0 else old / value
+        if ratio > max_ratio:
+            regressions.append((metric, old, value, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间管理大师性能基准")
+    parser.add_argument("names", nargs="*", help=f"要运行的基准，默认全部: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--suite", action="store_true", help=f"只跑回归门禁用的热路径: {', '.join(SUITE)}")
+    parser.add_argument("--save-baseline", metavar="FILE", help="把本次结果存为基线")
+    parser.add_argument("--compare", metavar="FILE", help="与基线比较，回归超过阈值时返回非零")
+    parser.add_argument("--max-ratio", type=float, default=MAX_REGRESSION_RATIO,
+                        help=f"允许的最大变慢倍数，默认 {MAX_REGRESSION_RATIO}")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知基准: {', '.join(unknown)}")
+
+    flat, over_budget = {}, []
+    for name in args.names or (SUITE if args.suite else BENCHMARKS):
+        result = BENCHMARKS[name]()
+        print(name, result)
+        flat.update(flatten(result, name))
+        # 带绝对上限的基准（例如导入耗时）超限时直接判失败，不依赖基线
+        if result.get("within_budget") is False:
+            over_budget.append(name)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "metrics": flat}, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.save_baseline} ({len(flat)} metrics)")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(flat, baseline, args.max_ratio)
+        for metric, old, new, ratio in regressions:
+            print(f"REGRESSION {metric}: {old:.3f} -> {new:.3f} ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_ratio:.2f}x")
+
+    for name in over_budget:
+        print(f"OVER BUDGET {name}")
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""时间管理大师的核心引擎：课表模型与查询、时区、网络校时、设置存储。
+
+纯 Python，不依赖 Qt，可以在无界面的服务器上导入。`import core` 只加载常量，
+其余名字第一次访问时才导入对应子模块；Qt 和 Windows 相关的部分在
+core.qt_settings / core.autostart 里，只有用到时才会加载。
+"""
+
+import importlib
+
+from .constants import (APP_NAME, APP_DIR, RUN_KEY, CONFIG_FILE, SCHEDULE_FILE, TIME_SYNC_URL,
+                        TIME_SOURCE_HTTP, TIME_SOURCE_SNTP, DEFAULT_SNTP_SERVERS, SNTP_PORT)
+
+_SUBMODULE_EXPORTS = {
+    "schedule": ["DEFAULT_SCHEDULE", "Segment", "parse_schedule", "load_schedule", "read_schedule_file",
+                 "schedule_file_digest", "save_schedule", "SCHEDULE_CACHE_MAGIC", "SCHEDULE_CACHE_VERSION",
+                 "schedule_cache_path", "compile_schedule", "load_schedule_cache", "SECONDS_PER_DAY",
+                 "UNKNOWN_SEGMENT", "time_to_seconds", "parse_day_time", "format_day_seconds", "DIAG_OVERLAP",
+                 "DIAG_GAP", "DIAG_EMPTY", "ScheduleDiagnostic", "ScheduleIndex", "ScheduleManager"],
+    "timezones": ["TimezoneService", "ZONE_TABLES", "parse_iso6709", "load_zone_coordinates",
+                  "utc_offset_minutes", "ZoneOffsetIndex", "ZONE_ALIASES", "all_timezone_names",
+                  "is_valid_timezone", "format_utc_offset", "ZoneSearchIndex"],
+    "timesource": ["get_network_time", "NTP_EPOCH_DELTA", "sntp_query", "get_sntp_offset", "measure_time_offset"],
+    "settings": ["Notifier", "SettingsBackend", "MemorySettingsBackend", "JsonSettingsBackend", "AppSettings"],
+    "profiling": ["PhaseTimer", "parse_importtime", "summarize_samples", "DEFAULT_BUCKETS_MS", "Counter",
+                  "Histogram", "MetricsRegistry", "METRICS"],
+    "analytics": ["BatchSchedule", "local_epoch_seconds", "seconds_of_day"],
+    "reminders": ["ReminderRule", "Reminder", "ReminderQueue", "default_reminder_rules"],
+    "interchange": ["iter_ics_events", "iter_ics_segments", "expand_rrule", "iter_csv_segments", "fill_gaps",
+                    "segment_to_dict", "write_csv", "write_ics", "import_schedule", "export_schedule"],
+}
+_EXPORTS = {name: module for module, names in _SUBMODULE_EXPORTS.items() for name in names}
+
+__all__ = ["APP_NAME", "APP_DIR", "RUN_KEY", "CONFIG_FILE", "SCHEDULE_FILE", "TIME_SYNC_URL", "TIME_SOURCE_HTTP",
+           "TIME_SOURCE_SNTP", "DEFAULT_SNTP_SERVERS", "SNTP_PORT"] + list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
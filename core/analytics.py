@@ -0,0 +1,115 @@
+"""课表的批量查询与统计，基于 NumPy（可选依赖，只有用到时才导入）。
+
+构造时在 ScheduleIndex 编译好的边界数组上对一天的每一秒做一次 np.searchsorted，
+得到两张 86400 项的表；之后整批日内秒或时间戳的查询都只是一次 np.take，
+不再逐个构造 datetime.time。
+"""
+
+import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from .schedule import ScheduleIndex, SECONDS_PER_DAY, UNKNOWN_SEGMENT
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def local_epoch_seconds(epochs, tz_name: Optional[str] = None) -> np.ndarray:
+    """把 UTC 时间戳换算成当地挂钟秒数（仍以 1970-01-01 为零点），夏令时按 pytz 的切换表逐个处理。"""
+    epochs = np.asarray(epochs)
+    if tz_name is None:
+        return epochs
+    import pytz
+    zone = pytz.timezone(tz_name)
+    times = getattr(zone, "_utc_transition_times", None)
+    if not times:
+        offset = zone.utcoffset(_EPOCH).total_seconds()
+        return epochs + (int(offset) if np.issubdtype(epochs.dtype, np.integer) else offset)
+    # 第一项是 datetime.min 之类的哨兵，减掉纪元后依然最小，searchsorted 不受影响
+    transitions = np.array([(t - _EPOCH).total_seconds() for t in times])
+    offsets = np.array([info[0].total_seconds() for info in zone._transition_info])
+    idx = np.searchsorted(transitions, epochs, side="right") - 1
+    shift = offsets[np.clip(idx, 0, len(offsets) - 1)]
+    if np.issubdtype(epochs.dtype, np.integer):
+        shift = shift.astype(epochs.dtype)
+    return epochs + shift
+
+
+def seconds_of_day(epochs, tz_name: Optional[str] = None) -> np.ndarray:
+    return local_epoch_seconds(epochs, tz_name) % SECONDS_PER_DAY
+
+
+class BatchSchedule:
+    """ScheduleIndex 的 NumPy 视图。日内秒可以是整数或浮点数组，返回同形状的数组。"""
+
+    def __init__(self, index: ScheduleIndex):
+        self.index = index
+        self.bounds = np.frombuffer(index.bounds, dtype=np.int32).astype(np.int64)
+        self.slots = np.frombuffer(index.slots, dtype=np.int32).astype(np.int64)
+        self.run_ends = np.append(self.bounds[1:], SECONDS_PER_DAY)
+        self.change_points = np.asarray(index.change_points, dtype=np.int64)
+        # 末尾多放一个"未知"，slot 为 -1 时正好取到它
+        self.segments = list(index.segments) + [UNKNOWN_SEGMENT]
+
+        # 边界都是整秒，所以 [k, k + 1) 内任意小数秒的结果都与整秒 k 相同
+        seconds = np.arange(SECONDS_PER_DAY)
+        self.slot_table = self.slots[np.searchsorted(self.bounds, seconds, side="right") - 1]
+        cps = self.change_points
+        if len(cps):
+            i = np.searchsorted(cps, seconds, side="right")
+            self.next_table = np.where(i < len(cps), cps[np.minimum(i, len(cps) - 1)], cps[0] + SECONDS_PER_DAY)
+        else:
+            self.next_table = None
+
+    @staticmethod
+    def _whole_seconds(sod) -> np.ndarray:
+        sod = np.asarray(sod)
+        return sod if np.issubdtype(sod.dtype, np.integer) else sod.astype(np.int64)
+
+    def slots_at(self, sod) -> np.ndarray:
+        """每个日内秒所在区段在 segments 中的下标，没有区段覆盖时为 -1。"""
+        return self.slot_table[self._whole_seconds(sod)]
+
+    def labels(self, key: str = "state") -> np.ndarray:
+        return np.array([getattr(seg, key) for seg in self.segments], dtype=object)
+
+    def states_at(self, sod, key: str = "state") -> np.ndarray:
+        return self.labels(key)[self.slots_at(sod)]
+
+    def remaining_at(self, sod) -> np.ndarray:
+        """距离下一个变化点的秒数，与 ScheduleManager.remaining_to_next_change 一致（跨午夜时绕到次日）。"""
+        if self.next_table is None:
+            # 空课表：与 ScheduleManager 一样，把"下一次变化"当作一天以后
+            return np.zeros_like(sod) + SECONDS_PER_DAY
+        return self.next_table[self._whole_seconds(sod)] - sod
+
+    def query(self, epochs, tz_name: Optional[str] = None, key: str = "state") -> Dict[str, np.ndarray]:
+        """对一批 UTC 时间戳一次求出区段下标、状态和剩余秒数。"""
+        sod = seconds_of_day(epochs, tz_name)
+        slots = self.slots_at(sod)
+        return {"slots": slots, key: self.labels(key)[slots], "remaining": self.remaining_at(sod)}
+
+    def _window(self, start, end) -> np.ndarray:
+        # 每个连续区间与日内 [start, end) 的重叠秒数
+        return np.clip(np.minimum(self.run_ends, end) - np.maximum(self.bounds, start), 0, None)
+
+    def durations(self, start: datetime.datetime, end: datetime.datetime, key: str = "state") -> Dict[str, float]:
+        """统计 [start, end) 内按 key（state / course_name / ...）汇总的总秒数。
+
+        start/end 按当地挂钟时间理解（不带 tzinfo），每天套用同一张课表。
+        """
+        a = (start.replace(tzinfo=None) - _EPOCH).total_seconds()
+        b = (end.replace(tzinfo=None) - _EPOCH).total_seconds()
+        if b <= a:
+            return {}
+        day_a, day_b = int(a // SECONDS_PER_DAY), int(b // SECONDS_PER_DAY)
+        sod_a, sod_b = a - day_a * SECONDS_PER_DAY, b - day_b * SECONDS_PER_DAY
+        if day_a == day_b:
+            covered = self._window(sod_a, sod_b)
+        else:
+            covered = (self._window(sod_a, SECONDS_PER_DAY) + self._window(0, sod_b)
+                       + (day_b - day_a - 1) * self._window(0, SECONDS_PER_DAY))
+        names, codes = np.unique(self.labels(key)[self.slots], return_inverse=True)
+        totals = np.bincount(codes, weights=covered, minlength=len(names))
+        return {name: float(total) for name, total in zip(names, totals) if total > 0}
@@ -0,0 +1,78 @@
+"""开机自启适配器。winreg 只在 Windows 上、真正读写注册表时才导入。"""
+
+import os
+import sys
+
+from .constants import APP_NAME, RUN_KEY
+
+
+class Autostart:
+    """不支持开机自启的平台：始终返回未启用，设置时报错。"""
+    supported = False
+
+    def is_enabled(self) -> bool:
+        return False
+
+    def set_enabled(self, enable: bool, command: str):
+        if enable:
+            raise OSError(f"当前平台不支持开机自启: {sys.platform}")
+
+
+class WindowsRunKeyAutostart(Autostart):
+    supported = True
+
+    def is_enabled(self) -> bool:
+        import winreg
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, RUN_KEY, 0, winreg.KEY_READ) as key:
+                winreg.QueryValueEx(key, APP_NAME)
+                return True
+        except FileNotFoundError:
+            return False
+
+    def set_enabled(self, enable: bool, command: str):
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, RUN_KEY, 0, winreg.KEY_ALL_ACCESS) as key:
+            if enable:
+                winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, command)
+            else:
+                try:
+                    winreg.DeleteValue(key, APP_NAME)
+                except FileNotFoundError:
+                    pass
+
+
+class XdgAutostart(Autostart):
+    """Linux 桌面环境：在 ~/.config/autostart 下放一个 .desktop 文件。"""
+    supported = True
+
+    def __init__(self):
+        config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+        self.path = os.path.join(config_home, "autostart", f"{APP_NAME}.desktop")
+
+    def is_enabled(self) -> bool:
+        return os.path.exists(self.path)
+
+    def set_enabled(self, enable: bool, command: str):
+        if not enable:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            return
+        if command.endswith(".py"):
+            command = f'"{sys.executable}" "{command}"'
+        elif " " in command:
+            command = f'"{command}"'
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(f"[Desktop Entry]\nType=Application\nName=时间管理大师\nExec={command}\n"
+                    "X-GNOME-Autostart-enabled=true\n")
+
+
+def get_autostart() -> Autostart:
+    if sys.platform == "win32":
+        return WindowsRunKeyAutostart()
+    if sys.platform.startswith("linux"):
+        return XdgAutostart()
+    return Autostart()
@@ -0,0 +1,18 @@
+"""全局常量，其他子模块共享。"""
+
+import os
+import sys
+
+APP_NAME = "TimeManagementGuru"
+RUN_KEY = r"Software\Microsoft\Windows\CurrentVersion\Run"
+# 课表和配置放在程序所在目录（打包后是 exe 所在目录），不随工作目录变：开机自启时工作目录往往是系统目录
+APP_DIR = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, "frozen", False)
+                                          else (sys.argv[0] if sys.argv else "")))
+CONFIG_FILE = os.path.join(APP_DIR, "config.json")
+SCHEDULE_FILE = os.path.join(APP_DIR, "schedule.json")
+TIME_SYNC_URL = "https://www.baidu.com"
+
+TIME_SOURCE_HTTP = "http"
+TIME_SOURCE_SNTP = "sntp"
+DEFAULT_SNTP_SERVERS = ["ntp.aliyun.com", "ntp.tencent.com", "cn.pool.ntp.org"]
+SNTP_PORT = 123
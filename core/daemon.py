@@ -0,0 +1,416 @@
+"""多教室课表守护进程：一个进程加载多张课表，统一校时，通过本地 HTTP 提供查询，
+并用 Server-Sent Events 向订阅者推送状态切换，客户端不再需要轮询。
+
+    python -m core.daemon --schedules ./rooms --port 8765
+    python -m core.daemon --schedules ./rooms --unix /run/tmg.sock
+
+接口：
+    GET /schedules           所有课表名
+    GET /state/<name>        当前状态与剩余秒数（JSON）
+    GET /events/<name>       text/event-stream，先推送一次当前状态，之后每次切换推送 transition
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import datetime
+import dataclasses
+from typing import Dict, List, Optional, Set
+from urllib.parse import unquote, urlsplit
+
+from .constants import TIME_SOURCE_HTTP, TIME_SOURCE_SNTP
+from .schedule import Segment, ScheduleManager, read_schedule_file
+from .settings import Notifier
+from .timesource import measure_time_offset
+from .timezones import TimezoneService
+
+
+class DisciplinedClock:
+    """整个进程共用的时钟：单调时钟推进 + 定期测量的网络偏移。
+
+    只有一个协程在测量，成功后每 resync_interval 秒重测，失败则指数退避。
+    偏移变化时通过 changed 通知，让等待中的定时重新计算。
+    """
+    RETRY_MIN = 30.0
+    RETRY_MAX = 30 * 60.0
+    # 单调时钟和系统时钟相差超过这么多秒就以系统时钟为准：挂起期间单调时钟不走，系统时间也可能被改过
+    MAX_DRIFT = 1.0
+
+    def __init__(self, source: Optional[str] = None, servers: Optional[List[str]] = None,
+                 resync_interval: float = 3600.0, url: Optional[str] = None):
+        self.source = source
+        self.servers = servers
+        self.url = url
+        self.resync_interval = resync_interval
+        self.offset = datetime.timedelta(0)
+        self.synced_at = None
+        self.changed = Notifier()
+        self._base_utc = datetime.datetime.now(datetime.timezone.utc)
+        self._base_mono = time.monotonic()
+        self._resync = asyncio.Event()
+
+    def now_utc(self) -> datetime.datetime:
+        # 用单调时钟推进，系统时间的小幅调整不会让时间来回跳；差得太多（挂起恢复、手动改时间）时重新对齐
+        mono = time.monotonic()
+        wall = datetime.datetime.now(datetime.timezone.utc)
+        base = self._base_utc + datetime.timedelta(seconds=mono - self._base_mono)
+        if abs((wall - base).total_seconds()) > self.MAX_DRIFT:
+            self._rebase(wall, mono)
+            base = wall
+        return base + self.offset
+
+    def _rebase(self, wall: datetime.datetime, mono: float):
+        self._base_utc, self._base_mono = wall, mono
+        # 网络偏移是按之前的系统时间测的，让 run 立即重测；等待中的切换定时也按新时间重新计算
+        self._resync.set()
+        self.changed.emit()
+
+    def set_offset(self, offset: datetime.timedelta):
+        self._base_utc = datetime.datetime.now(datetime.timezone.utc)
+        self._base_mono = time.monotonic()
+        self.offset = offset
+        self.synced_at = self.now_utc()
+        self.changed.emit()
+
+    async def run(self):
+        if self.source is None:
+            return
+        loop = asyncio.get_running_loop()
+        retry = self.RETRY_MIN
+        while True:
+            self._resync.clear()
+            offset = await loop.run_in_executor(None, measure_time_offset, self.source, self.servers, self.url)
+            if offset is None:
+                delay = retry
+                retry = min(retry * 2, self.RETRY_MAX)
+            else:
+                retry = self.RETRY_MIN
+                self.set_offset(offset)
+                delay = self.resync_interval
+            try:
+                await asyncio.wait_for(self._resync.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+@dataclasses.dataclass(eq=False)
+class ScheduleGroup:
+    """内容完全相同的课表共用一个 ScheduleManager、一个切换定时。"""
+    digest: str
+    manager: ScheduleManager
+    names: Set[str] = dataclasses.field(default_factory=set)
+    rearm: asyncio.Event = dataclasses.field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+
+class ScheduleRegistry:
+    """按名字管理多张课表。相同内容（sha1 相同）只编译一次，所有字符串做驻留。"""
+
+    def __init__(self):
+        self.groups: Dict[str, ScheduleGroup] = {}
+        self.names: Dict[str, str] = {}
+        self._strings: Dict[str, str] = {}
+
+    def _intern(self, text: str) -> str:
+        return self._strings.setdefault(text, text)
+
+    def _intern_segment(self, seg: Segment) -> Segment:
+        return dataclasses.replace(seg, state=self._intern(seg.state),
+                                   course_name=self._intern(seg.course_name),
+                                   next_hint=self._intern(seg.next_hint))
+
+    def load(self, name: str, path: str) -> ScheduleGroup:
+        # 不写编译缓存：课表目录可能只读，也不该在被扫描的目录里多出 .cache 文件
+        digest, segments = read_schedule_file(path, use_cache=False)
+        if self.names.get(name) == digest:
+            return self.groups[digest]
+        self.remove(name)
+        group = self.groups.get(digest)
+        if group is None:
+            group = ScheduleGroup(digest, ScheduleManager([self._intern_segment(seg) for seg in segments]))
+            self.groups[digest] = group
+        group.names.add(name)
+        self.names[name] = digest
+        return group
+
+    def remove(self, name: str):
+        digest = self.names.pop(name, None)
+        if digest is None:
+            return
+        group = self.groups[digest]
+        group.names.discard(name)
+        if not group.names:
+            del self.groups[digest]
+            if group.task is not None:
+                group.task.cancel()
+
+    def load_directory(self, directory: str) -> List[str]:
+        """目录下每个 *.json 是一张课表，文件名（不含扩展名）就是课表名。"""
+        loaded = []
+        for entry in sorted(os.listdir(directory)):
+            if not entry.endswith(".json"):
+                continue
+            name = entry[:-len(".json")]
+            try:
+                self.load(name, os.path.join(directory, entry))
+                loaded.append(name)
+            except Exception as e:
+                print(f"Load schedule error ({entry}): {e}")
+        for name in set(self.names) - set(loaded):
+            self.remove(name)
+        return loaded
+
+    def group_of(self, name: str) -> Optional[ScheduleGroup]:
+        digest = self.names.get(name)
+        return self.groups.get(digest) if digest is not None else None
+
+
+class ScheduleDaemon:
+    MAX_REQUEST_BYTES = 8192
+    # 订阅者积压超过这个字节数就断开，避免一个卡住的客户端拖住整个进程
+    MAX_PENDING_BYTES = 64 * 1024
+    KEEPALIVE_INTERVAL = 30.0
+
+    def __init__(self, registry: ScheduleRegistry, clock: DisciplinedClock, tz_name: str = TimezoneService.FALLBACK):
+        self.registry = registry
+        self.clock = clock
+        self.tz_service = TimezoneService(tz_name)
+        self.subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self.events_sent = 0
+        self.clock.changed.connect(self.rearm_all)
+        self._servers = []
+        self._tasks = []
+        self._handlers = set()
+
+    # ---- 查询 ----
+    def now_local(self) -> datetime.datetime:
+        return self.tz_service.to_local(self.clock.now_utc())
+
+    def snapshot(self, name: str, now_local: Optional[datetime.datetime] = None) -> Optional[dict]:
+        group = self.registry.group_of(name)
+        if group is None:
+            return None
+        now_local = now_local or self.now_local()
+        manager = group.manager
+        seg = manager.current_segment(now_local.time())
+        next_change = manager.next_change_instant(now_local, self.tz_service)
+        return {
+            "name": name,
+            "state": seg.state,
+            "course_name": seg.course_name,
+            "next_hint": seg.next_hint,
+            "remaining": max(0.0, (next_change - now_local).total_seconds()),
+            "next_change": next_change.isoformat(),
+        }
+
+    # ---- 推送 ----
+    def rearm_all(self):
+        for group in self.registry.groups.values():
+            group.rearm.set()
+
+    def ensure_watchers(self):
+        for group in self.registry.groups.values():
+            if group.task is None or group.task.done():
+                group.task = asyncio.get_running_loop().create_task(self._watch(group))
+
+    async def _watch(self, group: ScheduleGroup):
+        # 每组课表只有一个定时：睡到下一个切换点，然后一次性推给这组所有课表名的订阅者
+        while True:
+            now_local = self.now_local()
+            target = group.manager.next_change_instant(now_local, self.tz_service)
+            group.rearm.clear()
+            try:
+                await asyncio.wait_for(group.rearm.wait(), timeout=max(0.0, (target - now_local).total_seconds()))
+                continue
+            except asyncio.TimeoutError:
+                pass
+            # 事件循环的定时可能略早触发，确保推送时已经越过切换点
+            early = (target - self.clock.now_utc()).total_seconds()
+            if early > 0:
+                await asyncio.sleep(early)
+            self.broadcast(group, "transition")
+
+    def broadcast(self, group: ScheduleGroup, event: str = "transition"):
+        now_local = self.now_local()
+        for name in list(group.names):
+            writers = self.subscribers.get(name)
+            if not writers:
+                continue
+            payload = self._event_bytes(event, self.snapshot(name, now_local))
+            for writer in list(writers):
+                self._send(name, writer, payload)
+
+    @staticmethod
+    def _event_bytes(event: str, data) -> bytes:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+    def _send(self, name: str, writer: asyncio.StreamWriter, payload: bytes):
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > self.MAX_PENDING_BYTES:
+            self._drop(name, writer)
+            return
+        writer.write(payload)
+        self.events_sent += 1
+
+    def _drop(self, name: str, writer: asyncio.StreamWriter):
+        writers = self.subscribers.get(name)
+        if writers is not None:
+            writers.discard(writer)
+            if not writers:
+                del self.subscribers[name]
+        writer.close()
+
+    async def _keepalive(self):
+        # SSE 注释行，防止中间的代理或 NAT 因空闲断开长连接
+        while True:
+            await asyncio.sleep(self.KEEPALIVE_INTERVAL)
+            # 顺便读一次时钟：没有请求时也能及时发现刚从挂起恢复，让切换定时重新计算
+            self.clock.now_utc()
+            for name, writers in list(self.subscribers.items()):
+                for writer in list(writers):
+                    self._send(name, writer, b": keepalive\n\n")
+
+    # ---- HTTP ----
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {"error": "bad request"}, keep_alive=False)
+                    break
+                method, target, version = parts
+                # 去掉查询串再解码，课表名既可以百分号编码也可以直接发 UTF-8
+                path = unquote(urlsplit(target.encode("latin-1").decode("utf-8", "replace")).path,
+                               encoding="utf-8", errors="replace")
+                headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if method != "GET":
+                    await self._respond(writer, 405, {"error": "method not allowed"}, keep_alive)
+                elif path.startswith("/events/"):
+                    await self._stream(path[len("/events/"):], reader, writer)
+                    return
+                else:
+                    status, body = self._route(path)
+                    await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            self._handlers.discard(task)
+            if not writer.is_closing():
+                writer.close()
+
+    def _route(self, path: str):
+        if path == "/schedules":
+            return 200, sorted(self.registry.names)
+        if path.startswith("/state/"):
+            snapshot = self.snapshot(path[len("/state/"):])
+            if snapshot is not None:
+                return 200, snapshot
+        return 404, {"error": "not found"}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, body, keep_alive: bool):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                     .encode("latin-1") + data)
+        await writer.drain()
+
+    async def _stream(self, name: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        snapshot = self.snapshot(name)
+        if snapshot is None:
+            await self._respond(writer, 404, {"error": "not found"}, keep_alive=False)
+            return
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n" + self._event_bytes("state", snapshot))
+        self.subscribers.setdefault(name, set()).add(writer)
+        try:
+            # 订阅者不会再发数据，读到 EOF 说明连接断开了
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._drop(name, writer)
+
+    # ---- 生命周期 ----
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self._handle, path=unix_path, limit=self.MAX_REQUEST_BYTES)
+        else:
+            server = await asyncio.start_server(self._handle, host, port, limit=self.MAX_REQUEST_BYTES,
+                                                backlog=4096)
+        self._servers.append(server)
+        self.ensure_watchers()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._keepalive()), loop.create_task(self.clock.run())]
+        return server
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for group in self.registry.groups.values():
+            if group.task is not None:
+                group.task.cancel()
+        for name, writers in list(self.subscribers.items()):
+            for writer in list(writers):
+                self._drop(name, writer)
+        # 连接关闭后各处理协程会读到 EOF 自行退出，等它们结束再返回
+        if self._handlers:
+            await asyncio.wait(list(self._handlers), timeout=5.0)
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+
+async def _serve(args):
+    registry = ScheduleRegistry()
+    names = registry.load_directory(args.schedules)
+    clock = DisciplinedClock(args.sync, args.servers.split(",") if args.servers else None)
+    daemon = ScheduleDaemon(registry, clock, args.tz)
+    server = await daemon.start(args.host, args.port, args.unix)
+
+    loop = asyncio.get_running_loop()
+    if hasattr(signal, "SIGHUP"):
+        def reload():
+            registry.load_directory(args.schedules)
+            daemon.ensure_watchers()
+            daemon.rearm_all()
+        loop.add_signal_handler(signal.SIGHUP, reload)
+
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Serving {len(names)} schedules ({len(registry.groups)} distinct) on {where}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="时间管理大师多教室课表守护进程")
+    parser.add_argument("--schedules", required=True, help="课表目录，每个 *.json 是一张课表")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="改为监听 Unix 套接字路径")
+    parser.add_argument("--tz", default=TimezoneService.FALLBACK)
+    parser.add_argument("--sync", choices=[TIME_SOURCE_HTTP, TIME_SOURCE_SNTP], help="启用网络校时")
+    parser.add_argument("--servers", help="SNTP 服务器，逗号分隔")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,506 @@
+"""课表与日历/表格之间的导入导出：ICS（iCalendar）和 CSV。
+
+导入函数都是生成器：逐行读文件，一次只持有一个 VEVENT 的属性，几兆的日历也只占常数内存。
+日历事件带日期而课表按天循环，所以 ICS 导入只取开始时间落在给定窗口内的发生，
+按 (开始, 结束, 状态, 课程) 去重后变成 Segment。
+
+RRULE 支持 FREQ=DAILY/WEEKLY 及 INTERVAL、COUNT、UNTIL、BYDAY，另支持 EXDATE；
+其他频率只取 DTSTART 那一次。全天事件和 STATUS:CANCELLED 的事件会被跳过。
+"""
+
+import re
+import csv
+import sys
+import datetime
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+import pytz
+
+from .schedule import Segment, SECONDS_PER_DAY, time_to_seconds, parse_day_time, format_day_seconds
+
+CSV_FIELDS = ("start", "end", "state", "course_name", "next_hint")
+# 表头也认课表编辑器里的中文列名，方便直接用表格软件整理
+CSV_HEADER_ALIASES = {"开始时间": "start", "结束时间": "end", "状态": "state", "课程名": "course_name",
+                      "课程": "course_name", "下阶段提示": "next_hint", "提示": "next_hint"}
+
+ICS_DEFAULT_STATE = "上课"
+ICS_PRODID = "-//Time Management Guru//Schedule//ZH"
+# 导出时把"下阶段提示"写进私有属性；普通日历的 DESCRIPTION 多是备注，不拿来当提示
+ICS_HINT_PROPERTY = "X-TMG-NEXT-HINT"
+# 没有 COUNT 的规则会直接跳到窗口附近；这里只是防止异常规则空转
+MAX_RRULE_STEPS = 100000
+# 导出的 VTIMEZONE 列出起始日之后这么多年内的切换，再往后沿用最后一次的偏移
+ICS_VTIMEZONE_YEARS = 10
+
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_DURATION_RE = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?")
+
+Property = Tuple[Dict[str, str], str]
+
+
+def default_next_hint(state: str) -> str:
+    return "距离下课还有:" if state == ICS_DEFAULT_STATE else "距离上课还有:"
+
+
+# ---------------------------------------------------------------- ICS 读取
+
+def _unfold(lines: Iterable[str]) -> Iterator[str]:
+    """合并 RFC 5545 的折行（以空格或制表符开头的行接在上一行后面）。"""
+    pending = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield pending
+        pending = line
+    if pending:
+        yield pending
+
+
+def _parse_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    i = line.find(":")
+    if i < 0:
+        raise ValueError(f"missing ':' in {line[:40]!r}")
+    if '"' in line[:i]:
+        # 参数值可以带引号，引号里的冒号不算分隔符
+        quoted = False
+        for i, ch in enumerate(line):
+            if ch == '"':
+                quoted = not quoted
+            elif ch == ":" and not quoted:
+                break
+    if ";" not in line[:i]:
+        return line[:i].upper(), {}, line[i + 1:]
+    name, *params = line[:i].split(";")
+    parsed = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        parsed[key.upper()] = value.strip('"')
+    return name.upper(), parsed, line[i + 1:]
+
+
+def _unescape(text: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def iter_ics_events(lines: Iterable[str]) -> Iterator[Dict[str, List[Property]]]:
+    """逐个产出 VEVENT：{属性名: [(参数, 值), ...]}。嵌套的 VALARM 等组件里的属性会被忽略。"""
+    event = None
+    depth = 0
+    for number, line in enumerate(_unfold(lines), 1):
+        try:
+            name, params, value = _parse_property(line)
+        except ValueError as e:
+            print(f"ICS line {number} error: {e}")
+            continue
+        if name == "BEGIN":
+            if event is not None:
+                depth += 1
+            elif value.upper() == "VEVENT":
+                event, depth = {}, 0
+        elif name == "END":
+            if event is None:
+                continue
+            if depth:
+                depth -= 1
+            elif value.upper() == "VEVENT":
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.setdefault(name, []).append((params, value))
+
+
+def _zone_for(params: Dict[str, str], value: str):
+    """返回时间值所在的时区：UTC、pytz 时区，或 None 表示浮动时间（按目标时区的挂钟理解）。"""
+    if value.endswith("Z"):
+        return pytz.utc
+    tzid = params.get("TZID")
+    if tzid:
+        try:
+            return pytz.timezone(tzid.lstrip("/"))
+        except pytz.UnknownTimeZoneError:
+            print(f"Unknown TZID {tzid}, treated as local time")
+    return None
+
+
+def _parse_wall_time(value: str) -> Optional[datetime.datetime]:
+    """解析 YYYYMMDDTHHMMSS[Z] 为不带时区的挂钟时间；纯日期（全天事件）返回 None。"""
+    value = value.strip()
+    if len(value) < 15 or value[8:9] != "T":
+        return None
+    return datetime.datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+
+
+def _convert(wall: datetime.datetime, zone, target) -> datetime.datetime:
+    """把 zone 里的挂钟时间换成 target 时区的挂钟时间（都不带 tzinfo）。"""
+    if zone is None or target is None:
+        return wall
+    aware = zone.localize(wall) if zone is not pytz.utc else wall.replace(tzinfo=pytz.utc)
+    return aware.astimezone(target).replace(tzinfo=None)
+
+
+def parse_ics_duration(value: str) -> Optional[datetime.timedelta]:
+    match = _DURATION_RE.fullmatch(value.strip())
+    if match is None or not any(match.groups()[1:]):
+        return None
+    weeks, days, hours, minutes, seconds = (int(g or 0) for g in match.groups()[1:])
+    delta = datetime.timedelta(weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds)
+    return -delta if match.group(1) == "-" else delta
+
+
+def _parse_rrule(value: str) -> Dict[str, str]:
+    parts = {}
+    for part in value.split(";"):
+        key, _, val = part.partition("=")
+        if key:
+            parts[key.upper()] = val.upper()
+    return parts
+
+
+def _rrule_until(value: str, zone) -> Optional[datetime.datetime]:
+    if len(value) == 8:
+        # 只有日期时包含当天
+        return datetime.datetime.strptime(value, "%Y%m%d") + datetime.timedelta(days=1, microseconds=-1)
+    wall = _parse_wall_time(value)
+    if wall is not None and value.endswith("Z") and zone not in (None, pytz.utc):
+        wall = _convert(wall, pytz.utc, zone)
+    return wall
+
+
+def expand_rrule(start: datetime.datetime, rule: Dict[str, str], until_limit: datetime.datetime,
+                 zone=None, exdates: Set[datetime.datetime] = frozenset(),
+                 since: Optional[datetime.datetime] = None) -> Iterator[datetime.datetime]:
+    """按 rule 产出不晚于 until_limit 的发生时间（均为事件时区的挂钟时间），跳过 exdates。
+
+    给出 since 且规则没有 COUNT 时，直接从 since 所在的周期开始，早于 since 的发生可能不会产出。
+    """
+    freq = rule.get("FREQ")
+    interval = max(1, int(rule.get("INTERVAL", "1") or 1))
+    count = int(rule["COUNT"]) if rule.get("COUNT") else None
+    until = _rrule_until(rule["UNTIL"], zone) if rule.get("UNTIL") else None
+    if until is not None:
+        until_limit = min(until_limit, until)
+
+    if freq == "DAILY":
+        step = datetime.timedelta(days=interval)
+
+        def periods(first):
+            k = first
+            while True:
+                yield [start + k * step]
+                k += 1
+    elif freq == "WEEKLY":
+        days = sorted({_WEEKDAYS[d[-2:]] for d in rule.get("BYDAY", "").split(",") if d[-2:] in _WEEKDAYS})
+        days = days or [start.weekday()]
+        week0 = start - datetime.timedelta(days=start.weekday())
+        step = datetime.timedelta(weeks=interval)
+
+        def periods(first):
+            k = first
+            while True:
+                base = week0 + k * step
+                yield [t for t in (base + datetime.timedelta(days=d) for d in days) if t >= start]
+                k += 1
+    else:
+        if start <= until_limit and start not in exdates:
+            yield start
+        return
+
+    first = 0
+    if count is None and since is not None:
+        # 没有 COUNT 时不必从 DTSTART 数起，学期初开始的规则查期末也只展开几个周期
+        first = max(0, (since - start).days // step.days - 1)
+    emitted = 0
+    for steps, occurrences in enumerate(periods(first)):
+        if steps > MAX_RRULE_STEPS:
+            print(f"RRULE expansion stopped after {MAX_RRULE_STEPS} periods")
+            return
+        for t in occurrences:
+            if t > until_limit or (count is not None and emitted >= count):
+                return
+            emitted += 1
+            if t not in exdates:
+                yield t
+
+
+def iter_ics_segments(lines: Iterable[str], day: datetime.date, days: int = 1, tz_name: Optional[str] = None,
+                      default_state: str = ICS_DEFAULT_STATE) -> Iterator[Segment]:
+    """把日历中开始于 [day, day + days) 的事件发生转成 Segment，按挂钟时间去重。
+
+    tz_name 为课表所在时区；为 None 时忽略事件的时区，直接取挂钟时间。
+    状态取 CATEGORIES 的第一项（没有则为 default_state），课程取 SUMMARY，提示取 ICS_HINT_PROPERTY。
+    """
+    target = pytz.timezone(tz_name) if tz_name else None
+    window_start = datetime.datetime.combine(day, datetime.time())
+    window_end = window_start + datetime.timedelta(days=days)
+    # 不重复的事件先比较 DTSTART 的日期字符串，离窗口超过一天的直接跳过，不做时间解析和时区换算
+    date_range = (f"{day - datetime.timedelta(days=1):%Y%m%d}", f"{day + datetime.timedelta(days=days + 1):%Y%m%d}")
+    seen = set()
+    for event in iter_ics_events(lines):
+        try:
+            occurrences = list(_event_occurrences(event, window_start, window_end, target, date_range))
+            if not occurrences:
+                continue
+            segment_args = _event_segment_args(event, default_state)
+            if segment_args is None:
+                continue
+            for start, end in occurrences:
+                key = (start.time(), end.time()) + segment_args
+                if key not in seen:
+                    seen.add(key)
+                    yield Segment(*key)
+        except (ValueError, KeyError) as e:
+            uid = event.get("UID", [({}, "?")])[0][1]
+            print(f"ICS event {uid} error: {e}")
+
+
+def _first(event, name, default=""):
+    values = event.get(name)
+    return values[0][1] if values else default
+
+
+def _event_segment_args(event, default_state) -> Optional[Tuple[str, str, str]]:
+    if _first(event, "STATUS").upper() == "CANCELLED":
+        return None
+    categories = _unescape(_first(event, "CATEGORIES"))
+    state = categories.split(",")[0].strip() or default_state
+    course = _unescape(_first(event, "SUMMARY")).strip()
+    if course == state:
+        course = ""
+    hint = _unescape(_first(event, ICS_HINT_PROPERTY)).strip() or default_next_hint(state)
+    # 状态和提示在整个日历里反复出现
+    return sys.intern(state), course, sys.intern(hint)
+
+
+def _event_occurrences(event, window_start, window_end, target, date_range):
+    params, value = event["DTSTART"][0]
+    if "RRULE" not in event and not date_range[0] <= value[:8] <= date_range[1]:
+        return
+    start = _parse_wall_time(value)
+    if start is None:
+        return
+    zone = _zone_for(params, value)
+    if "DTEND" in event:
+        end_params, end_value = event["DTEND"][0]
+        end = _parse_wall_time(end_value)
+        if end is None:
+            return
+        duration = _convert(end, _zone_for(end_params, end_value), zone) - start
+    elif "DURATION" in event:
+        duration = parse_ics_duration(_first(event, "DURATION"))
+    else:
+        duration = datetime.timedelta(0)
+    if duration is None or not datetime.timedelta(0) <= duration < datetime.timedelta(days=1):
+        return
+
+    if "RRULE" in event:
+        exdates = set()
+        for ex_params, ex_value in event.get("EXDATE", ()):
+            ex_zone = _zone_for(ex_params, ex_value)
+            for item in ex_value.split(","):
+                wall = _parse_wall_time(item)
+                if wall is not None:
+                    exdates.add(_convert(wall, ex_zone, zone))
+        # 窗口边界按目标时区给出，事件时区最多差一天，两头各多展开一天再过滤
+        margin = datetime.timedelta(days=1)
+        occurrences = expand_rrule(start, _parse_rrule(_first(event, "RRULE")), window_end + margin, zone,
+                                   exdates, since=window_start - margin)
+    else:
+        occurrences = (start,)
+
+    for occurrence in occurrences:
+        local_start = _convert(occurrence, zone, target)
+        if window_start <= local_start < window_end:
+            yield local_start, _convert(occurrence + duration, zone, target)
+
+
+# ---------------------------------------------------------------- CSV 读取
+
+def iter_csv_segments(lines: Iterable[str]) -> Iterator[Segment]:
+    """读取 CSV 课表。有表头时按列名（英文键名或编辑器的中文列名）取值，没有表头时按 CSV_FIELDS 的顺序。"""
+    reader = csv.reader(lines)
+    fields = None
+    for number, row in enumerate(reader, 1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if fields is None:
+            if parse_day_time(row[0].strip()) < 0:
+                fields = [CSV_HEADER_ALIASES.get(cell.strip(), cell.strip().lower()) for cell in row]
+                continue
+            fields = list(CSV_FIELDS)
+        item = {field: cell.strip() for field, cell in zip(fields, row)}
+        start, end = parse_day_time(item.get("start", "")), parse_day_time(item.get("end", ""))
+        if start < 0 or end < 0:
+            print(f"CSV row {number} error: bad time {item.get('start')!r}-{item.get('end')!r}")
+            continue
+        state = item.get("state", "")
+        yield Segment(datetime.time(start // 3600, start // 60 % 60), datetime.time(end // 3600, end // 60 % 60),
+                      sys.intern(state), item.get("course_name", ""),
+                      sys.intern(item.get("next_hint", "") or default_next_hint(state)))
+
+
+def fill_gaps(segments: List[Segment], break_state: str = "下课", night_state: str = "放学") -> List[Segment]:
+    """按开始时间排序，并补上没有被任何段覆盖的空档（日历里通常只有上课的事件）。
+
+    白天的空档记为 break_state，最后一段结束到次日第一段开始之间记为 night_state。
+    """
+    ordered = sorted(segments, key=lambda seg: (time_to_seconds(seg.start), time_to_seconds(seg.end)))
+    if not ordered:
+        return []
+    filled = []
+    reach = None
+    for seg in ordered:
+        start, end = time_to_seconds(seg.start), time_to_seconds(seg.end)
+        if end < start:
+            end += SECONDS_PER_DAY
+        if reach is not None and start > reach:
+            filled.append(_gap_segment(reach, start, break_state))
+        filled.append(seg)
+        reach = end if reach is None else max(reach, end)
+    first = time_to_seconds(ordered[0].start) + SECONDS_PER_DAY
+    if reach < first:
+        filled.append(_gap_segment(reach, first, night_state))
+    return filled
+
+
+def _gap_segment(start: int, end: int, state: str) -> Segment:
+    start, end = start % SECONDS_PER_DAY, end % SECONDS_PER_DAY
+    return Segment(datetime.time(start // 3600, start // 60 % 60), datetime.time(end // 3600, end // 60 % 60),
+                   state, "", default_next_hint(state))
+
+
+# ---------------------------------------------------------------- 导出
+
+def segment_to_dict(seg: Segment) -> dict:
+    return {"start": format_day_seconds(time_to_seconds(seg.start)), "end": format_day_seconds(time_to_seconds(seg.end)),
+            "state": seg.state, "course_name": seg.course_name, "next_hint": seg.next_hint}
+
+
+def write_csv(segments: Iterable[Segment], out: TextIO):
+    writer = csv.writer(out, lineterminator="\r\n")
+    writer.writerow(CSV_FIELDS)
+    for seg in segments:
+        item = segment_to_dict(seg)
+        writer.writerow([item[field] for field in CSV_FIELDS])
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    # 每行不超过 75 个字节，且不能把一个 UTF-8 字符拆开
+    if len(line.encode("utf-8")) <= 75:
+        return line + "\r\n"
+    parts, current, size = [], "", 0
+    for ch in line:
+        width = len(ch.encode("utf-8"))
+        if size + width > (75 if not parts else 74):
+            parts.append(current)
+            current, size = "", 0
+        current += ch
+        size += width
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _format_utc_offset(offset: datetime.timedelta) -> str:
+    seconds = int(offset.total_seconds())
+    sign = "-" if seconds < 0 else "+"
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{sign}{hours:02d}{minutes:02d}" + (f"{seconds:02d}" if seconds else "")
+
+
+def _vtimezone_lines(tz_name: str, day: datetime.date, years: int = ICS_VTIMEZONE_YEARS) -> List[str]:
+    """按 pytz 的切换表生成 VTIMEZONE：day 当时生效的偏移，加上之后 years 年内的每次切换。"""
+    zone = pytz.timezone(tz_name)
+    start = datetime.datetime.combine(day, datetime.time())
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{tz_name}"]
+    times = getattr(zone, "_utc_transition_times", None)
+    if times:
+        infos = zone._transition_info
+        # 切换表是 UTC 时刻，day 是挂钟日期，往前多退一天保证取到当时生效的那一项
+        first = max(bisect_right(times, start - datetime.timedelta(days=1)) - 1, 0)
+        last = bisect_right(times, datetime.datetime(day.year + years, 1, 1))
+        observances = [(times[i], infos[i - 1][0] if i else infos[i][0], infos[i]) for i in range(first, last)]
+    else:
+        local = zone.localize(start)
+        observances = [(None, local.utcoffset(), (local.utcoffset(), local.dst(), local.tzname()))]
+    for utc_time, offset_from, (offset_to, dst, name) in observances:
+        kind = "DAYLIGHT" if dst else "STANDARD"
+        # DTSTART 是切换前偏移下的挂钟时间；表头那一项没有真正的切换时刻
+        onset = utc_time + offset_from if utc_time and utc_time.year > 1 else datetime.datetime(1970, 1, 1)
+        lines += [f"BEGIN:{kind}", f"DTSTART:{onset:%Y%m%dT%H%M%S}",
+                  f"TZOFFSETFROM:{_format_utc_offset(offset_from)}", f"TZOFFSETTO:{_format_utc_offset(offset_to)}",
+                  f"TZNAME:{name}", f"END:{kind}"]
+    lines.append("END:VTIMEZONE")
+    return lines
+
+
+def write_ics(segments: Iterable[Segment], out: TextIO, day: Optional[datetime.date] = None,
+              tz_name: Optional[str] = None):
+    """每段导出为一个从 day 开始每天重复的事件；tz_name 为 None 时写浮动时间。跨午夜的段结束于次日。
+
+    给了 tz_name 时按 RFC 5545 附上对应的 VTIMEZONE，事件用 TZID 引用它，夏令时前后仍按挂钟时间重复。
+    """
+    day = day or datetime.date.today()
+    tz_param = f";TZID={tz_name}" if tz_name else ""
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out.write(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{ICS_PRODID}\r\nCALSCALE:GREGORIAN\r\n")
+    if tz_name:
+        out.write(_fold(f"X-WR-TIMEZONE:{tz_name}"))
+        out.write("".join(_fold(line) for line in _vtimezone_lines(tz_name, day)))
+    for number, seg in enumerate(segments):
+        start = datetime.datetime.combine(day, seg.start)
+        end = datetime.datetime.combine(day, seg.end)
+        if end < start:
+            end += datetime.timedelta(days=1)
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{day:%Y%m%d}-{number}-{start:%H%M}@time-management-guru",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART{tz_param}:{start:%Y%m%dT%H%M%S}",
+            f"DTEND{tz_param}:{end:%Y%m%dT%H%M%S}",
+            "RRULE:FREQ=DAILY",
+            f"SUMMARY:{_escape(seg.course_name or seg.state)}",
+            f"CATEGORIES:{_escape(seg.state)}",
+        ]
+        if seg.next_hint:
+            lines.append(f"{ICS_HINT_PROPERTY}:{_escape(seg.next_hint)}")
+        lines.append("END:VEVENT")
+        out.write("".join(_fold(line) for line in lines))
+    out.write("END:VCALENDAR\r\n")
+
+
+# ---------------------------------------------------------------- 按扩展名读写文件
+
+def import_schedule(path: str, day: Optional[datetime.date] = None, tz_name: Optional[str] = None) -> List[Segment]:
+    """按扩展名导入 .ics 或 .csv，出错时返回空列表。ICS 取 day（默认今天）这一天，并补上课间空档。"""
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            if path.lower().endswith((".ics", ".ical", ".ifb")):
+                return fill_gaps(list(iter_ics_segments(f, day or datetime.date.today(), tz_name=tz_name)))
+            return list(iter_csv_segments(f))
+    except Exception as e:
+        print(f"Import schedule error: {e}")
+        return []
+
+
+def export_schedule(segments: Iterable[Segment], path: str, day: Optional[datetime.date] = None,
+                    tz_name: Optional[str] = None) -> bool:
+    try:
+        if path.lower().endswith(".ics"):
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                write_ics(segments, f, day, tz_name)
+        else:
+            # 带 BOM，Excel 打开中文不乱码
+            with open(path, "w", encoding="utf-8-sig", newline="") as f:
+                write_csv(segments, f)
+        return True
+    except Exception as e:
+        print(f"Export schedule error: {e}")
+        return False
@@ -0,0 +1,194 @@
+import json
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, List, Tuple
+
+
+class PhaseTimer:
+    """记录启动各阶段的耗时，用于 --startup-report。"""
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases.append((name, (now - self.last) * 1000.0, (now - self.start) * 1000.0))
+        self.last = now
+
+    def report(self) -> str:
+        lines = [f"{'phase':<16}{'delta':>10}{'total':>12}"]
+        for name, delta, total in self.phases:
+            lines.append(f"{name:<16}{delta:>8.1f}ms{total:>10.1f}ms")
+        return "\n".join(lines)
+
+
+def parse_importtime(text: str, top: int = 15, depth: int = 1) -> List[Tuple[str, int, int]]:
+    """解析 python -X importtime 的输出，返回前 depth 层里累计耗时最高的模块 (名称, 自身us, 累计us)。"""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            level = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), level))
+        except ValueError:
+            continue
+    picked = [(name, self_us, cum) for name, self_us, cum, level in rows if level <= depth]
+    return sorted(picked, key=lambda row: row[2], reverse=True)[:top]
+
+
+def summarize_samples(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(q):
+        return ordered[min(n - 1, int(q * n))]
+
+    return {
+        "count": n,
+        "min": ordered[0],
+        "p50": pct(0.50),
+        "p90": pct(0.90),
+        "p99": pct(0.99),
+        "max": ordered[-1],
+        "mean": sum(ordered) / n,
+    }
+
+
+# 毫秒直方图的默认桶上界，最后一个桶收纳所有更大的值
+DEFAULT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        self.value += n
+
+
+class Histogram:
+    """固定桶的直方图：observe 只做一次二分和几次整数加法，不保存样本，可以常开。"""
+    __slots__ = ("bounds", "buckets", "count", "total", "max")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.clear()
+
+    def clear(self):
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """按桶估计分位数，返回所在桶的上界（最后一个桶返回观测到的最大值）。"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class MetricsRegistry:
+    """按名字登记的计数器和直方图。热路径上应先取到对象再调用 inc/observe，避免每次查字典。
+
+    gauge 登记一个取值函数，只在 snapshot 时调用，用于暴露已有的统计（如设置存储的读写次数）。
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: Dict[str, Counter] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def counter(self, name: str) -> Counter:
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = Counter()
+        return counter
+
+    def histogram(self, name: str, bounds=DEFAULT_BUCKETS_MS) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(bounds)
+        return histogram
+
+    def gauge(self, name: str, func: Callable[[], float]):
+        self.gauges[name] = func
+
+    def snapshot(self) -> dict:
+        gauges = {}
+        for name, func in sorted(self.gauges.items()):
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                print(f"Gauge {name} error: {e}")
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "counters": {name: c.value for name, c in sorted(self.counters.items())},
+            "histograms": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+            "gauges": gauges,
+        }
+
+    def dump_json(self, path: str) -> bool:
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            return True
+        except OSError as e:
+            print(f"Dump metrics error: {e}")
+            return False
+
+    def report(self) -> str:
+        """给性能浮窗用的纯文本摘要。"""
+        snap = self.snapshot()
+        lines = [f"运行 {snap['uptime_s']:.0f}s"]
+        lines.append(f"{'':<24}{'count':>7}{'p50':>8}{'p99':>8}{'max':>9}")
+        for name, h in snap["histograms"].items():
+            lines.append(f"{name:<24}{h['count']:>7}{h['p50']:>8.2f}{h['p99']:>8.2f}{h['max']:>9.2f}")
+        for name, value in list(snap["counters"].items()) + list(snap["gauges"].items()):
+            lines.append(f"{name:<24}{value:>7}")
+        return "\n".join(lines)
+
+    def reset(self):
+        # 就地清零：热路径上持有的对象引用仍然有效
+        self.started = time.time()
+        for counter in self.counters.values():
+            counter.value = 0
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+
+# 进程内共享的默认注册表
+METRICS = MetricsRegistry()
@@ -0,0 +1,22 @@
+"""QSettings 适配器：只有图形界面会导入这个模块，核心包本身不依赖 Qt。"""
+
+from PySide6.QtCore import QSettings
+
+from .settings import SettingsBackend
+
+
+class QtSettingsBackend(SettingsBackend):
+    def __init__(self, organization: str = "MyCompany", application: str = "TimeManagementGuru"):
+        self.settings = QSettings(organization, application)
+
+    def contains(self, key: str) -> bool:
+        return self.settings.contains(key)
+
+    def value(self, key: str, default):
+        return self.settings.value(key, default, type=type(default))
+
+    def set_value(self, key: str, value):
+        self.settings.setValue(key, value)
+
+    def sync(self):
+        self.settings.sync()
@@ -0,0 +1,117 @@
+"""上下课提醒：预先算出接下来的切换时刻，按到期时间放进小顶堆。
+
+调用方只需为堆顶（最早到期的提醒）设一个定时器，到点后 pop_due 取出所有到期提醒，
+再用 next_due 重新设定时器，不需要在每秒的 tick 里轮询。
+"""
+
+import heapq
+import datetime
+import itertools
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .schedule import ScheduleManager, Segment, format_day_seconds
+from .timezones import TimezoneService
+
+
+@dataclass(frozen=True)
+class ReminderRule:
+    """在进入 state、离开 leaving 的切换之前 lead 秒提醒（None 表示不限）；
+    message 可用 {state} {course_name} {minutes} {time}，指进入的那一段。"""
+    lead: int
+    state: Optional[str]
+    message: str
+    leaving: Optional[str] = None
+
+
+def default_reminder_rules(lead_minutes: int = 5) -> List[ReminderRule]:
+    rules = [ReminderRule(0, "上课", "上课了 {course_name}")]
+    if lead_minutes > 0:
+        # 按离开“上课”判断，最后一节课直接切到“放学”时也要提醒
+        rules.append(ReminderRule(lead_minutes * 60, None, "还有 {minutes} 分钟下课（{time}）", leaving="上课"))
+    return rules
+
+
+@dataclass(order=True, frozen=True)
+class Reminder:
+    due: datetime.datetime
+    seq: int
+    change_at: datetime.datetime = field(compare=False)
+    segment: Segment = field(compare=False)
+    rule: ReminderRule = field(compare=False)
+
+    def text(self, tz_service: TimezoneService) -> str:
+        local = tz_service.to_local(self.change_at)
+        return self.rule.message.format(state=self.segment.state, course_name=self.segment.course_name,
+                                        minutes=max(1, round(self.rule.lead / 60)),
+                                        time=format_day_seconds(local.hour * 3600 + local.minute * 60))
+
+
+class ReminderQueue:
+    """提醒的小顶堆。只展开 now 之后 horizon 内的切换，取出提醒时再向后补齐。
+
+    课表、时区或规则变化时调用 reset：丢掉未到期的旧提醒，从 now 重新展开。
+    """
+
+    def __init__(self, rules: List[ReminderRule], horizon: datetime.timedelta = datetime.timedelta(hours=12)):
+        self.rules = list(rules)
+        self.horizon = horizon
+        self.heap: List[Reminder] = []
+        self._seq = itertools.count()
+        self._cursor = None
+        self.manager = None
+        self.tz_service = None
+
+    @property
+    def max_lead(self) -> datetime.timedelta:
+        return datetime.timedelta(seconds=max((rule.lead for rule in self.rules), default=0))
+
+    def reset(self, manager: ScheduleManager, tz_service: TimezoneService, now_utc: datetime.datetime,
+              rules: Optional[List[ReminderRule]] = None):
+        """rules 不为 None 时同时换成新规则。"""
+        if rules is not None:
+            self.rules = list(rules)
+        self.manager, self.tz_service = manager, tz_service
+        self.heap = []
+        self._cursor = now_utc
+        self.top_up(now_utc)
+
+    def top_up(self, now_utc: datetime.datetime):
+        """把切换时刻展开到 now + horizon + 最大提前量为止，只处理上次展开之后的部分。"""
+        if self.manager is None or not self.rules or not self.manager.index.change_points:
+            return
+        limit = now_utc + self.horizon + self.max_lead
+        cursor = self._cursor
+        check_leaving = any(rule.leaving is not None for rule in self.rules)
+        while cursor < limit:
+            change_at = self.manager.next_change_instant(self.tz_service.to_local(cursor), self.tz_service)
+            if change_at <= cursor:
+                break
+            cursor = change_at
+            entering = self.manager.current_segment(self.tz_service.to_local(change_at).time())
+            leaving = None
+            if check_leaving:
+                before = self.tz_service.to_local(change_at - datetime.timedelta(seconds=1))
+                leaving = self.manager.current_segment(before.time())
+            for rule in self.rules:
+                if rule.state is not None and rule.state != entering.state:
+                    continue
+                if rule.leaving is not None and rule.leaving != leaving.state:
+                    continue
+                due = change_at - datetime.timedelta(seconds=rule.lead)
+                if due > now_utc:
+                    heapq.heappush(self.heap, Reminder(due, next(self._seq), change_at, entering, rule))
+        self._cursor = cursor
+
+    def next_due(self) -> Optional[datetime.datetime]:
+        return self.heap[0].due if self.heap else None
+
+    def pop_due(self, now_utc: datetime.datetime, grace: datetime.timedelta = datetime.timedelta(minutes=2)) -> List[Reminder]:
+        """取出所有已到期的提醒；过期超过 grace 的（例如电脑休眠过）直接丢弃。"""
+        due = []
+        while self.heap and self.heap[0].due <= now_utc:
+            reminder = heapq.heappop(self.heap)
+            if now_utc - reminder.due <= grace:
+                due.append(reminder)
+        self.top_up(now_utc)
+        return due
@@ -0,0 +1,407 @@
+import os
+import re
+import sys
+import datetime
+import json
+import mmap
+import hashlib
+import heapq
+import struct
+import tempfile
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional, List, Tuple, TYPE_CHECKING
+
+from .constants import SCHEDULE_FILE
+
+if TYPE_CHECKING:
+    from .timezones import TimezoneService
+
+DEFAULT_SCHEDULE = [
+    {"start": "08:00", "end": "08:45", "state": "上课", "course_name": "第一节课", "next_hint": "距离下课还有:"},
+    {"start": "08:45", "end": "08:55", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "08:55", "end": "09:40", "state": "上课", "course_name": "第二节课", "next_hint": "距离下课还有:"},
+    {"start": "09:40", "end": "09:50", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "09:50", "end": "10:35", "state": "上课", "course_name": "第三节课", "next_hint": "距离下课还有:"},
+    {"start": "10:35", "end": "10:45", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "10:45", "end": "11:30", "state": "上课", "course_name": "第四节课", "next_hint": "距离下课还有:"},
+    {"start": "11:30", "end": "13:00", "state": "放学", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "13:00", "end": "13:45", "state": "上课", "course_name": "第五节课", "next_hint": "距离下课还有:"},
+    {"start": "13:45", "end": "13:55", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "13:55", "end": "14:40", "state": "上课", "course_name": "第六节课", "next_hint": "距离下课还有:"},
+    {"start": "14:40", "end": "14:50", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "14:50", "end": "15:35", "state": "上课", "course_name": "第七节课", "next_hint": "距离下课还有:"},
+    {"start": "15:35", "end": "15:45", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "15:45", "end": "16:30", "state": "上课", "course_name": "第八节课", "next_hint": "距离下课还有:"},
+    {"start": "16:30", "end": "18:00", "state": "放学", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "18:00", "end": "18:45", "state": "上课", "course_name": "第九节课", "next_hint": "距离下课还有:"},
+    {"start": "18:45", "end": "18:55", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "18:55", "end": "19:40", "state": "上课", "course_name": "第十节课", "next_hint": "距离下课还有:"},
+    {"start": "19:40", "end": "19:50", "state": "下课", "course_name": "", "next_hint": "距离上课还有:"},
+    {"start": "19:50", "end": "20:30", "state": "上课", "course_name": "第十一节课", "next_hint": "距离下课还有:"},
+    {"start": "20:30", "end": "08:00", "state": "放学", "course_name": "", "next_hint": "距离上课还有:"},
+]
+
+@dataclass(frozen=True)
+class Segment:
+    start: datetime.time
+    end: datetime.time
+    state: str
+    course_name: str = ""
+    next_hint: str = ""
+
+def parse_schedule(data: List[dict]) -> List[Segment]:
+    segments = []
+    for item in data:
+        h1, m1 = map(int, item['start'].split(':'))
+        h2, m2 = map(int, item['end'].split(':'))
+        segments.append(Segment(
+            start=datetime.time(hour=h1, minute=m1),
+            end=datetime.time(hour=h2, minute=m2),
+            state=item['state'],
+            course_name=item.get('course_name', ''),
+            next_hint=item.get('next_hint', '')
+        ))
+    return segments
+
+def load_schedule() -> List[Segment]:
+    try:
+        if not os.path.exists(SCHEDULE_FILE):
+            save_schedule(DEFAULT_SCHEDULE)
+        return read_schedule_file(SCHEDULE_FILE)[1]
+    except Exception as e:
+        print(f"Load schedule error: {e}")
+        return []
+
+def read_schedule_file(path: str = SCHEDULE_FILE, use_cache: bool = True) -> Tuple[str, List[Segment]]:
+    """读取并解析课表文件，返回 (内容的 sha1, 时间段列表)；出错时抛异常，由调用方处理。
+
+    内容没变时直接读旁边的编译缓存，省掉 JSON 解析。
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw)
+    if use_cache:
+        segments = load_schedule_cache(schedule_cache_path(path), digest.digest())
+        if segments is not None:
+            return digest.hexdigest(), segments
+    segments = parse_schedule(json.loads(raw.decode('utf-8')))
+    if use_cache:
+        try:
+            _atomic_write(schedule_cache_path(path), compile_schedule(segments, digest.digest()))
+        except OSError as e:
+            print(f"Write schedule cache error: {e}")
+    return digest.hexdigest(), segments
+
+def schedule_file_digest(path: str = SCHEDULE_FILE) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def _atomic_write(path: str, data: bytes):
+    # 先写同目录下的临时文件再 os.replace，其他进程要么读到旧文件，要么读到完整的新文件；
+    # 临时文件名由 mkstemp 生成，同一进程里 GUI 线程和线程池同时写同一个目标也不会撞名
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 建的文件只有属主可读写，沿用原文件的权限（没有原文件时用常见的 0644）
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def save_schedule(data: List[dict]):
+    try:
+        _atomic_write(SCHEDULE_FILE, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+    except Exception as e:
+        print(f"Save schedule error: {e}")
+
+# 编译缓存格式：头部 + 5 个定长 int32 数组（起点秒、终点秒、状态/课程/提示的字符串编号）
+# + 字符串表（n+1 个 int32 偏移 + UTF-8 数据）。数组按本机字节序存放，字节序不符时视为失效。
+SCHEDULE_CACHE_MAGIC = b"TMGS"
+SCHEDULE_CACHE_VERSION = 1
+_CACHE_HEADER = struct.Struct("<4sHBxII20s")
+_CACHE_BYTEORDER = 1 if sys.byteorder == "little" else 2
+
+def schedule_cache_path(path: str = SCHEDULE_FILE) -> str:
+    return path + ".cache"
+
+def compile_schedule(segments: List[Segment], digest: bytes) -> bytes:
+    strings, ids = [], {}
+
+    def intern(text):
+        if text not in ids:
+            ids[text] = len(strings)
+            strings.append(text)
+        return ids[text]
+
+    starts, ends = array('i'), array('i')
+    states, courses, hints = array('i'), array('i'), array('i')
+    for seg in segments:
+        starts.append(time_to_seconds(seg.start))
+        ends.append(time_to_seconds(seg.end))
+        states.append(intern(seg.state))
+        courses.append(intern(seg.course_name))
+        hints.append(intern(seg.next_hint))
+
+    blobs = [text.encode('utf-8') for text in strings]
+    offsets = array('i', [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    header = _CACHE_HEADER.pack(SCHEDULE_CACHE_MAGIC, SCHEDULE_CACHE_VERSION, _CACHE_BYTEORDER,
+                                len(segments), len(strings), digest)
+    parts = [header] + [a.tobytes() for a in (starts, ends, states, courses, hints, offsets)] + blobs
+    return b"".join(parts)
+
+def load_schedule_cache(path: str, digest: bytes) -> Optional[List[Segment]]:
+    """缓存存在且摘要与 JSON 内容一致时返回时间段列表，否则返回 None。"""
+    try:
+        with open(path, 'rb') as f:
+            # 读完立即解除映射，Windows 上映射中的文件无法被 os.replace 覆盖
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _decode_schedule_cache(memoryview(mm), digest)
+    except Exception:
+        # 截断、损坏或半写的缓存一律按未命中处理，调用方会回退到 JSON 并重写缓存
+        return None
+
+def _decode_schedule_cache(buf: memoryview, digest: bytes) -> Optional[List[Segment]]:
+    try:
+        if len(buf) < _CACHE_HEADER.size:
+            return None
+        magic, version, byteorder, count, nstrings, cached = _CACHE_HEADER.unpack_from(buf)
+        if (magic, version, byteorder, cached) != (SCHEDULE_CACHE_MAGIC, SCHEDULE_CACHE_VERSION,
+                                                   _CACHE_BYTEORDER, digest):
+            return None
+        pos = _CACHE_HEADER.size
+        columns = []
+        for length in (count, count, count, count, count, nstrings + 1):
+            if len(buf) < pos + length * 4:
+                return None
+            columns.append(buf[pos:pos + length * 4].cast('i').tolist())
+            pos += length * 4
+        starts, ends, states, courses, hints, offsets = columns
+        if offsets[0] != 0 or len(buf) != pos + offsets[-1]:
+            return None
+        if any(offsets[i] > offsets[i + 1] for i in range(nstrings)):
+            return None
+        blob = bytes(buf[pos:pos + offsets[-1]])
+        strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(nstrings)]
+    finally:
+        buf.release()
+
+    times = {sec: datetime.time(sec // 3600, sec // 60 % 60, sec % 60) for sec in {*starts, *ends}}
+    return list(map(Segment, map(times.__getitem__, starts), map(times.__getitem__, ends),
+                    map(strings.__getitem__, states), map(strings.__getitem__, courses),
+                    map(strings.__getitem__, hints)))
+
+SECONDS_PER_DAY = 24 * 3600
+
+UNKNOWN_SEGMENT = Segment(start=datetime.time(0, 0), end=datetime.time(23, 59, 59), state="未知", next_hint="")
+
+
+def time_to_seconds(t: datetime.time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+_DAY_TIME_RE = re.compile(r"([0-9]{1,2}):([0-9]{1,2})")
+
+
+def parse_day_time(text: str) -> int:
+    """把 "HH:MM" 解析为日内秒数，格式不对时返回 -1（规则与 strptime("%H:%M") 相同）。"""
+    match = _DAY_TIME_RE.fullmatch(text)
+    if match is None:
+        return -1
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return -1
+    return hour * 3600 + minute * 60
+
+
+def format_day_seconds(sec: int) -> str:
+    sec %= SECONDS_PER_DAY
+    return f"{sec // 3600:02d}:{sec // 60 % 60:02d}"
+
+
+DIAG_OVERLAP = "overlap"
+DIAG_GAP = "gap"
+DIAG_EMPTY = "empty"
+
+
+@dataclass(frozen=True)
+class ScheduleDiagnostic:
+    """课表检查结果。rows 是 segments 中的下标；start/end 为日内秒，start > end 表示跨午夜。"""
+    kind: str
+    rows: Tuple[int, ...]
+    start: int
+    end: int
+
+
+class ScheduleIndex:
+    """把课表编译成按日内秒排序的边界数组，查询只需一次二分。
+
+    bounds[i] 开始到 bounds[i + 1]（或午夜）结束的区间属于 segments[slots[i]]，
+    slots 为 -1 表示该区间没有任何区段覆盖。重叠时与原先的线性扫描一致，
+    取列表中靠前的区段。编译的同一趟扫描顺带给出重叠、空档和零长度行的诊断（diagnostics）。
+    """
+
+    def __init__(self, segments: List[Segment], dense: bool = False):
+        self.segments = segments
+        self.bounds, self.slots, self.diagnostics = self._build_slots(segments)
+        self.change_points = sorted({time_to_seconds(seg.end) for seg in segments})
+        self.table = self._build_table() if dense else None
+
+    @staticmethod
+    def _build_slots(segments: List[Segment]):
+        pieces = []
+        diagnostics = []
+        for idx, seg in enumerate(segments):
+            start, end = time_to_seconds(seg.start), time_to_seconds(seg.end)
+            if start == end:
+                diagnostics.append(ScheduleDiagnostic(DIAG_EMPTY, (idx,), start, end))
+                continue
+            if start < end:
+                spans = ((start, end),)
+            else:
+                # 跨午夜的区段（如 20:30 → 08:00）拆成两段
+                spans = ((start, SECONDS_PER_DAY), (0, end))
+            for s, e in spans:
+                if s < e:
+                    pieces.append((s, e, idx))
+        pieces.sort()
+        by_end = sorted(pieces, key=lambda piece: piece[1])
+
+        points = {0}
+        for s, e, _ in pieces:
+            points.add(s)
+            points.add(e)
+        points.discard(SECONDS_PER_DAY)
+        points = sorted(points)
+
+        bounds, slots = [], []
+        active = []
+        covering = {}
+        sweep = []
+        i = j = 0
+        for k, p in enumerate(points):
+            while i < len(by_end) and by_end[i][1] <= p:
+                idx = by_end[i][2]
+                covering[idx] -= 1
+                if not covering[idx]:
+                    del covering[idx]
+                i += 1
+            while j < len(pieces) and pieces[j][0] == p:
+                _, e, idx = pieces[j]
+                heapq.heappush(active, (idx, e))
+                covering[idx] = covering.get(idx, 0) + 1
+                j += 1
+            while active and active[0][1] <= p:
+                heapq.heappop(active)
+
+            # [p, 下一个边界) 内被几个区段覆盖：0 个是空档，2 个以上是重叠
+            if len(covering) != 1:
+                end = points[k + 1] if k + 1 < len(points) else SECONDS_PER_DAY
+                kind = DIAG_GAP if not covering else DIAG_OVERLAP
+                rows = tuple(sorted(covering))
+                if sweep and sweep[-1][0] == kind and sweep[-1][1] == rows and sweep[-1][3] == p:
+                    sweep[-1][3] = end
+                else:
+                    sweep.append([kind, rows, p, end])
+
+            winner = active[0][0] if active else -1
+            if slots and slots[-1] == winner:
+                continue
+            bounds.append(p)
+            slots.append(winner)
+
+        if len(sweep) > 1 and sweep[0][2] == 0 and sweep[-1][3] == SECONDS_PER_DAY \
+                and sweep[0][:2] == sweep[-1][:2]:
+            # 午夜两侧的同一处问题合并成一条跨午夜诊断
+            sweep[-1][3] = sweep.pop(0)[3]
+        ends_at, starts_at = {}, {}
+        for s, e, idx in pieces:
+            starts_at.setdefault(s, set()).add(idx)
+            ends_at.setdefault(e % SECONDS_PER_DAY, set()).add(idx)
+        for kind, rows, start, end in sweep:
+            if kind == DIAG_GAP:
+                # 空档两侧的行：在空档处结束的和在空档处开始的
+                rows = tuple(sorted(ends_at.get(start, set()) | starts_at.get(end % SECONDS_PER_DAY, set())))
+            diagnostics.append(ScheduleDiagnostic(kind, rows, start, end % SECONDS_PER_DAY))
+        return array('i', bounds), array('i', slots), diagnostics
+
+    def _build_table(self):
+        table = array('i')
+        ends = list(self.bounds[1:]) + [SECONDS_PER_DAY]
+        for start, end, slot in zip(self.bounds, ends, self.slots):
+            table.extend(array('i', [slot]) * (end - start))
+        return table
+
+    def slot_at(self, sec: int) -> int:
+        if self.table is not None:
+            return self.table[sec]
+        return self.slots[bisect_right(self.bounds, sec) - 1]
+
+    def segment_at(self, sec: int) -> Segment:
+        slot = self.slot_at(sec)
+        return self.segments[slot] if slot >= 0 else UNKNOWN_SEGMENT
+
+    def next_change_seconds(self, sec: int) -> Optional[int]:
+        """返回 sec 之后第一个变化点的日内秒，跨到次日时会大于 SECONDS_PER_DAY。"""
+        cps = self.change_points
+        if not cps:
+            return None
+        i = bisect_right(cps, sec)
+        if i < len(cps):
+            return cps[i]
+        return cps[0] + SECONDS_PER_DAY
+
+
+class ScheduleManager:
+    def __init__(self, segments: List[Segment], dense_table: bool = False):
+        self.dense_table = dense_table
+        self.reload(segments)
+
+    def reload(self, segments: List[Segment], index: Optional[ScheduleIndex] = None):
+        # 索引可以在后台线程提前建好，这里只做一次引用替换
+        if index is None:
+            index = ScheduleIndex(segments, dense=self.dense_table)
+        self.segments, self.index = segments, index
+        self._batch = None
+
+    def batch(self):
+        """返回当前课表的 NumPy 批量查询视图（core.analytics.BatchSchedule，需要安装 numpy）。"""
+        if self._batch is None:
+            from .analytics import BatchSchedule
+            self._batch = BatchSchedule(self.index)
+        return self._batch
+
+    def current_segment(self, now: datetime.time) -> Segment:
+        return self.index.segment_at(time_to_seconds(now))
+
+    def next_change_datetime(self, now_dt: datetime.datetime) -> datetime.datetime:
+        cp = self.index.next_change_seconds(time_to_seconds(now_dt))
+        if cp is None:
+            return now_dt + datetime.timedelta(days=1)
+        midnight = now_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight + datetime.timedelta(seconds=cp)
+
+    def remaining_to_next_change(self, now_dt: datetime.datetime) -> datetime.timedelta:
+        return self.next_change_datetime(now_dt) - now_dt
+
+    def next_change_instant(self, now_local: datetime.datetime, tz_service: "TimezoneService") -> datetime.datetime:
+        naive = self.next_change_datetime(now_local.replace(tzinfo=None))
+        return tz_service.to_utc(naive, after=now_local)
@@ -0,0 +1,220 @@
+import json
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import List
+
+from .constants import CONFIG_FILE, TIME_SOURCE_HTTP, DEFAULT_SNTP_SERVERS
+
+
+class Notifier:
+    """不依赖 Qt 的简易信号：connect 回调，emit 时在当前线程依次同步调用。"""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def disconnect(self, slot):
+        self._slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class SettingsBackend(ABC):
+    """设置存储后端的接口。value 按 default 的类型返回；缺少任一抽象方法的子类无法实例化。"""
+
+    @abstractmethod
+    def contains(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def value(self, key: str, default):
+        ...
+
+    @abstractmethod
+    def set_value(self, key: str, value):
+        ...
+
+    def sync(self):
+        pass
+
+
+class MemorySettingsBackend(SettingsBackend):
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    def contains(self, key: str) -> bool:
+        return key in self.values
+
+    def value(self, key: str, default):
+        return self.values.get(key, default)
+
+    def set_value(self, key: str, value):
+        self.values[key] = value
+
+
+class JsonSettingsBackend(MemorySettingsBackend):
+    """把设置存成一个 JSON 文件，适合无界面/服务器环境。sync() 时原子写回。"""
+
+    def __init__(self, path: str = CONFIG_FILE):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                values = json.load(f)
+        except FileNotFoundError:
+            values = {}
+        except Exception as e:
+            print(f"Load settings error: {e}")
+            values = {}
+        super().__init__(values if isinstance(values, dict) else {})
+        self._dirty = False
+
+    def value(self, key: str, default):
+        value = self.values.get(key, default)
+        return value if isinstance(value, type(default)) else default
+
+    def set_value(self, key: str, value):
+        super().set_value(key, value)
+        self._dirty = True
+
+    def sync(self):
+        if not self._dirty:
+            return
+        from .schedule import _atomic_write
+        try:
+            _atomic_write(self.path, json.dumps(self.values, ensure_ascii=False, indent=2).encode('utf-8'))
+            self._dirty = False
+        except OSError as e:
+            print(f"Save settings error: {e}")
+
+
+class AppSettings:
+    """设置的内存快照：启动时从存储后端读一次，之后读取不再访问存储。
+
+    写入先进入 _pending，由 save() 统一落盘并发出 changed(被修改的键集合)；
+    在 batch() 中的多次写入合并为一次保存。后端默认是 CONFIG_FILE 里的 JSON，
+    图形界面传入 core.qt_settings.QtSettingsBackend 以沿用 QSettings。
+    """
+
+    DEFAULTS = {
+        "time_format_24h": True,
+        "timezone": "Asia/Shanghai",
+        "sync_world_time": False,
+        "time_source": TIME_SOURCE_HTTP,
+        "sntp_servers": ",".join(DEFAULT_SNTP_SERVERS),
+        # 新功能默认关闭，升级后不会突然开始弹提醒，用户在设置里自行开启
+        "reminders_enabled": False,
+        "reminder_lead_minutes": 5,
+    }
+
+    def __init__(self, backend: SettingsBackend = None):
+        self.backend = backend if backend is not None else JsonSettingsBackend()
+        self.changed = Notifier()
+        self.store_reads = 0
+        self.store_writes = 0
+        self._values = {}
+        self._pending = {}
+        self._batch_depth = 0
+        self._load_defaults()
+        
+    def _load_defaults(self):
+        wrote = False
+        for key, default in self.DEFAULTS.items():
+            self.store_reads += 1
+            if self.backend.contains(key):
+                self.store_reads += 1
+                self._values[key] = self.backend.value(key, default)
+            else:
+                self.backend.set_value(key, default)
+                self.store_writes += 1
+                self._values[key] = default
+                wrote = True
+        if wrote:
+            self.backend.sync()
+
+    def _set(self, key, value):
+        if self._values.get(key) == value:
+            return
+        self._values[key] = value
+        self._pending[key] = value
+        if not self._batch_depth:
+            self.save()
+
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.save()
+
+    def save(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        for key, value in pending.items():
+            self.backend.set_value(key, value)
+            self.store_writes += 1
+        self.backend.sync()
+        self.changed.emit(set(pending))
+            
+    @property
+    def time_format_24h(self) -> bool:
+        return self._values["time_format_24h"]
+        
+    @time_format_24h.setter
+    def time_format_24h(self, value: bool):
+        self._set("time_format_24h", bool(value))
+        
+    @property
+    def timezone(self) -> str:
+        return self._values["timezone"]
+        
+    @timezone.setter
+    def timezone(self, tz: str):
+        self._set("timezone", tz)
+        
+    @property
+    def sync_world_time(self) -> bool:
+        return self._values["sync_world_time"]
+        
+    @sync_world_time.setter
+    def sync_world_time(self, val: bool):
+        self._set("sync_world_time", bool(val))
+
+    @property
+    def time_source(self) -> str:
+        return self._values["time_source"]
+
+    @time_source.setter
+    def time_source(self, source: str):
+        self._set("time_source", source)
+
+    @property
+    def sntp_servers(self) -> List[str]:
+        return [item.strip() for item in self._values["sntp_servers"].split(",") if item.strip()]
+
+    @sntp_servers.setter
+    def sntp_servers(self, servers: List[str]):
+        self._set("sntp_servers", ",".join(servers))
+
+    @property
+    def reminders_enabled(self) -> bool:
+        return self._values["reminders_enabled"]
+
+    @reminders_enabled.setter
+    def reminders_enabled(self, val: bool):
+        self._set("reminders_enabled", bool(val))
+
+    @property
+    def reminder_lead_minutes(self) -> int:
+        return self._values["reminder_lead_minutes"]
+
+    @reminder_lead_minutes.setter
+    def reminder_lead_minutes(self, minutes: int):
+        self._set("reminder_lead_minutes", int(minutes))
@@ -0,0 +1,135 @@
+import datetime
+import socket
+import struct
+import time
+from typing import Optional, List, Tuple
+
+from . import constants
+from .constants import TIME_SOURCE_HTTP, TIME_SOURCE_SNTP, DEFAULT_SNTP_SERVERS, SNTP_PORT
+
+_http_session = None
+
+
+def _get_http_session():
+    # 复用同一个 Session，重复同步时可以走连接池而不是每次重新握手
+    # requests 导入较慢（约 100ms+），推迟到第一次同步时再加载
+    global _http_session
+    if _http_session is None:
+        import requests
+        _http_session = requests.Session()
+    return _http_session
+
+
+def get_network_time(url: Optional[str] = None, session=None) -> Optional[datetime.datetime]:
+    try:
+        resp = (session or _get_http_session()).head(url or constants.TIME_SYNC_URL, timeout=3.0, allow_redirects=True)
+        date_hdr = resp.headers.get("Date") or resp.headers.get("date")
+        if not date_hdr:
+            return None
+        # Format example: 'Tue, 28 Feb 2026 12:00:00 GMT'
+        # date_hdr[5:25] gives '28 Feb 2026 12:00:00'
+        dt = datetime.datetime.strptime(date_hdr[5:25], "%d %b %Y %H:%M:%S")
+        return dt.replace(tzinfo=datetime.timezone.utc)
+    except Exception as e:
+        print(f"Network time error: {e}")
+        return None
+
+
+def _measure_http_offset(url: Optional[str] = None, session=None) -> Optional[datetime.timedelta]:
+    sent = datetime.datetime.now(datetime.timezone.utc)
+    net_time = get_network_time(url, session)
+    if net_time is None:
+        return None
+    received = datetime.datetime.now(datetime.timezone.utc)
+    return net_time - (sent + (received - sent) / 2)
+
+
+# NTP 时间戳从 1900-01-01 起算
+NTP_EPOCH_DELTA = 2208988800
+
+
+def _to_ntp_timestamp(ts: float) -> bytes:
+    sec = int(ts)
+    frac = int((ts - sec) * (1 << 32)) & 0xFFFFFFFF
+    return struct.pack("!II", (sec + NTP_EPOCH_DELTA) & 0xFFFFFFFF, frac)
+
+
+def _from_ntp_timestamp(data: bytes) -> float:
+    sec, frac = struct.unpack("!II", data)
+    if not sec & 0x80000000:
+        # RFC 4330 第 3 节：最高位为 0 表示 2036 年之后的时代
+        sec += 1 << 32
+    return sec - NTP_EPOCH_DELTA + frac / (1 << 32)
+
+
+def _split_server(server: str) -> Tuple[str, int]:
+    # 支持 host、host:port、[v6]:port 以及裸 IPv6 地址
+    if server.startswith("["):
+        host, _, rest = server[1:].partition("]")
+        port = rest[1:]
+    elif server.count(":") == 1:
+        host, port = server.split(":")
+    else:
+        host, port = server, ""
+    return host, int(port) if port.isdigit() else SNTP_PORT
+
+
+def sntp_query(server: str, timeout: float = 1.0) -> Optional[Tuple[float, float]]:
+    """向单个服务器发一次 SNTP 请求，返回 (偏移秒数, 往返延迟秒数)。"""
+    host, port = _split_server(server)
+    try:
+        family, _, _, _, addr = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            t1 = time.time()
+            origin = _to_ntp_timestamp(t1)
+            # LI=0, VN=4, Mode=3 (client)
+            sock.sendto(b"\x23" + bytes(39) + origin, addr)
+            data, _ = sock.recvfrom(512)
+            t4 = time.time()
+    except OSError as e:
+        print(f"SNTP error ({server}): {e}")
+        return None
+
+    if len(data) < 48:
+        return None
+    leap, mode, stratum = data[0] >> 6, data[0] & 0x7, data[1]
+    if leap == 3 or mode not in (4, 5) or not 1 <= stratum <= 15:
+        return None
+    if data[24:32] != origin or data[40:48] == bytes(8):
+        return None
+
+    t2 = _from_ntp_timestamp(data[32:40])
+    t3 = _from_ntp_timestamp(data[40:48])
+    offset = ((t2 - t1) + (t3 - t4)) / 2
+    delay = (t4 - t1) - (t3 - t2)
+    return offset, max(delay, 0.0)
+
+
+def _best_sntp_sample(server: str, samples: int, timeout: float) -> Optional[Tuple[float, float]]:
+    results = [r for r in (sntp_query(server, timeout) for _ in range(samples)) if r is not None]
+    if not results:
+        return None
+    # 时钟过滤：往返延迟最小的样本受网络抖动影响最小
+    return min(results, key=lambda r: r[1])
+
+
+def get_sntp_offset(servers: Optional[List[str]] = None, samples: int = 4,
+                    timeout: float = 1.0) -> Optional[datetime.timedelta]:
+    import statistics
+    from concurrent.futures import ThreadPoolExecutor
+
+    servers = servers or DEFAULT_SNTP_SERVERS
+    with ThreadPoolExecutor(max_workers=len(servers)) as pool:
+        best = list(pool.map(lambda srv: _best_sntp_sample(srv, samples, timeout), servers))
+    offsets = [r[0] for r in best if r is not None]
+    if not offsets:
+        return None
+    return datetime.timedelta(seconds=statistics.median(offsets))
+
+
+def measure_time_offset(source: str = TIME_SOURCE_HTTP, servers: Optional[List[str]] = None,
+                        url: Optional[str] = None) -> Optional[datetime.timedelta]:
+    if source == TIME_SOURCE_SNTP:
+        return get_sntp_offset(servers)
+    return _measure_http_offset(url)
@@ -0,0 +1,346 @@
+import datetime
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Optional, List, Tuple
+
+import pytz
+
+
+class TimezoneService:
+    """缓存时区对象和当前 UTC 偏移；在下一次偏移变化之前，UTC 转本地只是加一个常量。
+
+    backend 可选 "pytz"（默认）或标准库 "zoneinfo"。
+    """
+    FALLBACK = "Asia/Shanghai"
+    SCAN_STEP = datetime.timedelta(hours=12)
+    SCAN_HORIZON = datetime.timedelta(days=370)
+
+    def __init__(self, name: str = FALLBACK, backend: str = "pytz"):
+        self.backend = backend
+        self._zones = {}
+        self.set_zone(name)
+
+    def _resolve(self, name: str):
+        zone = self._zones.get(name)
+        if zone is None:
+            if self.backend == "zoneinfo":
+                import zoneinfo
+                zone = zoneinfo.ZoneInfo(name)
+            else:
+                zone = pytz.timezone(name)
+            self._zones[name] = zone
+        return zone
+
+    def set_zone(self, name: str):
+        try:
+            self.zone = self._resolve(name)
+            self.name = name
+        except (KeyError, ValueError):
+            # pytz.UnknownTimeZoneError 和 ZoneInfoNotFoundError 都是 KeyError
+            self.zone = self._resolve(self.FALLBACK)
+            self.name = self.FALLBACK
+        self._valid_from = None
+        self._valid_until = None
+
+    def utcoffset(self, now_utc: datetime.datetime) -> datetime.timedelta:
+        return now_utc.astimezone(self.zone).utcoffset() or datetime.timedelta(0)
+
+    def next_transition(self, now_utc: datetime.datetime) -> Optional[datetime.datetime]:
+        """now_utc 之后下一次切换（UTC 偏移或缩写变化）的时刻，没有已知切换时返回 None。"""
+        if self.backend != "zoneinfo":
+            # pytz 自带切换时刻表，直接二分；固定偏移的时区没有表，也就没有切换
+            return _next_pytz_transition(self.zone, now_utc)
+        return self._scan_transition(now_utc)
+
+    def _scan_transition(self, now_utc: datetime.datetime) -> Optional[datetime.datetime]:
+        # zoneinfo 不公开切换表：按 SCAN_STEP 步进找到偏移变化的区间，再二分到秒
+        offset = self.utcoffset(now_utc)
+        lo, end = now_utc, now_utc + self.SCAN_HORIZON
+        while lo < end:
+            hi = min(lo + self.SCAN_STEP, end)
+            if self.utcoffset(hi) == offset:
+                lo = hi
+                continue
+            while hi - lo > datetime.timedelta(seconds=1):
+                mid = lo + (hi - lo) / 2
+                if self.utcoffset(mid) == offset:
+                    lo = mid
+                else:
+                    hi = mid
+            # 切换发生在整秒，且落在 (lo, hi] 之间
+            return lo.replace(microsecond=0) + datetime.timedelta(seconds=1)
+        return None
+
+    def _refresh(self, now_utc: datetime.datetime):
+        local = now_utc.astimezone(self.zone)
+        self._fixed = datetime.timezone(local.utcoffset() or datetime.timedelta(0), local.tzname())
+        self._valid_from = now_utc
+        self._valid_until = self.next_transition(now_utc) or now_utc + self.SCAN_HORIZON
+
+    def to_local(self, now_utc: datetime.datetime) -> datetime.datetime:
+        if self._valid_from is None or not self._valid_from <= now_utc < self._valid_until:
+            self._refresh(now_utc)
+        return now_utc.astimezone(self._fixed)
+
+    def to_utc(self, naive_local: datetime.datetime, after: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """把本地墙上时间换算成 UTC 时刻；夏令时回拨造成的重复时间取 after 之后的第一个。"""
+        if hasattr(self.zone, "localize"):
+            candidates = [self.zone.localize(naive_local, is_dst=dst) for dst in (True, False)]
+        else:
+            candidates = [naive_local.replace(tzinfo=self.zone, fold=fold) for fold in (0, 1)]
+        instants = sorted(c.astimezone(datetime.timezone.utc) for c in candidates)
+        if after is not None:
+            for instant in instants:
+                if instant > after:
+                    return instant
+        return instants[0]
+
+
+ZONE_TABLES = ("zone1970.tab", "zone.tab")
+
+
+def _parse_iso6709_part(part: str, deg_digits: int) -> float:
+    sign = -1 if part[0] == '-' else 1
+    digits = part[1:]
+    degrees = int(digits[:deg_digits])
+    minutes = int(digits[deg_digits:deg_digits + 2])
+    seconds = int(digits[deg_digits + 2:] or 0)
+    return sign * (degrees + minutes / 60 + seconds / 3600)
+
+
+def parse_iso6709(coord: str) -> Tuple[float, float]:
+    # ±DDMM±DDDMM 或 ±DDMMSS±DDDMMSS
+    split = max(coord.rfind('+'), coord.rfind('-'))
+    return _parse_iso6709_part(coord[:split], 2), _parse_iso6709_part(coord[split:], 3)
+
+
+@lru_cache(maxsize=1)
+def load_zone_coordinates() -> Tuple[Tuple[str, float, float], ...]:
+    """从 pytz 自带的 tzdata 表中读取每个 IANA 时区代表城市的经纬度。"""
+    zones = {}
+    for table in ZONE_TABLES:
+        try:
+            with pytz.open_resource(table) as f:
+                for raw in f:
+                    line = raw.decode('utf-8').strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    fields = line.split('\t')
+                    if len(fields) < 3 or fields[2] in zones:
+                        continue
+                    lat, lon = parse_iso6709(fields[1])
+                    zones[fields[2]] = (fields[2], lat, lon)
+        except Exception as e:
+            print(f"Load zone table error ({table}): {e}")
+    return tuple(zones.values())
+
+
+def utc_offset_minutes(tz_name: str, now_utc: datetime.datetime) -> Optional[int]:
+    try:
+        offset = now_utc.astimezone(pytz.timezone(tz_name)).utcoffset()
+    except Exception:
+        return None
+    if offset is None:
+        return 0
+    return int(offset.total_seconds() // 60)
+
+
+def _next_pytz_transition(zone, now_utc: datetime.datetime) -> Optional[datetime.datetime]:
+    times = getattr(zone, "_utc_transition_times", None)
+    if not times:
+        return None
+    i = bisect_right(times, now_utc.replace(tzinfo=None))
+    if i >= len(times):
+        return None
+    return times[i].replace(tzinfo=datetime.timezone.utc)
+
+
+def _zone_region(tz_name: str) -> str:
+    return tz_name.split('/')[0] if '/' in tz_name else ""
+
+
+class ZoneOffsetIndex:
+    """为所有时区预先算好当前 UTC 偏移，并按偏移和地区前缀分桶。
+
+    resolve() 把任意时区映射到 candidates 中同地区、偏移最接近的一个
+    （并列时取 candidates 中靠前的），结果一次性算好，查询只是查字典。
+    任何时区到达下一次偏移切换时整体重建。
+    """
+    FALLBACK_REFRESH = datetime.timedelta(days=1)
+
+    def __init__(self, candidates: List[str]):
+        self.candidates = list(candidates)
+        self.order = {tz: i for i, tz in reversed(list(enumerate(self.candidates)))}
+        self.valid_until = None
+        self.rebuild()
+
+    def rebuild(self, now_utc: Optional[datetime.datetime] = None):
+        now_utc = now_utc or datetime.datetime.now(datetime.timezone.utc)
+        valid_until = now_utc + self.FALLBACK_REFRESH
+        self.offsets = {}
+        for name in set(pytz.all_timezones) | set(self.order):
+            try:
+                zone = pytz.timezone(name)
+            except pytz.UnknownTimeZoneError:
+                continue
+            offset = now_utc.astimezone(zone).utcoffset()
+            self.offsets[name] = int(offset.total_seconds() // 60) if offset is not None else 0
+            transition = _next_pytz_transition(zone, now_utc)
+            if transition is not None and transition < valid_until:
+                valid_until = transition
+        self.valid_until = valid_until
+
+        # 每个地区（None 表示全部）: 偏移 -> 该偏移下最靠前的候选
+        self.first = {}
+        buckets = {}
+        for tz in self.candidates:
+            offset = self.offsets.get(tz)
+            for key in (_zone_region(tz), None):
+                self.first.setdefault(key, tz)
+                if offset is not None:
+                    buckets.setdefault(key, {}).setdefault(offset, tz)
+        self.buckets = buckets
+        self.sorted_offsets = {key: sorted(bucket) for key, bucket in buckets.items()}
+        self.resolved = {name: self._resolve_uncached(name) for name in self.offsets}
+
+    def _resolve_uncached(self, tz_name: str) -> str:
+        if tz_name in self.order or not self.candidates:
+            return tz_name
+        region = _zone_region(tz_name)
+        key = region if region in self.first else None
+        target = self.offsets.get(tz_name)
+        bucket = self.buckets.get(key)
+        if target is None or not bucket:
+            return self.first[key]
+        exact = bucket.get(target)
+        if exact is not None:
+            return exact
+
+        offsets = self.sorted_offsets[key]
+        i = bisect_left(offsets, target)
+        nearby = [bucket[offsets[j]] for j in (i - 1, i) if 0 <= j < len(offsets)]
+        return min(nearby, key=lambda tz: (abs(self.offsets[tz] - target), self.order[tz]))
+
+    def offset_of(self, tz_name: str) -> Optional[int]:
+        return self.offsets.get(tz_name)
+
+    def resolve(self, tz_name: str, now_utc: Optional[datetime.datetime] = None) -> str:
+        now_utc = now_utc or datetime.datetime.now(datetime.timezone.utc)
+        if now_utc >= self.valid_until:
+            self.rebuild(now_utc)
+        resolved = self.resolved.get(tz_name)
+        return resolved if resolved is not None else self._resolve_uncached(tz_name)
+
+
+ZONE_ALIASES = {
+    "Asia/Shanghai": ("上海", "北京", "中国"),
+    "Asia/Urumqi": ("乌鲁木齐",),
+    "Asia/Hong_Kong": ("香港",),
+    "Asia/Macau": ("澳门",),
+    "Asia/Taipei": ("台北",),
+    "Asia/Tokyo": ("东京", "日本"),
+    "Asia/Seoul": ("首尔", "韩国"),
+    "Asia/Singapore": ("新加坡",),
+    "Asia/Kuala_Lumpur": ("吉隆坡", "马来西亚"),
+    "Asia/Bangkok": ("曼谷", "泰国"),
+    "Asia/Ho_Chi_Minh": ("胡志明市", "越南"),
+    "Asia/Jakarta": ("雅加达", "印度尼西亚"),
+    "Asia/Manila": ("马尼拉", "菲律宾"),
+    "Asia/Kolkata": ("加尔各答", "新德里", "印度"),
+    "Asia/Dubai": ("迪拜", "阿联酋"),
+    "Asia/Riyadh": ("利雅得", "沙特"),
+    "Asia/Tehran": ("德黑兰", "伊朗"),
+    "Europe/London": ("伦敦", "英国"),
+    "Europe/Paris": ("巴黎", "法国"),
+    "Europe/Berlin": ("柏林", "德国"),
+    "Europe/Rome": ("罗马", "意大利"),
+    "Europe/Madrid": ("马德里", "西班牙"),
+    "Europe/Moscow": ("莫斯科", "俄罗斯"),
+    "Africa/Cairo": ("开罗", "埃及"),
+    "Africa/Johannesburg": ("约翰内斯堡", "南非"),
+    "America/New_York": ("纽约", "美国东部"),
+    "America/Chicago": ("芝加哥", "美国中部"),
+    "America/Denver": ("丹佛", "美国山地"),
+    "America/Los_Angeles": ("洛杉矶", "美国西部"),
+    "America/Anchorage": ("安克雷奇", "阿拉斯加"),
+    "America/Toronto": ("多伦多", "加拿大"),
+    "America/Vancouver": ("温哥华",),
+    "America/Mexico_City": ("墨西哥城", "墨西哥"),
+    "America/Caracas": ("加拉加斯", "委内瑞拉"),
+    "America/Sao_Paulo": ("圣保罗", "巴西"),
+    "America/Buenos_Aires": ("布宜诺斯艾利斯", "阿根廷"),
+    "Australia/Sydney": ("悉尼", "澳大利亚"),
+    "Australia/Perth": ("珀斯",),
+    "Pacific/Auckland": ("奥克兰", "新西兰"),
+    "Pacific/Honolulu": ("檀香山", "夏威夷"),
+    "UTC": ("协调世界时", "世界时"),
+}
+
+
+@lru_cache(maxsize=1)
+def all_timezone_names() -> Tuple[str, ...]:
+    return tuple(pytz.all_timezones)
+
+
+@lru_cache(maxsize=1)
+def _timezone_name_set() -> frozenset:
+    return frozenset(all_timezone_names())
+
+
+def is_valid_timezone(name: str) -> bool:
+    return name in _timezone_name_set()
+
+
+def format_utc_offset(minutes: int) -> str:
+    sign = '+' if minutes >= 0 else '-'
+    hours, mins = divmod(abs(minutes), 60)
+    return f"UTC{sign}{hours:02d}:{mins:02d}"
+
+
+class ZoneSearchIndex:
+    """时区名、城市名、中文别名和 UTC 偏移上的三元组 (trigram) 索引，用于输入即筛选。
+
+    少于 3 个字符的查询直接扫描所有键；结果中前缀匹配排在子串匹配之前。
+    """
+    GRAM = 3
+
+    def __init__(self, zones, offsets: Optional[dict] = None, aliases: Optional[dict] = None):
+        self.zones = tuple(zones)
+        offsets = offsets or {}
+        aliases = ZONE_ALIASES if aliases is None else aliases
+        self.keys = []
+        self.postings = {}
+        for row, name in enumerate(self.zones):
+            keys = {name.lower(), name.split('/')[-1].replace('_', ' ').lower()}
+            keys.update(aliases.get(name, ()))
+            minutes = offsets.get(name)
+            if minutes is not None:
+                full = format_utc_offset(minutes).lower()
+                keys.add(full)
+                # 同时支持 "utc+8" 这样的简写
+                keys.add(full.replace(":00", "").replace("+0", "+").replace("-0", "-"))
+            self.keys.append(tuple(keys))
+            for key in keys:
+                for i in range(len(key) - self.GRAM + 1):
+                    self.postings.setdefault(key[i:i + self.GRAM], set()).add(row)
+
+    def search(self, query: str) -> Optional[List[int]]:
+        """返回匹配的行号；空查询返回 None，表示不过滤。"""
+        q = query.strip().lower()
+        if not q:
+            return None
+        if len(q) < self.GRAM:
+            rows = range(len(self.zones))
+        else:
+            grams = sorted((self.postings.get(q[i:i + self.GRAM], set()) for i in range(len(q) - self.GRAM + 1)), key=len)
+            rows = set(grams[0]).intersection(*grams[1:])
+            rows = sorted(rows)
+
+        prefix, substring = [], []
+        for row in rows:
+            keys = self.keys[row]
+            if any(key.startswith(q) for key in keys):
+                prefix.append(row)
+            elif any(q in key for key in keys):
+                substring.append(row)
+        return prefix + substring
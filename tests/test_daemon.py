@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from urllib.parse import quote
+
+from core.daemon import DisciplinedClock, ScheduleDaemon, ScheduleRegistry
+from core.schedule import DEFAULT_SCHEDULE
+
+ROOM = "高一1班"
+
+
+class ScheduleDaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name in (ROOM, "room1"):
+            with open(os.path.join(self.dir, name + ".json"), 'w', encoding='utf-8') as f:
+                json.dump(DEFAULT_SCHEDULE, f, ensure_ascii=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def serve(self, scenario):
+        async def run():
+            registry = ScheduleRegistry()
+            registry.load_directory(self.dir)
+            daemon = ScheduleDaemon(registry, DisciplinedClock())
+            server = await daemon.start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await scenario(port)
+            finally:
+                await daemon.close()
+        return asyncio.run(run())
+
+    @staticmethod
+    async def get(port, target: bytes):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET " + target + b" HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split(b" ")[1]), json.loads(body.decode("utf-8"))
+
+    def test_non_ascii_room(self):
+        async def scenario(port):
+            return [await self.get(port, target) for target in
+                    (quote("/state/" + ROOM).encode("ascii"), ("/state/" + ROOM).encode("utf-8"))]
+        for status, body in self.serve(scenario):
+            self.assertEqual(status, 200)
+            self.assertEqual(body["name"], ROOM)
+
+    def test_query_string_is_ignored(self):
+        async def scenario(port):
+            return (await self.get(port, b"/state/room1?x=1"), await self.get(port, b"/schedules?verbose"),
+                    await self.get(port, b"/state/missing"))
+        state, schedules, missing = self.serve(scenario)
+        self.assertEqual(state[0], 200)
+        self.assertEqual(state[1]["name"], "room1")
+        self.assertEqual(schedules, (200, sorted([ROOM, "room1"])))
+        self.assertEqual(missing[0], 404)
+
+    def test_events_non_ascii_room(self):
+        async def scenario(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET " + quote("/events/" + ROOM).encode("ascii") + b"?since=0 HTTP/1.1\r\n\r\n")
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            event = await reader.readuntil(b"\n\n")
+            writer.close()
+            return head, event
+        head, event = self.serve(scenario)
+        self.assertTrue(head.startswith(b"HTTP/1.1 200"))
+        self.assertIn(b"event: state", event)
+        self.assertIn(ROOM.encode("utf-8"), event)
+
+    def test_registry_does_not_write_cache_files(self):
+        ScheduleRegistry().load_directory(self.dir)
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted([ROOM + ".json", "room1.json"]))
+
+
+
+class DisciplinedClockTest(unittest.TestCase):
+    @staticmethod
+    def suspend(clock, seconds):
+        # 挂起期间单调时钟不走：效果等于基准时刻往回挪
+        clock._base_utc -= datetime.timedelta(seconds=seconds)
+
+    def test_small_drift_is_not_rebased(self):
+        clock = DisciplinedClock()
+        changes = []
+        clock.changed.connect(lambda: changes.append(1))
+        self.suspend(clock, 0.4)
+        lag = datetime.datetime.now(datetime.timezone.utc) - clock.now_utc()
+        self.assertGreater(lag, datetime.timedelta(seconds=0.3))
+        self.assertEqual(changes, [])
+
+    def test_rebases_after_suspend_and_keeps_offset(self):
+        clock = DisciplinedClock()
+        clock.set_offset(datetime.timedelta(seconds=5))
+        changes = []
+        clock.changed.connect(lambda: changes.append(1))
+        self.suspend(clock, 600)
+        expected = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=5)
+        self.assertLess(abs(clock.now_utc() - expected), datetime.timedelta(seconds=0.5))
+        self.assertEqual(changes, [1])
+
+    def test_suspend_triggers_immediate_resync(self):
+        calls = []
+
+        def measure(*args):
+            calls.append(args)
+            return datetime.timedelta(seconds=len(calls))
+
+        async def scenario():
+            clock = DisciplinedClock("http", resync_interval=3600.0)
+            task = asyncio.get_running_loop().create_task(clock.run())
+            try:
+                while not calls:
+                    await asyncio.sleep(0.01)
+                self.suspend(clock, 600)
+                clock.now_utc()
+                for _ in range(100):
+                    if clock.offset == datetime.timedelta(seconds=2):
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                task.cancel()
+            return clock.offset
+
+        with mock.patch("core.daemon.measure_time_offset", measure):
+            self.assertEqual(asyncio.run(scenario()), datetime.timedelta(seconds=2))
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,15 @@
+import unittest
+
+import bench
+
+
+class CoreImportBudgetTest(unittest.TestCase):
+    def test_core_import_within_budget(self):
+        result = bench.bench_core_import()
+        self.assertFalse(result["heavy_modules_loaded"], result)
+        self.assertLessEqual(result["min_ms"], result["budget_ms"], result)
+        self.assertTrue(result["within_budget"], result)
+
+
+if __name__ == "__main__":
+    unittest.main()
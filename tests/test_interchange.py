@@ -0,0 +1,68 @@
+import datetime
+import io
+import unittest
+
+from core.interchange import iter_ics_events, iter_ics_segments, write_ics
+from core.schedule import Segment
+
+SEGMENTS = [
+    Segment(datetime.time(8, 0), datetime.time(8, 45), "上课", "数学", "距离下课还有:"),
+    Segment(datetime.time(8, 45), datetime.time(9, 0), "下课", "", "距离上课还有:"),
+    Segment(datetime.time(22, 0), datetime.time(6, 0), "放学", "", "距离上课还有:"),
+]
+# 柏林 2026-03-29 进入夏令时
+EXPORT_DAY = datetime.date(2026, 3, 27)
+
+
+def _export(tz_name):
+    out = io.StringIO()
+    write_ics(SEGMENTS, out, EXPORT_DAY, tz_name)
+    return out.getvalue()
+
+
+def _read(text, day, tz_name):
+    return list(iter_ics_segments(io.StringIO(text), day, tz_name=tz_name))
+
+
+class WriteIcsTest(unittest.TestCase):
+    def test_every_tzid_has_vtimezone(self):
+        text = _export("Europe/Berlin")
+        self.assertIn("BEGIN:VTIMEZONE\r\nTZID:Europe/Berlin\r\n", text)
+        self.assertLess(text.index("END:VTIMEZONE"), text.index("BEGIN:VEVENT"))
+        for offsets in ("TZOFFSETFROM:+0100\r\nTZOFFSETTO:+0200", "TZOFFSETFROM:+0200\r\nTZOFFSETTO:+0100"):
+            self.assertIn(offsets, text)
+        # VTIMEZONE 里的 DTSTART 不能被当成事件读回来
+        self.assertEqual(len(list(iter_ics_events(io.StringIO(text)))), len(SEGMENTS))
+
+    def test_round_trip_keeps_wall_times_across_dst(self):
+        text = _export("Europe/Berlin")
+        for day in (EXPORT_DAY, datetime.date(2026, 3, 30), datetime.date(2026, 11, 2)):
+            self.assertEqual(_read(text, day, "Europe/Berlin"), SEGMENTS, day)
+
+    def test_round_trip_into_other_zone(self):
+        text = _export("Europe/Berlin")
+        starts = {seg.start for seg in _read(text, datetime.date(2026, 3, 30), "Asia/Shanghai")}
+        # 夏令时期间柏林 8:00 是上海 14:00
+        self.assertEqual(starts, {datetime.time(14, 0), datetime.time(14, 45), datetime.time(4, 0)})
+
+    def test_round_trip_honours_exdate(self):
+        text = _export("Europe/Berlin")
+        skipped = datetime.date(2026, 4, 1)
+        text = text.replace("RRULE:FREQ=DAILY\r\nSUMMARY:数学",
+                            f"RRULE:FREQ=DAILY\r\nEXDATE;TZID=Europe/Berlin:{skipped:%Y%m%d}T080000\r\nSUMMARY:数学", 1)
+        self.assertEqual(_read(text, skipped, "Europe/Berlin"), SEGMENTS[1:])
+        self.assertEqual(_read(text, skipped + datetime.timedelta(days=1), "Europe/Berlin"), SEGMENTS)
+
+    def test_floating_export_has_no_vtimezone(self):
+        text = _export(None)
+        self.assertNotIn("TZID", text)
+        self.assertEqual(_read(text, datetime.date(2026, 3, 30), "Asia/Shanghai"), SEGMENTS)
+
+    def test_fixed_offset_zone(self):
+        text = _export("Asia/Shanghai")
+        self.assertIn("TZOFFSETTO:+0800", text)
+        self.assertEqual(_read(text, datetime.date(2026, 6, 1), "Asia/Shanghai"), SEGMENTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import datetime
+import unittest
+
+from core.reminders import ReminderQueue, ReminderRule, default_reminder_rules
+from core.schedule import DEFAULT_SCHEDULE, ScheduleManager, parse_schedule
+from core.timezones import TimezoneService
+
+
+class ReminderQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.segments = parse_schedule(DEFAULT_SCHEDULE)
+        self.manager = ScheduleManager(self.segments)
+        self.tz = TimezoneService("Asia/Shanghai")
+        # 北京时间 2026-03-02 00:00
+        self.now = datetime.datetime(2026, 3, 1, 16, 0, tzinfo=datetime.timezone.utc)
+
+    def queue(self, rules):
+        queue = ReminderQueue(rules, horizon=datetime.timedelta(hours=24))
+        queue.reset(self.manager, self.tz, self.now)
+        limit = self.now + datetime.timedelta(hours=24)
+        return sorted(r for r in queue.heap if r.change_at <= limit)
+
+    def test_lead_reminder_for_every_class_end(self):
+        class_ends = sorted(seg.end for seg in self.segments if seg.state == "上课")
+        lead = [r for r in self.queue(default_reminder_rules(5)) if r.rule.lead]
+        self.assertEqual(len(lead), len(class_ends))
+        self.assertEqual([self.tz.to_local(r.change_at).time() for r in lead], class_ends)
+        for reminder in lead:
+            self.assertEqual(reminder.change_at - reminder.due, datetime.timedelta(minutes=5))
+
+    def test_class_to_dismissal_boundary(self):
+        lead = [r for r in self.queue(default_reminder_rules(5)) if r.rule.lead]
+        into_dismissal = [r for r in lead if r.segment.state == "放学"]
+        self.assertIn(datetime.time(11, 30), [self.tz.to_local(r.change_at).time() for r in into_dismissal])
+        self.assertEqual(into_dismissal[0].text(self.tz), "还有 5 分钟下课（11:30）")
+
+    def test_state_rule_still_matches_entering_segment(self):
+        starts = self.queue([ReminderRule(0, "上课", "上课了 {course_name}")])
+        self.assertEqual(len(starts), sum(seg.state == "上课" for seg in self.segments))
+        self.assertEqual(starts[0].text(self.tz), "上课了 第一节课")
+
+    def test_reset_replaces_rules(self):
+        queue = ReminderQueue(default_reminder_rules(5))
+        queue.reset(self.manager, self.tz, self.now)
+        self.assertTrue(queue.heap)
+        queue.reset(self.manager, self.tz, self.now, [])
+        self.assertEqual((queue.rules, queue.heap), ([], []))
+        queue.reset(self.manager, self.tz, self.now, default_reminder_rules(0))
+        self.assertEqual({r.rule.lead for r in queue.heap}, {0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from core.schedule import (DEFAULT_SCHEDULE, parse_schedule, read_schedule_file, schedule_cache_path,
+                           _atomic_write)
+
+
+class ScheduleCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "schedule.json")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(DEFAULT_SCHEDULE, f, ensure_ascii=False)
+        self.expected = parse_schedule(DEFAULT_SCHEDULE)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_cache_hit_matches_json(self):
+        read_schedule_file(self.path)
+        self.assertTrue(os.path.exists(schedule_cache_path(self.path)))
+        self.assertEqual(read_schedule_file(self.path)[1], self.expected)
+
+    def test_truncated_cache_is_rebuilt(self):
+        digest, _ = read_schedule_file(self.path)
+        cache = schedule_cache_path(self.path)
+        full_size = os.path.getsize(cache)
+        for size in (0, 10, 47, full_size - 1):
+            with open(cache, 'r+b') as f:
+                f.truncate(size)
+            self.assertEqual(read_schedule_file(self.path), (digest, self.expected), size)
+            self.assertEqual(os.path.getsize(cache), full_size, size)
+
+    def test_garbage_cache_is_rebuilt(self):
+        read_schedule_file(self.path)
+        cache = schedule_cache_path(self.path)
+        with open(cache, 'r+b') as f:
+            f.seek(40)
+            f.write(b"\xff" * 64)
+        self.assertEqual(read_schedule_file(self.path)[1], self.expected)
+        self.assertEqual(read_schedule_file(self.path)[1], self.expected)
+
+    def test_concurrent_atomic_writes_in_one_process(self):
+        target = os.path.join(self.dir, "target.bin")
+        errors = []
+
+        def write(n):
+            try:
+                for _ in range(50):
+                    _atomic_write(target, bytes([n]) * 4096)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        with open(target, 'rb') as f:
+            data = f.read()
+        self.assertEqual(len(set(data)), 1)
+        self.assertEqual(len(data), 4096)
+        self.assertEqual(sorted(os.listdir(self.dir)), ["schedule.json", "target.bin"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import datetime
+import random
+import unittest
+
+from core.schedule import (DEFAULT_SCHEDULE, DIAG_EMPTY, DIAG_GAP, DIAG_OVERLAP, SECONDS_PER_DAY, UNKNOWN_SEGMENT,
+                           ScheduleDiagnostic, ScheduleIndex, ScheduleManager, Segment, parse_schedule,
+                           time_to_seconds)
+
+
+def seg(start, end, state="上课"):
+    h1, m1 = map(int, start.split(":"))
+    h2, m2 = map(int, end.split(":"))
+    return Segment(datetime.time(h1, m1), datetime.time(h2, m2), state)
+
+
+def sec(hhmm):
+    return time_to_seconds(seg(hhmm, hhmm).start)
+
+
+def linear_slot(segments, sec):
+    """原先 ScheduleManager 的线性扫描：按列表顺序取第一个覆盖 sec 的区段。"""
+    for idx, s in enumerate(segments):
+        start, end = time_to_seconds(s.start), time_to_seconds(s.end)
+        if start <= end:
+            if start <= sec < end:
+                return idx
+        elif sec >= start or sec < end:
+            return idx
+    return -1
+
+
+def random_schedule(rng):
+    segments = []
+    for _ in range(rng.randint(0, 12)):
+        start = rng.randrange(SECONDS_PER_DAY // 60) * 60
+        end = rng.choice([start, rng.randrange(SECONDS_PER_DAY // 60) * 60])
+        segments.append(Segment(datetime.time(start // 3600, start // 60 % 60),
+                                datetime.time(end // 3600, end // 60 % 60), f"s{len(segments)}"))
+    return segments
+
+
+class ScheduleIndexTest(unittest.TestCase):
+    def test_midnight_wrap_is_split(self):
+        index = ScheduleIndex([seg("08:00", "20:30", "白天"), seg("20:30", "08:00", "放学")])
+        self.assertEqual(list(index.bounds), [0, 8 * 3600, 20 * 3600 + 1800])
+        self.assertEqual(list(index.slots), [1, 0, 1])
+        self.assertEqual(index.segment_at(23 * 3600).state, "放学")
+        self.assertEqual(index.segment_at(3 * 3600).state, "放学")
+        self.assertEqual(index.segment_at(8 * 3600).state, "白天")
+        self.assertEqual(index.segment_at(8 * 3600 - 1).state, "放学")
+
+    def test_overlap_keeps_first_match(self):
+        segments = [seg("08:00", "09:00", "第一"), seg("08:30", "10:00", "第二"), seg("07:00", "08:45", "第三")]
+        index = ScheduleIndex(segments)
+        for hhmm, state in (("07:30", "第三"), ("08:10", "第一"), ("08:50", "第一"), ("09:30", "第二"),
+                            ("10:00", "未知")):
+            sec = time_to_seconds(seg(hhmm, hhmm).start)
+            self.assertEqual(index.segment_at(sec).state, state, hhmm)
+
+    def test_uncovered_and_empty(self):
+        index = ScheduleIndex([seg("08:00", "08:00"), seg("09:00", "10:00")])
+        self.assertIs(index.segment_at(8 * 3600), UNKNOWN_SEGMENT)
+        self.assertEqual(index.segment_at(9 * 3600).state, "上课")
+        self.assertIs(ScheduleIndex([]).segment_at(0), UNKNOWN_SEGMENT)
+
+    def test_matches_linear_scan_on_random_schedules(self):
+        rng = random.Random(20260301)
+        for _ in range(200):
+            segments = random_schedule(rng)
+            index = ScheduleIndex(segments)
+            points = {0, SECONDS_PER_DAY - 1}
+            for s in segments:
+                for sec in (time_to_seconds(s.start), time_to_seconds(s.end)):
+                    points.update({(sec - 1) % SECONDS_PER_DAY, sec})
+            points.update(rng.randrange(SECONDS_PER_DAY) for _ in range(200))
+            for sec in sorted(points):
+                self.assertEqual(index.slot_at(sec), linear_slot(segments, sec), (segments, sec))
+
+    def test_dense_table_agrees_with_bisect(self):
+        rng = random.Random(7)
+        schedules = [parse_schedule(DEFAULT_SCHEDULE)] + [random_schedule(rng) for _ in range(10)]
+        for segments in schedules:
+            sparse, dense = ScheduleIndex(segments), ScheduleIndex(segments, dense=True)
+            self.assertEqual(len(dense.table), SECONDS_PER_DAY)
+            self.assertEqual(list(dense.table), [sparse.slot_at(sec) for sec in range(SECONDS_PER_DAY)])
+
+    def test_next_change_wraps_to_next_day(self):
+        index = ScheduleIndex(parse_schedule(DEFAULT_SCHEDULE))
+        self.assertEqual(index.next_change_seconds(0), 8 * 3600)
+        self.assertEqual(index.next_change_seconds(8 * 3600), 8 * 3600 + 45 * 60)
+        self.assertEqual(index.next_change_seconds(21 * 3600), SECONDS_PER_DAY + 8 * 3600)
+        self.assertIsNone(ScheduleIndex([]).next_change_seconds(0))
+
+    def test_manager_current_segment(self):
+        manager = ScheduleManager(parse_schedule(DEFAULT_SCHEDULE), dense_table=True)
+        self.assertEqual(manager.current_segment(datetime.time(8, 30)).course_name, "第一节课")
+        self.assertEqual(manager.current_segment(datetime.time(2, 0)).state, "放学")
+        now = datetime.datetime(2026, 3, 2, 20, 45)
+        self.assertEqual(manager.next_change_datetime(now), datetime.datetime(2026, 3, 3, 8, 0))
+
+
+
+class ScheduleDiagnosticsTest(unittest.TestCase):
+    def diagnostics(self, *spans):
+        return ScheduleIndex([seg(start, end) for start, end in spans]).diagnostics
+
+    def test_overlap(self):
+        self.assertEqual(self.diagnostics(("08:00", "09:00"), ("08:30", "10:00"), ("10:00", "08:00")),
+                         [ScheduleDiagnostic(DIAG_OVERLAP, (0, 1), sec("08:30"), sec("09:00"))])
+
+    def test_gaps(self):
+        # 17:00 到次日 08:00 没人覆盖，午夜两侧合并成一条
+        self.assertEqual(self.diagnostics(("08:00", "09:00"), ("09:10", "17:00")),
+                         [ScheduleDiagnostic(DIAG_GAP, (0, 1), sec("09:00"), sec("09:10")),
+                          ScheduleDiagnostic(DIAG_GAP, (0, 1), sec("17:00"), sec("08:00"))])
+
+    def test_empty(self):
+        self.assertEqual(self.diagnostics(("08:00", "08:00"), ("00:00", "12:00"), ("12:00", "00:00")),
+                         [ScheduleDiagnostic(DIAG_EMPTY, (0,), sec("08:00"), sec("08:00"))])
+
+    def test_overlap_across_midnight(self):
+        self.assertEqual(self.diagnostics(("22:00", "02:00"), ("23:00", "01:00"), ("02:00", "22:00")),
+                         [ScheduleDiagnostic(DIAG_OVERLAP, (0, 1), sec("23:00"), sec("01:00"))])
+
+    def test_clean_schedule(self):
+        self.assertEqual(self.diagnostics(("08:00", "20:30"), ("20:30", "08:00")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
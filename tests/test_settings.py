@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.settings import AppSettings, JsonSettingsBackend, MemorySettingsBackend, SettingsBackend
+
+
+class SettingsBackendTest(unittest.TestCase):
+    def test_incomplete_backend_fails_on_construction(self):
+        class NoSetValue(SettingsBackend):
+            def contains(self, key):
+                return False
+
+            def value(self, key, default):
+                return default
+
+        with self.assertRaises(TypeError):
+            NoSetValue()
+        with self.assertRaises(TypeError):
+            SettingsBackend()
+
+    def test_json_backend_round_trip(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "config.json")
+        settings = AppSettings(JsonSettingsBackend(path))
+        settings.timezone = "Europe/London"
+        reloaded = AppSettings(JsonSettingsBackend(path))
+        self.assertEqual(reloaded.timezone, "Europe/London")
+        self.assertEqual(reloaded.reminder_lead_minutes, AppSettings.DEFAULTS["reminder_lead_minutes"])
+
+
+class AppSettingsTest(unittest.TestCase):
+    def test_reminders_off_by_default(self):
+        backend = MemorySettingsBackend({"timezone": "Asia/Tokyo"})
+        settings = AppSettings(backend)
+        self.assertFalse(settings.reminders_enabled)
+        self.assertIs(backend.values["reminders_enabled"], False)
+
+    def test_batch_saves_once(self):
+        settings = AppSettings(MemorySettingsBackend())
+        changes = []
+        settings.changed.connect(changes.append)
+        with settings.batch():
+            settings.timezone = "Asia/Tokyo"
+            settings.reminder_lead_minutes = 10
+            settings.time_format_24h = settings.time_format_24h
+        self.assertEqual(changes, [{"timezone", "reminder_lead_minutes"}])
+        self.assertEqual(settings.backend.values["timezone"], "Asia/Tokyo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import datetime
+import socket
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import core
+import core.constants
+from core.timesource import (_best_sntp_sample, _to_ntp_timestamp, get_network_time, get_sntp_offset,
+                             measure_time_offset, sntp_query)
+
+SKEW = datetime.timedelta(hours=1)
+
+
+class _SkewedDateHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def date_time_string(self, timestamp=None):
+        now = datetime.datetime.now(datetime.timezone.utc) + SKEW
+        return formatdate(now.timestamp(), usegmt=True)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpTimeSourceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _SkewedDateHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def assertSkewed(self, offset):
+        self.assertIsNotNone(offset)
+        self.assertLess(abs(offset - SKEW), datetime.timedelta(seconds=3))
+
+    def test_explicit_url(self):
+        self.assertSkewed(measure_time_offset(core.TIME_SOURCE_HTTP, url=self.url))
+
+    def test_patched_constants_url(self):
+        with mock.patch.object(core.constants, "TIME_SYNC_URL", self.url):
+            self.assertSkewed(measure_time_offset(core.TIME_SOURCE_HTTP))
+            self.assertIsNotNone(get_network_time())
+
+    def test_unreachable_server(self):
+        self.assertIsNone(measure_time_offset(core.TIME_SOURCE_HTTP, url="http://127.0.0.1:9/"))
+
+
+SNTP_SKEW = 2.5
+
+
+class _SntpStandIn:
+    """本地 UDP 替身服务器：按 replies 里的顺序应答，每项是 (回复前等待秒数, 改写回复的函数)。
+
+    收到请求立即记下接收时间戳、等待后再以接收时刻作为发送时间戳回复，
+    所以等待时间表现为网络延迟，测出的偏移也会偏小一半。
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.server = f"127.0.0.1:{self.sock.getsockname()[1]}"
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        for wait, mutate in self.replies:
+            request, addr = self.sock.recvfrom(512)
+            stamp = _to_ntp_timestamp(time.time() + SNTP_SKEW)
+            time.sleep(wait)
+            # LI=0, VN=4, Mode=4 (server), stratum 1；originate 照抄请求的 transmit
+            reply = bytearray(b"\x24\x01" + bytes(22) + request[40:48] + stamp + stamp)
+            self.sock.sendto(bytes(mutate(reply) if mutate else reply), addr)
+
+    def close(self):
+        self.thread.join(timeout=5)
+        self.sock.close()
+
+
+class SntpClientTest(unittest.TestCase):
+    def standin(self, replies):
+        server = _SntpStandIn(replies)
+        self.addCleanup(server.close)
+        return server.server
+
+    def test_offset_and_delay(self):
+        offset, delay = sntp_query(self.standin([(0.0, None)]))
+        self.assertAlmostEqual(offset, SNTP_SKEW, delta=0.05)
+        self.assertLess(delay, 0.05)
+
+    def test_min_delay_sample_is_chosen(self):
+        server = self.standin([(0.3, None), (0.3, None), (0.0, None), (0.3, None)])
+        offset, delay = _best_sntp_sample(server, samples=4, timeout=1.0)
+        # 慢样本延迟约 0.3 秒、偏移偏小约 0.15 秒；选中的必须是那个快样本
+        self.assertLess(delay, 0.1)
+        self.assertAlmostEqual(offset, SNTP_SKEW, delta=0.05)
+
+    def test_invalid_replies_are_rejected(self):
+        def set_byte(index, value):
+            def mutate(reply):
+                reply[index] = value
+                return reply
+            return mutate
+
+        def wrong_origin(reply):
+            reply[24:32] = bytes(8)
+            return reply
+
+        cases = {
+            "unsynchronized": set_byte(0, 0xE4),
+            "client mode": set_byte(0, 0x23),
+            "kiss of death": set_byte(1, 0),
+            "wrong origin": wrong_origin,
+            "truncated": lambda reply: reply[:40],
+        }
+        server = self.standin([(0.0, mutate) for mutate in cases.values()])
+        for name in cases:
+            self.assertIsNone(sntp_query(server), name)
+
+    def test_get_sntp_offset(self):
+        server = self.standin([(0.0, None)] * 2)
+        offset = get_sntp_offset([server], samples=2)
+        self.assertAlmostEqual(offset.total_seconds(), SNTP_SKEW, delta=0.05)
+
+    def test_timeout(self):
+        self.assertIsNone(sntp_query(self.standin([]), timeout=0.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import datetime
+import unittest
+
+from core.timezones import TimezoneService
+
+ZONES = ("America/New_York", "Europe/London", "Australia/Lord_Howe", "America/Santiago", "Asia/Tehran",
+         "Pacific/Chatham", "Asia/Shanghai")
+
+
+class NextTransitionTest(unittest.TestCase):
+    def test_pytz_table_matches_scan(self):
+        start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        for name in ZONES:
+            service = TimezoneService(name)
+            expected = service._scan_transition(start)
+            found, offset = service.next_transition(start), service.utcoffset(start)
+            # 时刻表里可能有只改缩写、不改偏移的切换，跳过它们再比较
+            while found is not None and service.utcoffset(found) == offset:
+                found = service.next_transition(found)
+            if found is not None and found >= start + TimezoneService.SCAN_HORIZON:
+                found = None
+            self.assertEqual(found, expected, name)
+
+    def test_fixed_offset_zone_has_no_transition(self):
+        now = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertIsNone(TimezoneService("UTC").next_transition(now))
+        self.assertIsNone(TimezoneService("Etc/GMT-8").next_transition(now))
+
+    def test_to_local_across_transitions(self):
+        for backend in ("pytz", "zoneinfo"):
+            for name in ZONES:
+                service = TimezoneService(name, backend)
+                now = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+                while now.year < 2027:
+                    local = service.to_local(now)
+                    expected = now.astimezone(service.zone)
+                    self.assertEqual(local.replace(tzinfo=None), expected.replace(tzinfo=None), (backend, name, now))
+                    self.assertEqual(local.tzname(), expected.tzname(), (backend, name, now))
+                    now += datetime.timedelta(hours=5, minutes=17)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,41 @@
 import os
 import sys
+import time
 import datetime
-import webbrowser
 import json
-import winreg
+import dataclasses
+from array import array
+from functools import lru_cache
 
-import pytz
 
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QLabel, QPushButton, QMenu, QSystemTrayIcon,
-                               QDialog, QFormLayout, QComboBox, QTableWidget, QTableWidgetItem, 
-                               QHeaderView, QMessageBox, QCheckBox, QGraphicsDropShadowEffect, QGroupBox)
-from PySide6.QtCore import Qt, QTimer, Signal, QPoint, QRect
-from PySide6.QtGui import QIcon, QFont, QAction, QColor, QPainter, QBrush, QPen, QCursor, QPixmap, QLinearGradient
-from PySide6.QtSvg import QSvgRenderer
+                               QDialog, QFormLayout, QComboBox, QTableView, 
+                               QHeaderView, QMessageBox, QCheckBox, QGraphicsDropShadowEffect, QGroupBox,
+                               QLineEdit, QListView, QSpinBox, QFileDialog, QInputDialog)
+from PySide6.QtCore import (Qt, QAbstractListModel, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QEvent, QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher, Signal, QPoint, QRect)
+from PySide6.QtGui import QIcon, QFont, QFontMetrics, QAction, QColor, QPainter, QBrush, QPen, QCursor, QPixmap, QLinearGradient
 
-from core import (APP_NAME, RUN_KEY, SCHEDULE_FILE, DEFAULT_SCHEDULE, Segment,
-                  load_schedule, save_schedule, ScheduleManager, AppSettings, get_network_time)
+from core import (SCHEDULE_FILE, DEFAULT_SCHEDULE, Segment,
+                  TIME_SOURCE_HTTP, TIME_SOURCE_SNTP,
+                  load_schedule, save_schedule, read_schedule_file, schedule_file_digest, ScheduleIndex, ScheduleManager, AppSettings, TimezoneService, measure_time_offset,
+                  load_zone_coordinates, ZoneOffsetIndex, ZoneSearchIndex, all_timezone_names,
+                  is_valid_timezone, format_utc_offset, ZONE_ALIASES,
+                  summarize_samples, METRICS, parse_day_time, format_day_seconds, DIAG_OVERLAP, DIAG_GAP)
+from core.autostart import get_autostart
+from core.reminders import ReminderQueue, default_reminder_rules
+from core.qt_settings import QtSettingsBackend
+
+# 常开的性能统计，托盘隐藏菜单"性能"和 --dump-metrics 读取；热路径直接持有对象引用
+FAST_BUCKETS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100)
+TICK_MS = METRICS.histogram("tick.duration_ms", FAST_BUCKETS_MS)
+TICK_LATE_MS = {source: METRICS.histogram(f"tick.late_{source}_ms") for source in ("second", "transition")}
+PAINT_PANEL_MS = METRICS.histogram("paint.panel_ms", FAST_BUCKETS_MS)
+PAINT_MAP_MS = METRICS.histogram("paint.map_ms", FAST_BUCKETS_MS)
+SYNC_MS = METRICS.histogram("sync.latency_ms")
+SYNC_OK = METRICS.counter("sync.ok")
+SYNC_FAILED = METRICS.counter("sync.failed")
+RELOAD_MS = METRICS.histogram("schedule.reload_ms")
 
 CITY_TZS = [
     ("America/Los_Angeles", 34.05, -118.24),
@@ -71,141 +90,330 @@ COMBOBOX_STYLE = """
     }
 """
 
+@lru_cache(maxsize=1)
+def map_zone_points():
+    major = {tz for tz, _, _ in CITY_TZS}
+    return tuple(CITY_TZS) + tuple(item for item in load_zone_coordinates() if item[0] not in major)
+
+
+@lru_cache(maxsize=1)
+def map_offset_index() -> ZoneOffsetIndex:
+    # 所有 MapWidget 共用一份偏移索引，首次解析非地图城市时才建立
+    return ZoneOffsetIndex([tz for tz, _, _ in map_zone_points()])
+
+
+class SpatialGrid:
+    """均匀网格空间索引，用于在投影后的屏幕坐标上找最近的点。"""
+
+    def __init__(self, points, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        for key, x, y in points:
+            self.cells.setdefault((int(x // cell_size), int(y // cell_size)), []).append((key, x, y))
+
+    def nearest(self, x, y, max_dist2):
+        cell = self.cell_size
+        cx, cy = int(x // cell), int(y // cell)
+        reach = int(max_dist2 ** 0.5 // cell) + 1
+        best, best_dist = None, max_dist2
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for key, px, py in self.cells.get((i, j), ()):
+                    dist = (px - x) ** 2 + (py - y) ** 2
+                    if dist < best_dist:
+                        best, best_dist = key, dist
+        return best
+
+
 class MapWidget(QWidget):
     timezone_selected = Signal(str)
 
-    def __init__(self, current_tz):
+    PICK_DIST2 = 600
+    GRID_CELL = 32
+
+    def __init__(self, current_tz, hover_highlight=True):
         super().__init__()
         self.setFixedSize(760, 380)
         self.current_tz = current_tz
-        self.city_tzs = CITY_TZS
+        self.major_tzs = {tz for tz, _, _ in CITY_TZS}
+        self.city_tzs = map_zone_points()
         self.city_tz_lookup = {tz: (lat, lon) for tz, lat, lon in self.city_tzs}
         self.map_svg_path = os.path.join(os.path.dirname(__file__), "maps", "World_location_map.svg")
+        from PySide6.QtSvg import QSvgRenderer
         self.map_svg_renderer = QSvgRenderer(self.map_svg_path)
         self.display_tz = self._resolve_display_tz(self.current_tz)
+        self.hover_tz = None
+        self._bg_cache = None
+        self._bg_key = None
+        self._selection = None
+        self._projection = None
+        self._projection_key = None
+        self.setMouseTracking(hover_highlight)
         
     def set_timezone(self, tz):
+        old = self._selection_layout()
         self.current_tz = tz
         self.display_tz = self._resolve_display_tz(tz)
-        self.update()
+        self._selection = None
+        new = self._selection_layout()
+        # 底图不变，只重绘新旧选中标记所在的区域
+        if old is not None:
+            self.update(old["rect"])
+        if new is not None:
+            self.update(new["rect"])
 
-    def _utc_offset_minutes(self, tz_name, now_utc):
-        try:
-            local_dt = now_utc.astimezone(pytz.timezone(tz_name))
-            offset = local_dt.utcoffset()
-            if offset is None:
-                return 0
-            return int(offset.total_seconds() // 60)
-        except Exception:
-            return None
+    def invalidate_background(self):
+        self._bg_cache = None
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._selection = None
+
+    def _projected(self):
+        # 每个尺寸只做一次经纬度到屏幕坐标的投影，并建立网格索引
+        key = (self.width(), self.height())
+        if self._projection is None or self._projection_key != key:
+            w, h = key
+            points = [(tz, (lon + 180) / 360 * w, (90 - lat) / 180 * h) for tz, lat, lon in self.city_tzs]
+            self._projection = ({tz: (x, y) for tz, x, y in points}, points, SpatialGrid(points, self.GRID_CELL))
+            self._projection_key = key
+        return self._projection
+
+    def zone_at(self, x, y):
+        return self._projected()[2].nearest(x, y, self.PICK_DIST2)
 
     def _resolve_display_tz(self, tz_name):
         if tz_name in self.city_tz_lookup:
             return tz_name
+        return map_offset_index().resolve(tz_name)
 
-        now_utc = datetime.datetime.now(datetime.timezone.utc)
-        target_offset = self._utc_offset_minutes(tz_name, now_utc)
+    def _background(self) -> QPixmap:
+        dpr = self.devicePixelRatioF()
+        key = (self.width(), self.height(), dpr)
+        if self._bg_cache is None or self._bg_key != key:
+            self._bg_cache = self._render_background(dpr)
+            self._bg_key = key
+        return self._bg_cache
 
-        region = tz_name.split('/')[0] if '/' in tz_name else ""
-        region_candidates = [item for item in self.city_tzs if item[0].startswith(f"{region}/")]
-        candidates = region_candidates if region_candidates else self.city_tzs
-
-        if not candidates:
-            return tz_name
-        if target_offset is None:
-            return candidates[0][0]
-
-        best_tz = candidates[0][0]
-        best_diff = float('inf')
-        for candidate_tz, _, _ in candidates:
-            candidate_offset = self._utc_offset_minutes(candidate_tz, now_utc)
-            if candidate_offset is None:
-                continue
-            diff = abs(candidate_offset - target_offset)
-            if diff < best_diff:
-                best_diff = diff
-                best_tz = candidate_tz
-        return best_tz
+    def _render_background(self, dpr) -> QPixmap:
+        w, h = self.width(), self.height()
+        pixmap = QPixmap(int(w * dpr), int(h * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        rect = QRect(0, 0, w, h)
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
+        painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
         if self.map_svg_renderer.isValid():
-            self.map_svg_renderer.render(painter, self.rect())
-            painter.fillRect(self.rect(), QColor(0, 0, 0, 40))
+            self.map_svg_renderer.render(painter, rect)
+            painter.fillRect(rect, QColor(0, 0, 0, 40))
         else:
-            grad = QLinearGradient(0, 0, 0, self.height())
+            grad = QLinearGradient(0, 0, 0, h)
             grad.setColorAt(0, QColor("#1e272e"))
             grad.setColorAt(1, QColor("#2f3542"))
-            painter.fillRect(self.rect(), grad)
+            painter.fillRect(rect, grad)
             
             painter.setPen(QPen(QColor(255, 255, 255, 15), 1, Qt.PenStyle.DashLine))
             for i in range(1, 6):
-                y = self.height() * i / 6
-                painter.drawLine(0, int(y), self.width(), int(y))
+                y = h * i / 6
+                painter.drawLine(0, int(y), w, int(y))
             for i in range(1, 12):
-                x = self.width() * i / 12
-                painter.drawLine(int(x), 0, int(x), self.height())
-            
+                x = w * i / 12
+                painter.drawLine(int(x), 0, int(x), h)
+
+        # 选中标记会盖住对应的小圆点，所以所有城市点都可以画进底图
+        painter.setBrush(QBrush(QColor("#54a0ff")))
+        painter.setPen(Qt.PenStyle.NoPen)
+        for tz, x, y in self._projected()[1]:
+            radius = 3 if tz in self.major_tzs else 2
+            painter.drawEllipse(QPoint(int(x), int(y)), radius, radius)
+        painter.end()
+        return pixmap
+
+    def _selection_layout(self):
+        if self._selection is None:
+            self._selection = self._marker_layout(self.display_tz, self.current_tz)
+        return self._selection
+
+    def _marker_layout(self, tz, label_tz):
+        pos = self._projected()[0].get(tz)
+        if pos is None:
+            return None
         w, h = self.width(), self.height()
-        
-        for tz, lat, lon in self.city_tzs:
-            x = (lon + 180) / 360 * w
-            y = (90 - lat) / 180 * h
-            
-            is_selected = (tz == self.display_tz)
-            if is_selected:
-                painter.setBrush(QBrush(QColor("#00d2d3")))
-                painter.setPen(QPen(QColor("#ffffff"), 2))
-                painter.drawEllipse(QPoint(int(x), int(y)), 6, 6)
-                
+        x, y = int(pos[0]), int(pos[1])
+
+        font = QFont(self.font())
+        font.setBold(True)
+        fm = QFontMetrics(font)
+        city = label_tz.split('/')[-1].replace('_', ' ')
+
+        text_x = x + 12
+        text_y = y + 4
+        text_w = fm.horizontalAdvance(city)
+        text_h = fm.height()
+
+        if text_x + text_w > w - 6:
+            text_x = x - 12 - text_w
+        text_x = max(6, text_x)
+        text_y = max(text_h, min(h - 4, text_y))
+
+        text_rect = QRect(text_x, text_y - fm.ascent(), text_w, text_h)
+        rect = QRect(x - 15, y - 15, 30, 30).united(text_rect).adjusted(-2, -2, 2, 2)
+        return {"x": x, "y": y, "font": font, "city": city,
+                "text_x": text_x, "text_y": text_y, "rect": rect}
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        self._paint(event)
+        PAINT_MAP_MS.observe((time.perf_counter() - start) * 1000.0)
+
+    def _paint(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._background())
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        if self.hover_tz is not None and self.hover_tz != self.display_tz:
+            hover = self._marker_layout(self.hover_tz, self.hover_tz)
+            if hover is not None and event.rect().intersects(hover["rect"]):
                 painter.setBrush(Qt.BrushStyle.NoBrush)
-                painter.setPen(QPen(QColor(0, 210, 211, 100), 3))
-                painter.drawEllipse(QPoint(int(x), int(y)), 12, 12)
-                
-                painter.setPen(QPen(QColor("#ffffff")))
-                font = painter.font()
-                font.setBold(True)
-                painter.setFont(font)
-                city = self.current_tz.split('/')[-1].replace('_', ' ')
-
-                text_x = int(x) + 12
-                text_y = int(y) + 4
-                fm = painter.fontMetrics()
-                text_w = fm.horizontalAdvance(city)
-                text_h = fm.height()
-
-                if text_x + text_w > w - 6:
-                    text_x = int(x) - 12 - text_w
-                text_x = max(6, text_x)
-                text_y = max(text_h, min(h - 4, text_y))
-
-                painter.drawText(text_x, text_y, city)
-            else:
-                painter.setBrush(QBrush(QColor("#54a0ff")))
-                painter.setPen(Qt.PenStyle.NoPen)
-                painter.drawEllipse(QPoint(int(x), int(y)), 3, 3)
+                painter.setPen(QPen(QColor(255, 255, 255, 160), 2))
+                painter.drawEllipse(QPoint(hover["x"], hover["y"]), 8, 8)
+                painter.setPen(QPen(QColor(255, 255, 255, 200)))
+                painter.setFont(hover["font"])
+                painter.drawText(hover["text_x"], hover["text_y"], hover["city"])
+
+        sel = self._selection_layout()
+        if sel is None or not event.rect().intersects(sel["rect"]):
+            return
+        center = QPoint(sel["x"], sel["y"])
+
+        painter.setBrush(QBrush(QColor("#00d2d3")))
+        painter.setPen(QPen(QColor("#ffffff"), 2))
+        painter.drawEllipse(center, 6, 6)
+
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(QPen(QColor(0, 210, 211, 100), 3))
+        painter.drawEllipse(center, 12, 12)
+
+        painter.setPen(QPen(QColor("#ffffff")))
+        painter.setFont(sel["font"])
+        painter.drawText(sel["text_x"], sel["text_y"], sel["city"])
 
     def mousePressEvent(self, event):
-        w, h = self.width(), self.height()
-        ex, ey = event.pos().x(), event.pos().y()
-        
-        min_dist = float('inf')
-        closest_tz = self.current_tz
-        
-        for tz, lat, lon in self.city_tzs:
-            x = (lon + 180) / 360 * w
-            y = (90 - lat) / 180 * h
-            dist = (x - ex)**2 + (y - ey)**2
-            if dist < min_dist:
-                min_dist = dist
-                closest_tz = tz
-                
-        if min_dist < 600:
+        closest_tz = self.zone_at(event.pos().x(), event.pos().y())
+        if closest_tz is not None:
             self.set_timezone(closest_tz)
             self.timezone_selected.emit(closest_tz)
 
+    def _set_hover(self, tz):
+        if tz == self.hover_tz:
+            return
+        for old_or_new in (self.hover_tz, tz):
+            if old_or_new is not None:
+                layout = self._marker_layout(old_or_new, old_or_new)
+                if layout is not None:
+                    self.update(layout["rect"])
+        self.hover_tz = tz
+
+    def mouseMoveEvent(self, event):
+        self._set_hover(self.zone_at(event.pos().x(), event.pos().y()))
+
+    def leaveEvent(self, event):
+        self._set_hover(None)
+        super().leaveEvent(event)
+
+class TimezoneListModel(QAbstractListModel):
+    def __init__(self, zones, parent=None):
+        super().__init__(parent)
+        self.zones = zones
+        self.rows = {name: row for row, name in enumerate(zones)}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.zones)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.zones[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            offset = map_offset_index().offset_of(name)
+            parts = list(ZONE_ALIASES.get(name, ()))
+            if offset is not None:
+                parts.append(format_utc_offset(offset))
+            return " ".join(parts) or None
+        return None
+
+
+class TimezoneRankModel(QAbstractListModel):
+    """按 ZoneSearchIndex.search 的结果和名次（前缀匹配在前）排列共享时区模型中的行。
+
+    search 已经算好了要显示哪些行以及顺序，这里直接换一份行号列表再重置模型，
+    不再为每一行回调 filterAcceptsRow / lessThan。
+    """
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self._rows = None
+        self._positions = None
+
+    def set_rows(self, rows):
+        # rows 为 None 时不过滤，按源模型的字母顺序显示全部
+        self.beginResetModel()
+        self._rows = None if rows is None else list(rows)
+        self._positions = None if rows is None else {row: i for i, row in enumerate(self._rows)}
+        self.endResetModel()
+
+    def row_of(self, tz) -> int:
+        row = self.source.rows.get(tz)
+        if row is None:
+            return -1
+        return row if self._positions is None else self._positions.get(row, -1)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.source.zones) if self._rows is None else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row() if self._rows is None else self._rows[index.row()]
+        return self.source.data(self.source.index(row, 0), role)
+
+
+class TimezoneFilterProxy(QSortFilterProxyModel):
+    """下拉框实际使用的模型：本身不过滤也不排序，只在 C++ 里缓存 TimezoneRankModel 的行映射。
+
+    QListView 布局时会逐行调用 index()，直接挂 Python 模型的话每次打开对话框都要回调上千次。
+    """
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.ranked = TimezoneRankModel(source, self)
+        self.setSourceModel(self.ranked)
+
+    def set_rows(self, rows):
+        self.ranked.set_rows(rows)
+
+    def row_of(self, tz) -> int:
+        return self.ranked.row_of(tz)
+
+
+@lru_cache(maxsize=1)
+def shared_timezone_model() -> TimezoneListModel:
+    # 所有对话框共用同一个模型，只在第一次打开时建立
+    return TimezoneListModel(all_timezone_names())
+
+
+@lru_cache(maxsize=1)
+def zone_search_index() -> ZoneSearchIndex:
+    return ZoneSearchIndex(all_timezone_names(), map_offset_index().offsets)
+
+
 class TimezoneMapDialog(QDialog):
     def __init__(self, current_tz, parent=None):
         super().__init__(parent)
@@ -237,14 +445,27 @@ class TimezoneMapDialog(QDialog):
         layout.addWidget(map_container)
         layout.addSpacing(10)
 
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("输入筛选：时区、城市、中文名或偏移，如 上海 / Tokyo / UTC+8")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.on_filter_changed)
+        layout.addWidget(self.filter_edit)
+
         bottom_layout = QHBoxLayout()
         self.tz_combo = QComboBox()
-        self.tz_combo.addItems(pytz.all_timezones)
+        # 统一行高并按固定字符数估算宽度，避免为了 sizeHint 遍历全部 ~600 个条目
+        view = QListView()
+        view.setUniformItemSizes(True)
+        self.tz_combo.setView(view)
+        self.tz_model = TimezoneFilterProxy(shared_timezone_model(), self)
+        self.tz_combo.setModel(self.tz_model)
+        self.tz_combo.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToMinimumContentsLengthWithIcon)
+        self.tz_combo.setMinimumContentsLength(28)
         self.tz_combo.setStyleSheet(COMBOBOX_STYLE)
-        if self.selected_tz in pytz.all_timezones:
-            self.tz_combo.setCurrentText(self.selected_tz)
+        if is_valid_timezone(self.selected_tz):
+            self.tz_combo.setCurrentIndex(self._combo_row(self.selected_tz))
         self.tz_combo.currentTextChanged.connect(self.on_combo_changed)
-        self.map_widget.timezone_selected.connect(self.tz_combo.setCurrentText)
+        self.map_widget.timezone_selected.connect(self.select_timezone)
 
         bottom_layout.addWidget(QLabel("选择时区:"))
         bottom_layout.addWidget(self.tz_combo, 1)
@@ -265,27 +486,259 @@ class TimezoneMapDialog(QDialog):
         layout.addLayout(bottom_layout)
         
     def on_combo_changed(self, tz):
+        if not tz:
+            return
         self.selected_tz = tz
         self.map_widget.set_timezone(tz)
 
+    def _combo_row(self, tz):
+        return self.tz_model.row_of(tz)
+
+    def on_filter_changed(self, text):
+        # 过滤、排序时 QComboBox 会自己挪动当前项，期间屏蔽信号，结束后再决定选哪一项：
+        # 已选时区还在就保留，被筛掉了就选名次最靠前的匹配
+        self.tz_combo.blockSignals(True)
+        try:
+            self.tz_model.set_rows(zone_search_index().search(text))
+            row = self._combo_row(self.selected_tz)
+            if row < 0 and self.tz_combo.count() > 0:
+                row = 0
+            self.tz_combo.setCurrentIndex(row)
+        finally:
+            self.tz_combo.blockSignals(False)
+        self.on_combo_changed(self.tz_combo.currentText())
+
+    def select_timezone(self, tz):
+        if self._combo_row(tz) < 0:
+            self.filter_edit.clear()
+        self.tz_combo.setCurrentIndex(self._combo_row(tz))
+
     def get_timezone(self):
-        return self.tz_combo.currentText()
+        return self.selected_tz
+
+class ScheduleTableModel(QAbstractTableModel):
+    """课表编辑器的数据模型：每列一个 list，起止时间另存一份解析好的日内秒数（格式错误为 -1）。
+
+    改一个单元格只重新解析这一格；整表的重叠/空档检查由对话框去抖后调用 set_notes 写回。
+    edited 只在用户数据变化时发出，set_notes 引起的刷新不会触发它。
+    """
+    edited = Signal()
+
+    KEYS = ("start", "end", "state", "course_name", "next_hint")
+    HEADERS = ("开始时间", "结束时间", "状态", "课程名", "下阶段提示")
+    SORT_ROLE = Qt.ItemDataRole.UserRole
+    ERROR_COLOR = QColor("#ffd6d6")
+    WARNING_COLOR = QColor("#fff3c4")
+    EMPTY_ROW = {"start": "00:00", "end": "00:00", "state": "", "course_name": "", "next_hint": ""}
 
-class ScheduleEditorDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.columns = [[] for _ in self.KEYS]
+        self.seconds = [array('i'), array('i')]
+        self.notes = {}
+
+    @staticmethod
+    def _columns_of(data):
+        # 状态和提示大量重复，intern 后各行共享同一个字符串对象
+        return [
+            [item['start'] for item in data],
+            [item['end'] for item in data],
+            [sys.intern(item['state']) for item in data],
+            [item.get('course_name', '') for item in data],
+            [sys.intern(item.get('next_hint', '')) for item in data],
+        ]
+
+    def load(self, data):
+        self.beginResetModel()
+        self.columns = self._columns_of(data)
+        self.seconds = [array('i', map(parse_day_time, self.columns[0])),
+                        array('i', map(parse_day_time, self.columns[1]))]
+        self.notes = {}
+        self.endResetModel()
+        self.edited.emit()
+
+    def append_rows(self, data) -> int:
+        row = len(self.columns[0])
+        if not data:
+            return row
+        self.beginInsertRows(QModelIndex(), row, row + len(data) - 1)
+        for column, values in zip(self.columns, self._columns_of(data)):
+            column.extend(values)
+        self.seconds[0].extend(map(parse_day_time, self.columns[0][row:]))
+        self.seconds[1].extend(map(parse_day_time, self.columns[1][row:]))
+        self.endInsertRows()
+        self.edited.emit()
+        return row
+
+    def remove_rows(self, rows):
+        """删除若干行；连续的行合并成一次 beginRemoveRows。"""
+        rows = sorted(set(rows), reverse=True)
+        if not rows:
+            return
+        runs = []
+        for row in rows:
+            if runs and runs[-1][0] == row + 1:
+                runs[-1][0] = row
+            else:
+                runs.append([row, row])
+        for first, last in runs:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for column in self.columns + self.seconds:
+                del column[first:last + 1]
+            self.endRemoveRows()
+        # 行号变了，旧的提示作废，等下一次检查
+        self.notes = {}
+        self.edited.emit()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.KEYS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.columns[col][row]
+        if role == self.SORT_ROLE:
+            return self.seconds[col][row] if col < 2 else self.columns[col][row]
+        bad_time = col < 2 and self.seconds[col][row] < 0
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if bad_time:
+                return QBrush(self.ERROR_COLOR)
+            note = self.notes.get(row)
+            if note is not None:
+                return QBrush(self.ERROR_COLOR if note[0] else self.WARNING_COLOR)
+            return None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if bad_time:
+                return "时间格式错误，应为 HH:MM"
+            note = self.notes.get(row)
+            return note[1] if note is not None else None
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        row, col = index.row(), index.column()
+        value = str(value)
+        if self.columns[col][row] == value:
+            return False
+        self.columns[col][row] = value
+        if col < 2:
+            self.seconds[col][row] = parse_day_time(value)
+        self.dataChanged.emit(index, index)
+        self.edited.emit()
+        return True
+
+    def row_data(self, row: int) -> dict:
+        return {key: column[row] for key, column in zip(self.KEYS, self.columns)}
+
+    def to_list(self) -> list:
+        """按模型中的行序直接序列化，供 save_schedule 使用。"""
+        return [dict(zip(self.KEYS, values)) for values in zip(*self.columns)]
+
+    def invalid_rows(self) -> list:
+        starts, ends = self.seconds
+        return [row for row in range(len(starts)) if starts[row] < 0 or ends[row] < 0]
+
+    def segments(self):
+        """时间合法的行及其 Segment，直接由解析好的秒数构造，不再逐行 strptime。"""
+        rows, segments = [], []
+        starts, ends = self.seconds
+        for row, (start, end, state, course, hint) in enumerate(zip(starts, ends, *self.columns[2:])):
+            if start < 0 or end < 0:
+                continue
+            rows.append(row)
+            segments.append(Segment(datetime.time(start // 3600, start // 60 % 60),
+                                    datetime.time(end // 3600, end // 60 % 60), state, course, hint))
+        return rows, segments
+
+    def set_notes(self, notes: dict):
+        """notes: {行号: (是否为错误, 提示文字)}。只刷新提示发生变化的行所在的范围。"""
+        changed = {row for row in self.notes.keys() | notes.keys() if self.notes.get(row) != notes.get(row)}
+        self.notes = notes
+        if changed:
+            self.dataChanged.emit(self.index(min(changed), 0), self.index(max(changed), len(self.KEYS) - 1),
+                                  [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole])
+
+
+class ScheduleFilterProxy(QSortFilterProxyModel):
+    """按状态或课程名筛选（包含即可，不区分大小写），时间列按秒数排序。"""
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.setSortRole(ScheduleTableModel.SORT_ROLE)
+        self._needle = ""
+
+    def set_filter_text(self, text: str):
+        self._needle = text.strip().casefold()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._needle:
+            return True
+        model = self.sourceModel()
+        return (self._needle in model.columns[2][source_row].casefold()
+                or self._needle in model.columns[3][source_row].casefold())
+
+
+class ScheduleEditorDialog(QDialog):
+    VALIDATE_DELAY_MS = 150
+    MAX_LISTED_ROWS = 5
+
+    def __init__(self, parent=None, tz_name=None):
+        super().__init__(parent)
+        self.tz_name = tz_name
         self.setWindowTitle("课表编辑")
         self.setMinimumSize(600, 400)
+        self.validate_timer = QTimer(self)
+        self.validate_timer.setSingleShot(True)
+        self.validate_timer.setInterval(self.VALIDATE_DELAY_MS)
+        self.validate_timer.timeout.connect(self.validate)
+        self.model = ScheduleTableModel(self)
+        self.model.edited.connect(self.validate_timer.start)
+        self.proxy = ScheduleFilterProxy(self.model, self)
         self.setup_ui()
         self.load_data()
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("按状态或课程名筛选")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.proxy.set_filter_text)
+        layout.addWidget(self.filter_edit)
         
-        self.table = QTableWidget(0, 5)
-        self.table.setHorizontalHeaderLabels(["开始时间", "结束时间", "状态", "课程名", "下阶段提示"])
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # 默认按文件中的顺序显示（重叠时靠前的行优先），点表头才排序
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
         layout.addWidget(self.table)
+
+        self.issue_label = QLabel()
+        self.issue_label.setWordWrap(True)
+        self.issue_label.setStyleSheet("color: #d63031;")
+        self.issue_label.hide()
+        layout.addWidget(self.issue_label)
         
         btn_layout = QHBoxLayout()
         add_btn = QPushButton("添加行")
@@ -294,6 +747,10 @@ class ScheduleEditorDialog(QDialog):
         del_btn.clicked.connect(self.delete_row)
         reset_btn = QPushButton("恢复默认")
         reset_btn.clicked.connect(self.reset_default)
+        import_btn = QPushButton("导入...")
+        import_btn.clicked.connect(self.import_file)
+        export_btn = QPushButton("导出...")
+        export_btn.clicked.connect(self.export_file)
         
         save_btn = QPushButton("保存")
         save_btn.clicked.connect(self.save_data)
@@ -303,6 +760,8 @@ class ScheduleEditorDialog(QDialog):
         btn_layout.addWidget(add_btn)
         btn_layout.addWidget(del_btn)
         btn_layout.addWidget(reset_btn)
+        btn_layout.addWidget(import_btn)
+        btn_layout.addWidget(export_btn)
         btn_layout.addStretch()
         btn_layout.addWidget(save_btn)
         btn_layout.addWidget(cancel_btn)
@@ -315,54 +774,121 @@ class ScheduleEditorDialog(QDialog):
                 data = json.load(f)
         except:
             data = DEFAULT_SCHEDULE
-            
-        self.table.setRowCount(0)
-        for row, item in enumerate(data):
-            self.add_row(item)
+        self.model.load(data)
 
     def add_row(self, item=None):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        if item is None:
-            item = {"start": "00:00", "end": "00:00", "state": "", "course_name": "", "next_hint": ""}
-            
-        self.table.setItem(row, 0, QTableWidgetItem(item['start']))
-        self.table.setItem(row, 1, QTableWidgetItem(item['end']))
-        self.table.setItem(row, 2, QTableWidgetItem(item['state']))
-        self.table.setItem(row, 3, QTableWidgetItem(item.get('course_name', '')))
-        self.table.setItem(row, 4, QTableWidgetItem(item.get('next_hint', '')))
+        row = self.model.append_rows([item or ScheduleTableModel.EMPTY_ROW])
+        # 新行可能被筛选条件隐藏，先清空筛选
+        if self.filter_edit.text():
+            self.filter_edit.clear()
+        index = self.proxy.mapFromSource(self.model.index(row, 0))
+        self.table.scrollTo(index)
+        self.table.setCurrentIndex(index)
 
     def delete_row(self):
-        rows = sorted(set(item.row() for item in self.table.selectedItems()), reverse=True)
-        for row in rows:
-            self.table.removeRow(row)
+        rows = {self.proxy.mapToSource(index).row() for index in self.table.selectionModel().selectedIndexes()}
+        self.model.remove_rows(rows)
 
     def reset_default(self):
         reply = QMessageBox.question(self, "确认", "确定要恢复默认课表吗？", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.table.setRowCount(0)
-            for item in DEFAULT_SCHEDULE:
-                self.add_row(item)
+            self.model.load(DEFAULT_SCHEDULE)
 
-    def save_data(self):
-        data = []
-        for row in range(self.table.rowCount()):
-            item = {
-                "start": self.table.item(row, 0).text() if self.table.item(row, 0) else "00:00",
-                "end": self.table.item(row, 1).text() if self.table.item(row, 1) else "00:00",
-                "state": self.table.item(row, 2).text() if self.table.item(row, 2) else "",
-                "course_name": self.table.item(row, 3).text() if self.table.item(row, 3) else "",
-                "next_hint": self.table.item(row, 4).text() if self.table.item(row, 4) else ""
-            }
+    def import_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "导入课表", "", "日历或表格 (*.ics *.csv);;所有文件 (*)")
+        if not path:
+            return
+        from core.interchange import import_schedule, segment_to_dict
+        day = None
+        if path.lower().endswith(".ics"):
+            # 日历里的事件带日期，课表按天循环，只取其中一天
+            text, ok = QInputDialog.getText(self, "导入日历", "导入哪一天的课程（YYYY-MM-DD）：",
+                                            text=datetime.date.today().isoformat())
+            if not ok:
+                return
             try:
-                datetime.datetime.strptime(item["start"], "%H:%M")
-                datetime.datetime.strptime(item["end"], "%H:%M")
+                day = datetime.date.fromisoformat(text.strip())
             except ValueError:
-                QMessageBox.warning(self, "格式错误", f"第 {row+1} 行的时间格式错误，应为 HH:MM")
+                QMessageBox.warning(self, "格式错误", "日期格式应为 YYYY-MM-DD")
+                return
+        segments = import_schedule(path, day, self.tz_name)
+        if not segments:
+            QMessageBox.warning(self, "导入失败", "没有从文件中读到任何时间段")
+            return
+        self.filter_edit.clear()
+        self.model.load([segment_to_dict(seg) for seg in segments])
+
+    def export_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出课表", "schedule.csv", "表格 (*.csv);;日历 (*.ics)")
+        if not path:
+            return
+        from core.interchange import export_schedule
+        _, segments = self.model.segments()
+        if not export_schedule(segments, path, tz_name=self.tz_name):
+            QMessageBox.warning(self, "导出失败", f"无法写入 {path}")
+
+    def validate(self) -> list:
+        """用运行时同一个 ScheduleIndex 编译课表，标出有问题的行，返回问题描述列表。"""
+        self.validate_timer.stop()
+        messages = []
+        # 行号 -> [是否有错误, 提示文字列表]；每行的提示最多保留 MAX_LISTED_ROWS 条
+        notes = {}
+
+        def note(row, error, message):
+            entry = notes.get(row)
+            if entry is None:
+                notes[row] = [error, [message]]
+                return
+            entry[0] = entry[0] or error
+            if len(entry[1]) < self.MAX_LISTED_ROWS:
+                entry[1].append(message)
+
+        for row in self.model.invalid_rows():
+            message = f"第 {row + 1} 行的时间格式错误，应为 HH:MM"
+            messages.append(message)
+            note(row, True, message)
+
+        rows, segments = self.model.segments()
+        for diag in ScheduleIndex(segments).diagnostics:
+            table_rows = [rows[idx] for idx in diag.rows]
+            # 生成的学期课表可能有成千上万行互相重叠，只列出前几行
+            numbers = "、".join(str(row + 1) for row in table_rows[:self.MAX_LISTED_ROWS])
+            if len(table_rows) > self.MAX_LISTED_ROWS:
+                numbers += f" 等 {len(table_rows)}"
+            span = f"{format_day_seconds(diag.start)}–{format_day_seconds(diag.end)}"
+            if diag.kind == DIAG_OVERLAP:
+                message = f"第 {numbers} 行在 {span} 重叠，将按靠前的行显示"
+            elif diag.kind == DIAG_GAP:
+                message = f"{span} 没有安排任何时间段，将显示为“未知”" + (f"（相邻第 {numbers} 行）" if numbers else "")
+            else:
+                message = f"第 {numbers} 行开始和结束时间相同，不会生效"
+            messages.append(message)
+            for row in table_rows:
+                note(row, diag.kind == DIAG_OVERLAP, message)
+
+        self.model.set_notes({row: (error, "\n".join(texts)) for row, (error, texts) in notes.items()})
+
+        messages = list(dict.fromkeys(messages))
+        self.issue_label.setText("\n".join(messages[:5]) + (f"\n……共 {len(messages)} 个问题" if len(messages) > 5 else ""))
+        self.issue_label.setVisible(bool(messages))
+        return messages
+
+    def save_data(self):
+        invalid = self.model.invalid_rows()
+        if invalid:
+            self.validate()
+            QMessageBox.warning(self, "格式错误", f"第 {invalid[0] + 1} 行的时间格式错误，应为 HH:MM")
+            return
+
+        messages = self.validate()
+        if messages:
+            text = "\n".join(messages[:10]) + ("\n……" if len(messages) > 10 else "")
+            reply = QMessageBox.question(self, "课表检查", f"课表存在以下问题：\n{text}\n\n仍要保存吗？",
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
                 return
-            data.append(item)
             
-        save_schedule(data)
+        save_schedule(self.model.to_list())
         self.accept()
 
 class SettingsDialog(QDialog):
@@ -372,6 +898,7 @@ class SettingsDialog(QDialog):
     def __init__(self, app_settings: AppSettings, parent=None):
         super().__init__(parent)
         self.app_settings = app_settings
+        self.autostart = get_autostart()
         self.setWindowTitle("设置 - 时间管理大师")
         self.setMinimumWidth(500)
         self.setMinimumHeight(400)
@@ -439,6 +966,16 @@ class SettingsDialog(QDialog):
         
         self.sync_time_cb = QCheckBox("启用世界时间校准")
         general_layout.addRow("", self.sync_time_cb)
+
+        self.time_source_combo = QComboBox()
+        self.time_source_combo.setStyleSheet(COMBOBOX_STYLE)
+        self.time_source_combo.addItem("HTTP (百度)", TIME_SOURCE_HTTP)
+        self.time_source_combo.addItem("SNTP (毫秒级)", TIME_SOURCE_SNTP)
+        general_layout.addRow("校准方式:", self.time_source_combo)
+
+        self.sntp_servers_edit = QLineEdit()
+        self.sntp_servers_edit.setPlaceholderText("多个服务器用逗号分隔")
+        general_layout.addRow("SNTP 服务器:", self.sntp_servers_edit)
         
         self.startup_cb = QCheckBox("开机自启动")
         general_layout.addRow("", self.startup_cb)
@@ -453,6 +990,18 @@ class SettingsDialog(QDialog):
         self.edit_schedule_btn.setObjectName("ActionBtn")
         self.edit_schedule_btn.clicked.connect(self.open_schedule_editor)
         schedule_layout.addWidget(self.edit_schedule_btn)
+
+        reminder_layout = QHBoxLayout()
+        self.reminders_cb = QCheckBox("托盘提醒上下课")
+        self.reminder_lead_spin = QSpinBox()
+        self.reminder_lead_spin.setRange(0, 30)
+        self.reminder_lead_spin.setPrefix("下课前 ")
+        self.reminder_lead_spin.setSuffix(" 分钟")
+        self.reminders_cb.toggled.connect(self.reminder_lead_spin.setEnabled)
+        reminder_layout.addWidget(self.reminders_cb)
+        reminder_layout.addStretch()
+        reminder_layout.addWidget(self.reminder_lead_spin)
+        schedule_layout.addLayout(reminder_layout)
         
         main_layout.addWidget(schedule_group)
         
@@ -481,37 +1030,39 @@ class SettingsDialog(QDialog):
         self.current_tz = self.app_settings.timezone
         self.tz_btn.setText(f"当前: {self.current_tz}")
         self.sync_time_cb.setChecked(self.app_settings.sync_world_time)
+        source_idx = self.time_source_combo.findData(self.app_settings.time_source)
+        self.time_source_combo.setCurrentIndex(max(0, source_idx))
+        self.sntp_servers_edit.setText(", ".join(self.app_settings.sntp_servers))
+        self.reminders_cb.setChecked(self.app_settings.reminders_enabled)
+        self.reminder_lead_spin.setValue(self.app_settings.reminder_lead_minutes)
+        self.reminder_lead_spin.setEnabled(self.app_settings.reminders_enabled)
+        self.startup_cb.setEnabled(self.autostart.supported)
         self.startup_cb.setChecked(self.check_startup())
 
     def check_startup(self) -> bool:
-        try:
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, RUN_KEY, 0, winreg.KEY_READ) as key:
-                val, _ = winreg.QueryValueEx(key, APP_NAME)
-                return True
-        except FileNotFoundError:
-            return False
+        return self.autostart.is_enabled()
             
     def set_startup(self, enable: bool):
+        if not self.autostart.supported:
+            return
         exe_path = os.path.abspath(sys.argv[0])
         try:
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, RUN_KEY, 0, winreg.KEY_ALL_ACCESS) as key:
-                if enable:
-                    winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, exe_path)
-                else:
-                    try:
-                        winreg.DeleteValue(key, APP_NAME)
-                    except FileNotFoundError:
-                        pass
+            self.autostart.set_enabled(enable, exe_path)
         except Exception as e:
             QMessageBox.warning(self, "错误", f"设置开机自启失败: {e}")
 
     def save_settings(self):
-        self.app_settings.time_format_24h = (self.time_format_combo.currentIndex() == 0)
-        if self.current_tz not in pytz.all_timezones:
+        if not is_valid_timezone(self.current_tz):
             QMessageBox.warning(self, "无效时区", f"{self.current_tz} 不是有效的时区格式。")
             return
-        self.app_settings.timezone = self.current_tz
-        self.app_settings.sync_world_time = self.sync_time_cb.isChecked()
+        with self.app_settings.batch():
+            self.app_settings.time_format_24h = (self.time_format_combo.currentIndex() == 0)
+            self.app_settings.timezone = self.current_tz
+            self.app_settings.sync_world_time = self.sync_time_cb.isChecked()
+            self.app_settings.time_source = self.time_source_combo.currentData()
+            self.app_settings.sntp_servers = [srv.strip() for srv in self.sntp_servers_edit.text().split(",") if srv.strip()]
+            self.app_settings.reminders_enabled = self.reminders_cb.isChecked()
+            self.app_settings.reminder_lead_minutes = self.reminder_lead_spin.value()
         
         self.set_startup(self.startup_cb.isChecked())
         
@@ -519,33 +1070,628 @@ class SettingsDialog(QDialog):
         self.accept()
 
     def open_schedule_editor(self):
-        editor = ScheduleEditorDialog(self)
+        editor = ScheduleEditorDialog(self, self.app_settings.timezone)
         if editor.exec() == QDialog.DialogCode.Accepted:
             self.schedule_changed.emit()
 
 
+class ReminderService(QObject):
+    """持有提醒堆，只为最早到期的一条提醒设一个精确定时器；到点通过 reminder 信号发出提醒文字。"""
+    reminder = Signal(str)
+
+    # 长时间等待时分段，期间网络校时改变了偏移也能及时修正
+    MAX_WAIT_MS = 60 * 60 * 1000
+
+    def __init__(self, clock, parent=None):
+        super().__init__(parent)
+        self.clock = clock
+        self.queue = ReminderQueue([])
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._on_timeout)
+
+    def now_utc(self) -> datetime.datetime:
+        return self.clock().astimezone(datetime.timezone.utc)
+
+    def rebuild(self, manager: ScheduleManager, tz_service: TimezoneService, rules=None):
+        self.queue.reset(manager, tz_service, self.now_utc(), rules)
+        self.arm()
+
+    def arm(self):
+        due = self.queue.next_due()
+        if due is None:
+            self.timer.stop()
+            return
+        ms = max(0, int((due - self.now_utc()).total_seconds() * 1000) + 1)
+        self.timer.start(min(ms, self.MAX_WAIT_MS))
+
+    def _on_timeout(self):
+        for reminder in self.queue.pop_due(self.now_utc()):
+            self.reminder.emit(reminder.text(self.queue.tz_service))
+        self.arm()
+
+
+class TickScheduler(QObject):
+    """按墙上时钟整秒对齐的单次定时器，另为下一个课表切换点单独挂一个精确定时器。
+
+    两个定时器在 COALESCE_MS 内先后到期时只发出一次 tick。低功耗模式（窗口隐藏或最小化）下
+    整秒定时器改为整分钟对齐，切换点定时器不变。每种模式下的唤醒次数分别计数。
+    """
+    tick = Signal()
+
+    COALESCE_MS = 20
+    MODES = ("foreground", "background")
+
+    def __init__(self, clock, next_transition, parent=None):
+        super().__init__(parent)
+        self.clock = clock
+        self.next_transition = next_transition
+        self.second_timer = self._make_timer(self._on_second)
+        self.transition_timer = self._make_timer(self._on_transition)
+        self._due = {"second": None, "transition": None}
+        self.samples = None
+        self.low_power = False
+        self.wakeups = dict.fromkeys(self.MODES, 0)
+        self.mode_seconds = dict.fromkeys(self.MODES, 0.0)
+        self._mode_since = time.monotonic()
+
+    def _make_timer(self, slot):
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.TimerType.PreciseTimer)
+        timer.timeout.connect(slot)
+        return timer
+
+    def start(self):
+        self._arm_second()
+        self._arm_transition()
+
+    def stop(self):
+        self.second_timer.stop()
+        self.transition_timer.stop()
+
+    def reschedule(self):
+        self.transition_timer.stop()
+        self._arm_transition()
+
+    def _arm(self, source, timer, delay_ms):
+        self._due[source] = time.monotonic() + delay_ms / 1000.0
+        timer.start(delay_ms)
+
+    def _arm_second(self):
+        now = self.clock()
+        # 多等 1ms，避免定时器略早触发时仍显示上一秒
+        delay_ms = (1_000_000 - now.microsecond) // 1000 + 1
+        if self.low_power:
+            delay_ms += (59 - now.second) * 1000
+        self._arm("second", self.second_timer, delay_ms)
+
+    @property
+    def mode(self) -> str:
+        return self.MODES[self.low_power]
+
+    def set_low_power(self, enabled: bool):
+        if enabled == self.low_power:
+            return
+        now = time.monotonic()
+        self.mode_seconds[self.mode] += now - self._mode_since
+        self._mode_since = now
+        self.low_power = enabled
+        if self.second_timer.isActive():
+            self.second_timer.stop()
+            self._arm_second()
+
+    def wakeups_per_hour(self) -> dict:
+        rates = {}
+        for mode in self.MODES:
+            seconds = self.mode_seconds[mode]
+            if mode == self.mode:
+                seconds += time.monotonic() - self._mode_since
+            rates[mode] = round(self.wakeups[mode] * 3600.0 / seconds, 1) if seconds > 0 else 0.0
+        return rates
+
+    def _arm_transition(self):
+        now = self.clock()
+        delta = self.next_transition(now) - now
+        delay_ms = int(delta.total_seconds() * 1000) + 1
+        if delay_ms > 0:
+            self._arm("transition", self.transition_timer, delay_ms)
+
+    def _on_second(self):
+        self._record("second")
+        if self.transition_timer.isActive() and self.transition_timer.remainingTime() <= self.COALESCE_MS:
+            self.transition_timer.stop()
+            self._record("transition")
+            self._wake(rearm_transition=True)
+        else:
+            self._wake(rearm_transition=False)
+
+    def _on_transition(self):
+        self._record("transition")
+        if self.second_timer.isActive() and self.second_timer.remainingTime() <= self.COALESCE_MS:
+            self.second_timer.stop()
+            self._record("second")
+        self._wake(rearm_transition=True)
+
+    def _wake(self, rearm_transition):
+        self.wakeups[self.mode] += 1
+        self.tick.emit()
+        if not self.second_timer.isActive():
+            self._arm_second()
+        if rearm_transition:
+            self._arm_transition()
+
+    def enable_measurement(self):
+        self.samples = {"second": [], "transition": []}
+
+    def _record(self, source):
+        due = self._due[source]
+        self._due[source] = None
+        if due is None:
+            return
+        late_ms = (time.monotonic() - due) * 1000.0
+        TICK_LATE_MS[source].observe(late_ms)
+        if self.samples is not None:
+            self.samples[source].append(late_ms)
+
+    def lateness_report(self) -> dict:
+        if self.samples is None:
+            return {}
+        return {source: summarize_samples(values) for source, values in self.samples.items()}
+
+
+class _TimeSyncSignals(QObject):
+    finished = Signal(object)
+
+
+class _TimeSyncJob(QRunnable):
+    def __init__(self, signals, source, servers, url=None):
+        super().__init__()
+        self.signals = signals
+        self.source = source
+        self.servers = servers
+        self.url = url
+
+    def run(self):
+        try:
+            offset = measure_time_offset(self.source, self.servers, self.url)
+        except Exception as e:
+            print(f"Sync time error: {e}")
+            offset = None
+        self.signals.finished.emit(offset)
+
+
+class TimeSyncService(QObject):
+    """在线程池里测量网络时间偏移，结果通过信号回到 GUI 线程。
+
+    成功后每 RESYNC_INTERVAL_MS 重新校准一次，失败则从 RETRY_MIN_MS 开始指数退避。
+    """
+    synced = Signal(object)
+    failed = Signal()
+
+    RESYNC_INTERVAL_MS = 60 * 60 * 1000
+    RETRY_MIN_MS = 30 * 1000
+    RETRY_MAX_MS = 30 * 60 * 1000
+
+    def __init__(self, app_settings: AppSettings, parent=None, url=None):
+        super().__init__(parent)
+        self.app_settings = app_settings
+        # HTTP 校时地址，None 表示用 core.constants.TIME_SYNC_URL
+        self.url = url
+        self.pool = QThreadPool.globalInstance()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.sync_now)
+        self._signals = _TimeSyncSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._retry_ms = self.RETRY_MIN_MS
+        self._running = False
+        self._busy = False
+        self._started_at = None
+
+    def start(self):
+        self._running = True
+        self._retry_ms = self.RETRY_MIN_MS
+        self.timer.stop()
+        self.sync_now()
+
+    def stop(self):
+        self._running = False
+        self.timer.stop()
+
+    def sync_now(self):
+        if self._busy:
+            return
+        self._busy = True
+        self._started_at = time.perf_counter()
+        self.pool.start(_TimeSyncJob(self._signals, self.app_settings.time_source, self.app_settings.sntp_servers,
+                                     self.url))
+
+    def _on_finished(self, offset):
+        self._busy = False
+        SYNC_MS.observe((time.perf_counter() - self._started_at) * 1000.0)
+        (SYNC_FAILED if offset is None else SYNC_OK).inc()
+        if not self._running:
+            return
+        if offset is None:
+            self.failed.emit()
+            self.timer.start(self._retry_ms)
+            self._retry_ms = min(self._retry_ms * 2, self.RETRY_MAX_MS)
+        else:
+            self._retry_ms = self.RETRY_MIN_MS
+            self.synced.emit(offset)
+            self.timer.start(self.RESYNC_INTERVAL_MS)
+
+
+class _ScheduleLoadSignals(QObject):
+    finished = Signal(object)
+
+
+class _ScheduleLoadJob(QRunnable):
+    def __init__(self, signals, path, stamp, dense_table):
+        super().__init__()
+        self.signals = signals
+        self.path = path
+        self.stamp = stamp
+        self.dense_table = dense_table
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            digest, segments = read_schedule_file(self.path)
+            index = ScheduleIndex(segments, dense=self.dense_table)
+        except Exception as e:
+            # 文件可能正被非原子地写入，留着旧课表，等下一次变更通知
+            print(f"Reload schedule error: {e}")
+            digest, segments, index = None, None, None
+        self.signals.finished.emit((self.stamp, digest, segments, index, (time.perf_counter() - start) * 1000.0))
+
+
+class ScheduleWatcher(QObject):
+    """监视课表文件，内容真的变了才在后台重新解析，解析结果通过 schedule_loaded 交回 GUI 线程。
+
+    文件事件先按 DEBOUNCE_MS 合并，再比较 (mtime, size)，最后比较 sha1。
+    """
+    schedule_loaded = Signal(object, object)
+
+    DEBOUNCE_MS = 300
+
+    def __init__(self, path: str, dense_table: bool = False, parent=None):
+        super().__init__(parent)
+        self.path = os.path.abspath(path)
+        self.dense_table = dense_table
+        self.pool = QThreadPool.globalInstance()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_fs_event)
+        self.watcher.directoryChanged.connect(self._on_fs_event)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.check)
+        self._signals = _ScheduleLoadSignals(self)
+        self._signals.finished.connect(self._on_loaded)
+        self._stamp = None
+        self._digest = None
+        self._busy = False
+        self._dirty = False
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _watch_file(self):
+        # os.replace 换掉文件后旧的监视会失效，需要重新加上
+        if os.path.exists(self.path) and self.path not in self.watcher.files():
+            self.watcher.addPath(self.path)
+
+    def start(self):
+        # 同时监视所在目录，这样文件被替换或重新创建也能收到通知
+        self.watcher.addPath(os.path.dirname(self.path))
+        self._watch_file()
+        self.mark_current()
+
+    def stop(self):
+        self.timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+
+    def mark_current(self):
+        """把磁盘上的当前内容记为已加载（程序自己保存课表后调用，避免重复加载）。"""
+        self._stamp = self._stat()
+        self._digest = schedule_file_digest(self.path)
+
+    def _on_fs_event(self, path):
+        self._watch_file()
+        self.timer.start()
+
+    def check(self):
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return
+        if self._busy:
+            self._dirty = True
+            return
+        self._busy = True
+        self.pool.start(_ScheduleLoadJob(self._signals, self.path, stamp, self.dense_table))
+
+    def _on_loaded(self, result):
+        self._busy = False
+        stamp, digest, segments, index, elapsed_ms = result
+        if digest is not None:
+            RELOAD_MS.observe(elapsed_ms)
+            self._stamp = stamp
+            if digest != self._digest:
+                self._digest = digest
+                self.schedule_loaded.emit(segments, index)
+        if self._dirty:
+            self._dirty = False
+            self.check()
+
+
+@dataclasses.dataclass(frozen=True)
+class DisplayState:
+    time: str = "--:--:--"
+    state: str = "--"
+    course: str = "--"
+    hint_title: str = "提示:"
+    hint: str = "--:--:--"
+
+
+def format_remaining(remaining: datetime.timedelta) -> str:
+    total_seconds = max(0, int(remaining.total_seconds()))
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class RepaintCounter(QObject):
+    """调试用：统计被监视控件每分钟的重绘 (Paint) 和重新布局 (LayoutRequest) 次数。"""
+
+    def __init__(self, widgets, parent=None, verbose=False):
+        super().__init__(parent)
+        self.verbose = verbose
+        self.counts = {"paint": 0, "layout": 0}
+        self.last_minute = dict(self.counts)
+        for widget in widgets:
+            widget.installEventFilter(self)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._roll)
+        self.timer.start(60 * 1000)
+
+    def eventFilter(self, obj, event):
+        etype = event.type()
+        if etype == QEvent.Type.Paint:
+            self.counts["paint"] += 1
+        elif etype == QEvent.Type.LayoutRequest:
+            self.counts["layout"] += 1
+        return False
+
+    def _roll(self):
+        self.last_minute = dict(self.counts)
+        self.counts = {"paint": 0, "layout": 0}
+        if self.verbose:
+            print(f"Repaints/min: {self.last_minute['paint']}, relayouts/min: {self.last_minute['layout']}")
+
+
+class PaintTimer(QObject):
+    """把被监视控件每次 Paint 事件的耗时记进直方图。
+
+    每秒变化的标签是子控件，各自收到 Paint 事件，窗口自己的 paintEvent 只画背景，量不到它们。
+    """
+
+    def __init__(self, widgets, histogram, parent=None):
+        super().__init__(parent)
+        self.histogram = histogram
+        for widget in widgets:
+            widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() != QEvent.Type.Paint:
+            return False
+        # 在过滤器里直接交给控件处理，计时覆盖它的整个 paintEvent；返回 True 避免再画一遍
+        start = time.perf_counter()
+        obj.event(event)
+        self.histogram.observe((time.perf_counter() - start) * 1000.0)
+        return True
+
+
+class FontScaler(QObject):
+    """按窗口宽度缩放字体：拖动缩放时去抖，宽度按档位取整，每档的 QFont 只创建一次。"""
+    DEBOUNCE_MS = 60
+    FAMILY = "Microsoft YaHei"
+
+    def __init__(self, window, title_labels, value_labels):
+        super().__init__(window)
+        self.window = window
+        self.title_labels = title_labels
+        self.value_labels = value_labels
+        self.current_bucket = None
+        self._fonts = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.apply)
+
+    @staticmethod
+    def bucket_for(width: int) -> int:
+        return max(10, width // 35)
+
+    def fonts_for(self, bucket: int):
+        fonts = self._fonts.get(bucket)
+        if fonts is None:
+            fonts = (QFont(self.FAMILY, bucket, QFont.Weight.Bold), QFont(self.FAMILY, bucket))
+            self._fonts[bucket] = fonts
+        return fonts
+
+    def schedule(self):
+        self.timer.start(self.DEBOUNCE_MS)
+
+    def apply(self):
+        self.timer.stop()
+        bucket = self.bucket_for(self.window.width())
+        if bucket == self.current_bucket:
+            return
+        self.current_bucket = bucket
+        title_font, font = self.fonts_for(bucket)
+        for label in self.title_labels:
+            label.setFont(title_font)
+        for label in self.value_labels:
+            label.setFont(font)
+
+
+def format_time_24h(now: datetime.datetime) -> str:
+    return now.strftime("%H:%M:%S")
+
+
+def format_time_12h(now: datetime.datetime) -> str:
+    am_pm = "上午" if now.hour < 12 else "下午"
+    return now.strftime("%I:%M:%S ") + am_pm
+
+
+class PerfOverlay(QWidget):
+    """托盘隐藏菜单"性能"打开的浮窗：每秒刷新一次 METRICS 摘要，只在可见时刷新。"""
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.Tool | Qt.WindowType.WindowStaysOnTopHint)
+        self.setWindowTitle("性能")
+        layout = QVBoxLayout(self)
+        self.text = QLabel()
+        self.text.setFont(QFont("Consolas", 9))
+        self.text.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.text)
+        buttons = QHBoxLayout()
+        reset_btn = QPushButton("清零")
+        reset_btn.clicked.connect(self.reset)
+        dump_btn = QPushButton("导出 JSON")
+        dump_btn.clicked.connect(self.dump)
+        buttons.addWidget(reset_btn)
+        buttons.addWidget(dump_btn)
+        layout.addLayout(buttons)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        self.text.setText(METRICS.report())
+
+    def reset(self):
+        METRICS.reset()
+        self.refresh()
+
+    def dump(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能数据", "metrics.json", "JSON (*.json)")
+        if path and not METRICS.dump_json(path):
+            QMessageBox.warning(self, "导出失败", f"无法写入 {path}")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(self.REFRESH_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+
 class ModernWindow(QMainWindow):
-    def __init__(self):
+    startup_finished = Signal()
+
+    def __init__(self, measure_ticks: bool = False, count_repaints: bool = False, phases=None,
+                 app_settings: AppSettings = None):
         super().__init__()
-        self.app_settings = AppSettings()
-        self.app_settings.settings.setValue("auto_start_handled", True)
+        self.phases = phases
+        self.tray_icon = None
+        self.reminders = None
+        self.perf_overlay = None
+        self._startup_pending = True
+        # 默认读写 QSettings；基准测试等场景可传入内存设置，免得读到或改动用户的真实配置
+        self.app_settings = app_settings if app_settings is not None else AppSettings(QtSettingsBackend())
+        self.app_settings.backend.set_value("auto_start_handled", True)
+        METRICS.gauge("settings.store_reads", lambda: self.app_settings.store_reads)
+        METRICS.gauge("settings.store_writes", lambda: self.app_settings.store_writes)
         
         self.schedule_manager = ScheduleManager(load_schedule())
         self.time_offset = datetime.timedelta(0)
+        self.tz_service = TimezoneService(self.app_settings.timezone)
+        self._apply_settings()
+        self.app_settings.changed.connect(self.on_app_settings_changed)
         
         self.setWindowTitle("时间管理大师")
         self.setMinimumSize(400, 250)
         self.setup_ui()
         self.apply_theme()
+        # 先装计时过滤器：后装的过滤器先收到事件，RepaintCounter 才能照常计数
+        self.paint_timer = PaintTimer([self.main_panel] + self.main_panel.findChildren(QLabel), PAINT_PANEL_MS, self)
+        if count_repaints:
+            self.repaint_counter = RepaintCounter(
+                [self.centralWidget()] + self.centralWidget().findChildren(QWidget), self, verbose=True)
         
+        self.time_sync = TimeSyncService(self.app_settings, self)
+        self.time_sync.synced.connect(self.on_time_synced)
+
+        self.schedule_watcher = ScheduleWatcher(SCHEDULE_FILE, self.schedule_manager.dense_table, self)
+        self.schedule_watcher.schedule_loaded.connect(self.on_schedule_loaded)
+
+        self.ticker = TickScheduler(self.current_local_time, self.next_transition, self)
+        if measure_ticks:
+            self.ticker.enable_measurement()
+        self.ticker.tick.connect(self.tick)
+        for mode in TickScheduler.MODES:
+            METRICS.gauge(f"tick.wakeups.{mode}", lambda mode=mode: self.ticker.wakeups[mode])
+            METRICS.gauge(f"tick.wakeups_per_hour.{mode}", lambda mode=mode: self.ticker.wakeups_per_hour()[mode])
+        self.tick()
+        self.ticker.start()
+
+    def _mark(self, phase):
+        if self.phases is not None:
+            self.phases.mark(phase)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._startup_pending:
+            # 首帧画出来之后再创建托盘、启动网络校时
+            self._startup_pending = False
+            self._mark("first_paint")
+            QTimer.singleShot(0, self._finish_startup)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_power_mode()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._update_power_mode()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._update_power_mode()
+
+    def _update_power_mode(self):
+        # 隐藏到托盘或最小化时不再每秒刷新标签，只按分钟和切换点更新托盘提示
+        background = not self.isVisible() or self.isMinimized()
+        if background == self.ticker.low_power:
+            return
+        self.ticker.set_low_power(background)
+        self.tick()
+
+    def _finish_startup(self):
         self.setup_tray()
-        
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.tick)
-        self.timer.start(1000)
-        
+        self.reminders = ReminderService(self.current_local_time, self)
+        self.reminders.reminder.connect(self.show_tray_message)
+        self._apply_reminder_rules()
+        self.schedule_watcher.start()
         if self.app_settings.sync_world_time:
             self.sync_time()
+        self._mark("deferred")
+        self.startup_finished.emit()
 
     def setup_ui(self):
         central_widget = QWidget()
@@ -557,6 +1703,7 @@ class ModernWindow(QMainWindow):
         
         panel = QWidget()
         panel.setObjectName("MainPanel")
+        self.main_panel = panel
         panel.setStyleSheet("QWidget#MainPanel { background-color: white; border-radius: 12px; }")
         panel_layout = QVBoxLayout(panel)
         panel_layout.setContentsMargins(20, 20, 20, 20)
@@ -570,6 +1717,15 @@ class ModernWindow(QMainWindow):
         self.course_label_val = QLabel("--")
         self.hint_label_title = QLabel("提示:")
         self.hint_label_val = QLabel("--:--:--")
+
+        self._display = DisplayState()
+        self._display_labels = {
+            "time": self.time_label_val,
+            "state": self.state_label_val,
+            "course": self.course_label_val,
+            "hint_title": self.hint_label_title,
+            "hint": self.hint_label_val,
+        }
         
         for lb in [self.time_label_title, self.time_label_val, 
                    self.state_label_title, self.state_label_val,
@@ -610,32 +1766,24 @@ class ModernWindow(QMainWindow):
             QPushButton:hover { background-color: #74b9ff; }
             QPushButton:pressed { background-color: #0984e3; }
         ''')
-        self.update_fonts()
-        
-    def update_fonts(self):
-        width = self.width()
-        base_size = max(10, width // 35)
-        font = QFont("Microsoft YaHei", base_size)
-        title_font = QFont("Microsoft YaHei", base_size, QFont.Weight.Bold)
-        
-        self.time_label_title.setFont(title_font)
-        self.state_label_title.setFont(title_font)
-        self.course_label_title.setFont(title_font)
-        self.hint_label_title.setFont(title_font)
-        
-        self.time_label_val.setFont(font)
-        self.state_label_val.setFont(font)
-        self.course_label_val.setFont(font)
-        self.hint_label_val.setFont(font)
-        
         self.time_label_val.setStyleSheet("color: #00b894; font-weight: bold;")
         self.state_label_val.setStyleSheet("color: #e17055; font-weight: bold;")
         self.course_label_val.setStyleSheet("color: #d63031; font-weight: bold;")
         self.hint_label_val.setStyleSheet("color: #0984e3; font-weight: bold;")
+
+        self.font_scaler = FontScaler(
+            self,
+            [self.time_label_title, self.state_label_title, self.course_label_title, self.hint_label_title],
+            [self.time_label_val, self.state_label_val, self.course_label_val, self.hint_label_val],
+        )
+        self.update_fonts()
+        
+    def update_fonts(self):
+        self.font_scaler.apply()
         
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        self.update_fonts()
+        self.font_scaler.schedule()
 
     def setup_tray(self):
         self.tray_icon = QSystemTrayIcon(self)
@@ -656,6 +1804,7 @@ class ModernWindow(QMainWindow):
         tray_menu.addAction(settings_action)
         
         def on_update():
+            import webbrowser
             QTimer.singleShot(100, lambda: QMessageBox.information(self, "更新", "自动更新暂未实现，请手动更新。\n链接: https://www.123pan.com/s/yof3jv-7xii.html"))
             QTimer.singleShot(200, lambda: webbrowser.open("https://www.123pan.com/s/yof3jv-7xii.html"))
         
@@ -670,6 +1819,14 @@ class ModernWindow(QMainWindow):
         about_action.triggered.connect(on_about)
         tray_menu.addAction(about_action)
         
+        # 隐藏入口：按住 Shift 打开托盘菜单时才出现
+        perf_action = QAction("性能", self)
+        perf_action.triggered.connect(self.show_perf_overlay)
+        perf_action.setVisible(False)
+        tray_menu.addAction(perf_action)
+        tray_menu.aboutToShow.connect(lambda: perf_action.setVisible(
+            bool(QApplication.queryKeyboardModifiers() & Qt.KeyboardModifier.ShiftModifier)))
+
         tray_menu.addSeparator()
         tray_menu.addAction(quit_action)
         
@@ -683,93 +1840,122 @@ class ModernWindow(QMainWindow):
             self.activateWindow()
 
     def closeEvent(self, event):
-        if self.tray_icon.isVisible():
+        if self.tray_icon is not None and self.tray_icon.isVisible():
             self.hide()
-            try:
-                if hasattr(QSystemTrayIcon, "MessageIcon"):
-                    self.tray_icon.showMessage("时间管理大师", "程序已最小化到托盘运行", QSystemTrayIcon.MessageIcon.Information, 2000)
-                else:
-                    self.tray_icon.showMessage("时间管理大师", "程序已最小化到托盘运行", QSystemTrayIcon.Information, 2000)
-            except Exception:
-                pass
+            self.show_tray_message("程序已最小化到托盘运行", 2000)
             event.ignore()
         else:
             event.accept()
 
-    def sync_time(self):
+    def show_perf_overlay(self):
+        if self.perf_overlay is None:
+            self.perf_overlay = PerfOverlay(self)
+        self.perf_overlay.show()
+        self.perf_overlay.raise_()
+
+    def show_tray_message(self, text: str, msecs: int = 5000):
+        if self.tray_icon is None:
+            return
         try:
-            net_time = get_network_time()
-            if net_time:
-                local_now = datetime.datetime.now(datetime.timezone.utc)
-                self.time_offset = net_time - local_now
-                print(f"Time synced, offset: {self.time_offset.total_seconds()} seconds")
+            if hasattr(QSystemTrayIcon, "MessageIcon"):
+                self.tray_icon.showMessage("时间管理大师", text, QSystemTrayIcon.MessageIcon.Information, msecs)
             else:
-                self.time_offset = datetime.timedelta(0)
-        except Exception as e:
-            print(f"Sync time error: {e}")
-            self.time_offset = datetime.timedelta(0)
+                self.tray_icon.showMessage("时间管理大师", text, QSystemTrayIcon.Information, msecs)
+        except Exception:
+            pass
 
-    def tick(self):
+    def _apply_reminder_rules(self):
+        # 规则变化时整个堆按新规则重建；关闭提醒就是空规则
+        if self.app_settings.reminders_enabled:
+            rules = default_reminder_rules(self.app_settings.reminder_lead_minutes)
+        else:
+            rules = []
+        self.reminders.rebuild(self.schedule_manager, self.tz_service, rules)
+
+    def sync_time(self):
+        self.time_sync.start()
+
+    def on_time_synced(self, offset: datetime.timedelta):
+        self.time_offset = offset
+        print(f"Time synced, offset: {self.time_offset.total_seconds()} seconds")
+        self.tick()
+        self.ticker.reschedule()
+        if self.reminders is not None:
+            self.reminders.arm()
+
+    def current_local_time(self) -> datetime.datetime:
         if self.app_settings.sync_world_time:
             now_utc = datetime.datetime.now(datetime.timezone.utc) + self.time_offset
         else:
             now_utc = datetime.datetime.now(datetime.timezone.utc)
         
-        try:
-            tz = pytz.timezone(self.app_settings.timezone)
-        except pytz.UnknownTimeZoneError:
-            tz = pytz.timezone("Asia/Shanghai")
-            
-        now_local = now_utc.astimezone(tz)
-        
-        if self.app_settings.time_format_24h:
-            time_str = now_local.strftime("%H:%M:%S")
-        else:
-            am_pm = "上午" if now_local.hour < 12 else "下午"
-            time_str = now_local.strftime("%I:%M:%S ") + am_pm
-        self.time_label_val.setText(time_str)
+        return self.tz_service.to_local(now_utc)
+
+    def _apply_settings(self):
+        self.tz_service.set_zone(self.app_settings.timezone)
+        self._format_time = format_time_24h if self.app_settings.time_format_24h else format_time_12h
+
+    def next_transition(self, now_local: datetime.datetime) -> datetime.datetime:
+        return self.schedule_manager.next_change_instant(now_local, self.tz_service)
+
+    def tick(self):
+        start = time.perf_counter()
+        if self.ticker.low_power:
+            self.update_tray_tooltip()
+            TICK_MS.observe((time.perf_counter() - start) * 1000.0)
+            return
+        now_local = self.current_local_time()
+        time_str = self._format_time(now_local)
         
         try:
-            now_naive = now_local.replace(tzinfo=None)
-            now_time = now_naive.time()
-            
-            seg = self.schedule_manager.current_segment(now_time)
-            remaining = self.schedule_manager.remaining_to_next_change(now_naive)
-            
-            if hasattr(seg, 'state'):
-                self.state_label_val.setText(seg.state if seg.state else "无状态")
-            else:
-                self.state_label_val.setText("无状态")
-                
-            if hasattr(seg, 'course_name') and getattr(seg, 'state', '') == "上课":
-                self.course_label_val.setText(seg.course_name)
-            else:
-                self.course_label_val.setText("无")
-            
-            if hasattr(seg, 'next_hint'):
-                hint_txt = seg.next_hint if seg.next_hint else "提示:"
-            else:
-                hint_txt = "提示:"
-                
-            self.hint_label_title.setText(hint_txt)
-            
-            total_seconds = int(remaining.total_seconds())
-            if total_seconds < 0:
-                total_seconds = 0
-                
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            seconds = total_seconds % 60
-            
-            if hours > 0:
-                self.hint_label_val.setText(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-            else:
-                self.hint_label_val.setText(f"{minutes:02d}:{seconds:02d}")
-                
+            seg = self.schedule_manager.current_segment(now_local.time())
+            remaining = self.next_transition(now_local) - now_local
+            display = DisplayState(
+                time=time_str,
+                state=seg.state or "无状态",
+                course=seg.course_name if seg.state == "上课" else "无",
+                hint_title=seg.next_hint or "提示:",
+                hint=format_remaining(remaining),
+            )
+            # 窗口可见时也顺手刷新托盘提示，文本按分钟变化，setToolTip 很少真正调用
+            self._set_tray_tooltip(seg, remaining)
         except Exception as e:
             print(f"Schedule error: {e}")
+            display = dataclasses.replace(self._display, time=time_str)
         
-        self.update()
+        self.apply_display(display)
+        TICK_MS.observe((time.perf_counter() - start) * 1000.0)
+
+    def update_tray_tooltip(self):
+        if self.tray_icon is None:
+            return
+        now_local = self.current_local_time()
+        try:
+            seg = self.schedule_manager.current_segment(now_local.time())
+            remaining = self.next_transition(now_local) - now_local
+        except Exception as e:
+            print(f"Schedule error: {e}")
+            return
+        self._set_tray_tooltip(seg, remaining)
+
+    def _set_tray_tooltip(self, seg, remaining: datetime.timedelta):
+        if self.tray_icon is None:
+            return
+        # 低功耗模式只在整分钟和切换点醒来，剩余时间按分钟向上取整
+        minutes = -(-int(remaining.total_seconds()) // 60)
+        course = f" {seg.course_name}" if seg.state == "上课" and seg.course_name else ""
+        text = f"时间管理大师\n{seg.state or '无状态'}{course}\n{seg.next_hint or '提示:'} {minutes} 分钟"
+        if text != self.tray_icon.toolTip():
+            self.tray_icon.setToolTip(text)
+
+    def apply_display(self, display: "DisplayState"):
+        # 只把和上一帧不同的字段推给控件，避免无谓的重新布局和重绘
+        prev = self._display
+        for field, label in self._display_labels.items():
+            value = getattr(display, field)
+            if getattr(prev, field) != value:
+                label.setText(value)
+        self._display = display
 
     def open_settings(self):
         if hasattr(self, '_settings_dialog') and self._settings_dialog.isVisible():
@@ -777,17 +1963,38 @@ class ModernWindow(QMainWindow):
             return
             
         self._settings_dialog = SettingsDialog(self.app_settings, self)
-        self._settings_dialog.settings_changed.connect(self.on_settings_changed)
         self._settings_dialog.schedule_changed.connect(self.on_schedule_changed)
         self._settings_dialog.show()
         
-    def on_settings_changed(self):
-        if self.app_settings.sync_world_time:
-            self.sync_time()
-        else:
-            self.time_offset = datetime.timedelta(0)
+    def on_app_settings_changed(self, keys):
+        if keys & {"timezone", "time_format_24h"}:
+            self._apply_settings()
+        if keys & {"sync_world_time", "time_source", "sntp_servers"}:
+            if self.app_settings.sync_world_time:
+                self.sync_time()
+            else:
+                self.time_sync.stop()
+                self.time_offset = datetime.timedelta(0)
+        # 时区和提醒设置可能在同一批里一起变化，所有设置生效后只重建一次提醒堆
+        if self.reminders is not None and keys & {"timezone", "reminders_enabled", "reminder_lead_minutes"}:
+            self._apply_reminder_rules()
         self.tick()
+        self.ticker.reschedule()
         
     def on_schedule_changed(self):
+        start = time.perf_counter()
         self.schedule_manager.reload(load_schedule())
+        RELOAD_MS.observe((time.perf_counter() - start) * 1000.0)
+        self.schedule_watcher.mark_current()
+        self.on_schedule_reloaded()
+
+    def on_schedule_loaded(self, segments, index):
+        # 课表文件被外部更新（例如统一下发），无需重启即可生效
+        self.schedule_manager.reload(segments, index)
+        self.on_schedule_reloaded()
+
+    def on_schedule_reloaded(self):
         self.tick()
+        self.ticker.reschedule()
+        if self.reminders is not None:
+            self.reminders.rebuild(self.schedule_manager, self.tz_service)